@@ -0,0 +1,390 @@
+# --- bench_entry.py ---
+
+"""Synthetic-load benchmark for the True Copy entry screen.
+
+Seeds a fresh SQLite file per table size and times the screen's workflows: window
+startup, Ctrl+R refresh, selecting a pending row, save-and-new, searching the
+pending list and several clerks saving at once. Each size runs in its own process so peak RSS belongs to that size alone.
+Results are written as JSON so runs from two commits can be compared:
+
+    python bench_entry.py --rows 10000 100000 --output before.json
+    python bench_entry.py --rows 10000 100000 --output after.json --compare before.json
+
+The run also fails when the pending-list search misses its budget: SEARCH_BUDGET_MS at the
+95th percentile while the index holds up to SEARCH_BUDGET_ROWS pending applications.
+
+By default the workflows are driven through the same entry_store calls the window makes,
+with no display needed. --gui drives a real DataEntryManagement window instead and needs
+a display (run it under xvfb-run on a headless machine) plus everything new_entry.py
+imports. It also reports the window's startup path: importing new_entry ("import"),
+construction to the first drawn frame, when the form can be used ("first_paint"), and
+the same with fast start turned off ("first_paint_eager").
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from entry_seed import create_database, seed_database
+from entry_store import (ConnectionManager, fetch_entry_detail, first_pending_page, last_receipt_number,
+                         peek_true_copy_number, pending_changes, pending_summary, prepare_database,
+                         save_entries)
+from pending_index import load_pending_index
+
+WORKFLOWS = ("startup", "refresh", "select", "save_and_new", "search", "concurrent_save")
+GUI_WORKFLOWS = ("import", "first_paint", "first_paint_eager")
+SEARCH_QUERIES = ("CC/1", "2", "urgent 50", "SC", "100")  # Typed into the search bar, a key at a time
+CONCURRENT_CLERKS = 4  # Windows saving at once in the concurrent_save workflow, each on its own connection
+DEFAULT_ROWS = (10000, 100000)
+REGRESSION_THRESHOLD = 0.20  # A p95 this much slower than the baseline counts as a regression
+REGRESSION_FLOOR_MS = 0.1  # ...as long as it is also this much slower, so timer noise on tiny calls is ignored
+SEARCH_BUDGET_MS = 10  # A pending-list search must answer within this (p95)...
+SEARCH_BUDGET_ROWS = 100000  # ...while the search index holds up to this many pending applications
+
+
+def peak_rss_bytes():
+    """Returns this process's peak resident set size in bytes."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return _windows_peak_rss()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+
+def _windows_peak_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                             ctypes.byref(counters), counters.cb)
+    return counters.PeakWorkingSetSize
+
+
+def percentile(samples, fraction):
+    """Returns the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def summarize(samples):
+    """Turns timings in seconds into the millisecond statistics stored in the JSON report."""
+    return {
+        "runs": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+    }
+
+
+def sample_entry():
+    """Returns a form-like entry for save-and-new; numbers are allocated on save."""
+    return {"application_date": datetime.now().strftime("%Y-%m-%d"), "copy_type": "Certified Copy",
+            "application_category": "Urgent", "advance_amount": "50", "payment_type": "advance"}
+
+
+def time_call(func):
+    """Returns how long `func()` took, in seconds."""
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def concurrent_saves(path, clerks=CONCURRENT_CLERKS, saves=50):
+    """Has `clerks` threads save `saves` entries each at once; returns every save's latency in seconds.
+
+    Raises AssertionError if two saves were given the same receipt or True Copy number.
+    """
+    latencies = []
+    start = threading.Barrier(clerks)
+
+    def clerk():
+        db = ConnectionManager(path=path)
+        conn = db.connection()
+        watermark = first_pending_page(conn)[0]
+        start.wait()
+        for _ in range(saves):
+            latencies.append(time_call(lambda: save_entries(conn, [sample_entry()])))
+            watermark = pending_changes(conn, watermark)[0]  # The refresh other clerks' saves set off
+        db.close()
+
+    threads = [threading.Thread(target=clerk) for _ in range(clerks)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = ConnectionManager(path=path)
+    conn = db.connection()
+    for sql in ("SELECT receipt_number FROM receipt_register GROUP BY 1 HAVING COUNT(*) > 1",
+                """SELECT true_copy_number FROM true_copy_applications
+                   GROUP BY true_copy_number, application_category HAVING COUNT(*) > 1"""):
+        assert not conn.execute(sql).fetchone(), "two clerks were given the same number"
+    db.close()
+    return latencies
+
+
+def bench_headless(path, repeat):
+    """Times the workflows through the entry_store calls the window makes for each of them."""
+    timings = {name: [] for name in WORKFLOWS}
+
+    def startup():
+        db = ConnectionManager(path=path)
+        conn = db.connection()
+        prepare_database(conn)
+        first_pending_page(conn)
+        pending_summary(conn)
+        peek_true_copy_number(conn, "Certified Copy", "Urgent", datetime.now().year)
+        last_receipt_number(conn)
+        db.close()
+
+    for _ in range(repeat):
+        timings["startup"].append(time_call(startup))
+
+    db = ConnectionManager(path=path)
+    conn = db.connection()
+    watermark, rows = first_pending_page(conn)
+    ids = [row['id'] for row in rows]
+    rng = random.Random(1)
+
+    def refresh():
+        nonlocal watermark
+        watermark = pending_changes(conn, watermark)[0]
+        pending_summary(conn)
+
+    def save_and_new():
+        nonlocal watermark
+        save_entries(conn, [sample_entry()])
+        watermark = pending_changes(conn, watermark)[0]
+        pending_summary(conn)
+        peek_true_copy_number(conn, "Certified Copy", "Urgent", datetime.now().year)
+        last_receipt_number(conn)
+
+    index = load_pending_index(conn)[1]
+    searches = [query[:length] for query in SEARCH_QUERIES for length in range(1, len(query) + 1)]
+
+    for _ in range(repeat):
+        timings["refresh"].append(time_call(refresh))
+        timings["select"].append(time_call(lambda: fetch_entry_detail(conn, rng.choice(ids))))
+        timings["save_and_new"].append(time_call(save_and_new))
+        timings["search"].append(time_call(lambda: index.search(rng.choice(searches), rng.randrange(7),
+                                                                  rng.random() < 0.5, limit=1000)))
+    db.close()
+    timings["concurrent_save"] = concurrent_saves(path, saves=repeat)
+    return timings
+
+
+def bench_gui(path, repeat):
+    """Times the workflows on a real DataEntryManagement window, waiting for the worker each time."""
+    import tkinter as tk
+    timings = {name: [] for name in WORKFLOWS + GUI_WORKFLOWS}
+    started = time.perf_counter()
+    import new_entry
+    timings["import"].append(time.perf_counter() - started)
+
+    new_entry.messagebox.showinfo = lambda *args, **kwargs: None  # The success popup would block the run
+    root = tk.Tk()
+    root.withdraw()
+
+    def settle(window):
+        while not (window.loading_started and window.worker.idle()):
+            root.update()
+            time.sleep(0.001)
+        root.update()
+
+    def open_window(fast_start=True):
+        window = new_entry.DataEntryManagement(root, db_path=path, fast_start=fast_start)
+        settle(window)
+        return window
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        window = open_window()
+        timings["startup"].append(time.perf_counter() - started)
+        first_paint = window.first_paint_seconds
+        window.destroy()
+        window = open_window(fast_start=False)
+        if first_paint is not None and window.first_paint_seconds is not None:  # None: never drawn
+            timings["first_paint"].append(first_paint)
+            timings["first_paint_eager"].append(window.first_paint_seconds)
+        window.destroy()
+
+    window = open_window()
+    items = window.pending_entry_tree.get_children()
+    rng = random.Random(1)
+
+    def refresh():
+        window.refresh_entries()
+        settle(window)
+
+    def select():
+        window.pending_entry_tree.selection_set(rng.choice(items))  # Fires <<TreeviewSelect>>
+        settle(window)
+
+    def save_and_new():
+        window.new_entry()
+        settle(window)
+        window.advance_entry.insert(0, "50")
+        window.save_and_new()
+        settle(window)
+
+    searches = [query[:length] for query in SEARCH_QUERIES for length in range(1, len(query) + 1)]
+
+    def search():
+        window.search_var.set(rng.choice(searches))
+        window.filter_pending_entries()
+        settle(window)
+
+    for _ in range(repeat):
+        timings["refresh"].append(time_call(refresh))
+        timings["select"].append(time_call(select))
+        timings["save_and_new"].append(time_call(save_and_new))
+    search()  # Loads the search index before the timed runs
+    for _ in range(repeat):
+        timings["search"].append(time_call(search))
+    window.destroy()
+    root.destroy()
+    return timings
+
+
+def run_size(rows, repeat, gui, results):
+    """Seeds a database of `rows` applications, benchmarks it and puts the summary on `results`."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        started = time.perf_counter()
+        conn = seed_database(create_database(path), rows)
+        seed_seconds = time.perf_counter() - started
+        pending_rows, = conn.execute("SELECT COUNT(*) FROM true_copy_applications WHERE status = 'Pending'").fetchone()
+        conn.close()
+
+        timings = (bench_gui if gui else bench_headless)(path, repeat)
+        results.put({
+            "rows": rows,
+            "pending_rows": pending_rows,
+            "seed_seconds": round(seed_seconds, 2),
+            "peak_rss_mb": round(peak_rss_bytes() / 2 ** 20, 1),
+            "workflows": {name: summarize(samples) for name, samples in timings.items() if samples},
+        })
+
+
+def current_commit():
+    """Returns the checked-out git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Prints p95 changes against a baseline report and returns the regressions found."""
+    previous = {size["rows"]: size for size in baseline["sizes"]}
+    regressions = []
+    for size in report["sizes"]:
+        before = previous.get(size["rows"])
+        if before is None:
+            continue
+        for name, stats in size["workflows"].items():
+            old = before["workflows"].get(name)
+            if not old or not old["p95_ms"]:
+                continue
+            change = stats["p95_ms"] / old["p95_ms"] - 1
+            slower = stats["p95_ms"] - old["p95_ms"] > REGRESSION_FLOOR_MS
+            flag = "  REGRESSION" if change > threshold and slower else ""
+            print(f"{size['rows']:>9} {name:<15} p95 {old['p95_ms']:>9.3f} -> {stats['p95_ms']:>9.3f} ms "
+                  f"({change:+.0%}){flag}")
+            if flag:
+                regressions.append((size["rows"], name, change))
+    return regressions
+
+
+def over_search_budget(report):
+    """Prints and returns the sizes whose search p95 is over SEARCH_BUDGET_MS."""
+    over = []
+    for size in report["sizes"]:
+        search = size["workflows"].get("search")
+        if search and size.get("pending_rows", 0) <= SEARCH_BUDGET_ROWS and search["p95_ms"] > SEARCH_BUDGET_MS:
+            print(f"{size['rows']:>9} search p95 {search['p95_ms']:.3f} ms is over the {SEARCH_BUDGET_MS} ms budget "
+                  f"({size['pending_rows']} pending)")
+            over.append(size["rows"])
+    return over
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the True Copy entry screen on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                        help="application counts to seed, e.g. 10000 100000 1000000")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per workflow (default 50)")
+    parser.add_argument("--gui", action="store_true", help="drive a real window (needs a display)")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare p95 latencies against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="p95 slowdown counted as a regression (default 0.20)")
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    report = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "mode": "gui" if args.gui else "headless",
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeat": args.repeat,
+        "sizes": [],
+    }
+    for rows in args.rows:
+        results = context.Queue()
+        process = context.Process(target=run_size, args=(rows, args.repeat, args.gui, results))
+        process.start()
+        while True:
+            try:
+                size = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    print(f"Benchmark for {rows} applications failed.", file=sys.stderr)
+                    return 2
+        process.join()
+        report["sizes"].append(size)
+
+        print(f"{rows} applications, {size['pending_rows']} pending (seeded in {size['seed_seconds']} s, "
+              f"peak RSS {size['peak_rss_mb']} MiB)")
+        for name, stats in size["workflows"].items():
+            print(f"    {name:<15} p50 {stats['p50_ms']:>9.3f}  p95 {stats['p95_ms']:>9.3f}  "
+                  f"p99 {stats['p99_ms']:>9.3f} ms")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            if compare(report, json.load(baseline), args.threshold):
+                return 1
+    if over_search_budget(report):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
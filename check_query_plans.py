@@ -0,0 +1,114 @@
+# --- check_query_plans.py ---
+
+"""Fails when a query the entry screen runs falls back to a full table scan.
+
+Seeds a database, makes every entry_store call DataEntryManagement makes while a trace
+callback records the SQL, then runs EXPLAIN QUERY PLAN on each recorded statement.
+Run it after touching a query or an index:
+
+    python check_query_plans.py [--rows 20000]
+"""
+
+import argparse
+import re
+import sys
+from datetime import datetime
+
+from entry_seed import create_database, seed_database
+from entry_store import (fetch_entry_detail, fetch_pending_page, first_pending_page, last_receipt_number,
+                         peek_true_copy_number, pending_changes, pending_summary, prune_changes, save_entries,
+                         update_entry)
+from pending_index import load_pending_index
+from reports import collections, refresh_rollup
+
+# Tables that may be read whole: pending_summary holds one row per advance amount,
+# receipt_rollup_dirty only the days written to since the last report, and sqlite_master
+# one row per table, index and view
+ALLOWED_SCANS = {"pending_summary", "receipt_rollup_dirty", "sqlite_master"}
+PLANNED_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+_SCAN = re.compile(r"SCAN (?:TABLE )?(?:\w+\.)?(\w+)(.*)")
+
+
+def run_screen_workflow(conn):
+    """Makes the calls the entry window makes: startup, paging, search, select, save, edit, refresh, report."""
+    year = datetime.now().year
+    watermark, rows = first_pending_page(conn)
+    oldest = (rows[-1]['application_date'], rows[-1]['id'])
+    fetch_pending_page(conn, older_than=oldest)
+    fetch_pending_page(conn, newer_than=oldest)
+    load_pending_index(conn)
+    pending_summary(conn)
+    peek_true_copy_number(conn, "Certified Copy", "Urgent", year)
+    peek_true_copy_number(conn, "Simple Copy", None, year)
+    last_receipt_number(conn)
+    detail, payment_type = fetch_entry_detail(conn, rows[0]['id'])
+
+    entry = {"application_date": datetime.now().strftime("%Y-%m-%d"), "copy_type": "Certified Copy",
+             "application_category": "Urgent", "advance_amount": "50", "payment_type": "advance"}
+    save_entries(conn, [entry, dict(entry, receipt_number="R-1", true_copy_number="CC/999/1999")])
+    update_entry(conn, rows[0]['id'], dict(detail, advance_amount=detail['advance_amount'] + 5,
+                                           payment_type=payment_type or "advance"), detail['row_version'])
+    pending_changes(conn, watermark)
+    collections(conn, f"{year}-01-01", f"{year}-12-31", "month")  # Recomputes only the days just saved to
+    prune_changes(conn)
+
+
+def capture_statements(conn, workflow):
+    """Runs `workflow(conn)` and returns the distinct data statements it executed, in order."""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        workflow(conn)
+    finally:
+        conn.set_trace_callback(None)
+
+    seen = {}
+    for sql in statements:
+        sql = sql.strip()
+        if sql.upper().startswith(PLANNED_STATEMENTS):  # Skips BEGIN/COMMIT and trigger markers
+            seen.setdefault(sql, None)
+    return list(seen)
+
+
+def plan_problems(conn, sql):
+    """Returns the query-plan lines of `sql` that read a whole table or sort a whole result."""
+    problems = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+        detail = row[3]
+        scan = _SCAN.match(detail)
+        if (scan and scan.group(1) != "CONSTANT" and "USING" not in scan.group(2)
+                and scan.group(1) not in ALLOWED_SCANS):
+            problems.append(detail)
+        elif detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+            problems.append(detail)
+    return problems
+
+
+def find_full_scans(conn, workflow=run_screen_workflow):
+    """Returns (sql, problems) for every statement of `workflow` with a bad plan."""
+    statements = capture_statements(conn, workflow)
+    return [(sql, problems) for sql, problems in ((sql, plan_problems(conn, sql)) for sql in statements)
+            if problems]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the entry screen's queries for full table scans.")
+    parser.add_argument("--rows", type=int, default=20000, help="applications to seed (default 20000)")
+    args = parser.parse_args(argv)
+
+    conn = seed_database(create_database(), args.rows)
+    refresh_rollup(conn)  # The one-off first build of the collections rollup reads every receipt
+    offenders = find_full_scans(conn)
+    for sql, problems in offenders:
+        print(" ".join(sql.split()))
+        for problem in problems:
+            print(f"    {problem}")
+    if offenders:
+        print(f"{len(offenders)} statement(s) fall back to a full scan or sort.")
+        return 1
+    print("All entry-screen queries use an index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
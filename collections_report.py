@@ -0,0 +1,91 @@
+# --- collections_report.py ---
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import date
+
+from money import format_rupees
+from reports import REPORT_PERIODS, collection_totals
+
+REPORT_HEADINGS = ("Period", "Copy Type", "Category", "Payment Type", "Receipts", "Amount (Rs.)")
+
+
+class CollectionsReport(tk.Toplevel):
+    """A window showing collections per day, month or year for a date range.
+
+    Runs its queries through the entry window's DbWorker and TrueCopyService, so the
+    report is read off the Tk thread and repeated views come from the service's cache.
+    """
+
+    def __init__(self, parent, worker, service):
+        super().__init__(parent)
+        self.title("Collections Report")
+        self.geometry("900x600")
+        self.worker = worker
+        self.service = service
+        self.create_widgets()
+        self.bind('<Return>', self.show_collections)
+        self.bind('<Escape>', lambda event: self.destroy())
+        self.show_collections()
+
+    def create_widgets(self):
+        """Creates the date range and period controls and the report table."""
+        controls = ttk.Frame(self, padding=10)
+        controls.pack(fill=tk.X)
+
+        from tkcalendar import DateEntry  # Import here, as the entry window does
+        today = date.today()
+        ttk.Label(controls, text="From:", style='Main.TLabel').pack(side=tk.LEFT, padx=5)
+        self.start_entry = DateEntry(controls, date_pattern="yyyy-mm-dd")
+        self.start_entry.set_date(today.replace(day=1))  # This month so far
+        self.start_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(controls, text="To:", style='Main.TLabel').pack(side=tk.LEFT, padx=5)
+        self.end_entry = DateEntry(controls, date_pattern="yyyy-mm-dd")
+        self.end_entry.set_date(today)
+        self.end_entry.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(controls, text="Per:", style='Main.TLabel').pack(side=tk.LEFT, padx=5)
+        self.period_cb = ttk.Combobox(controls, values=list(REPORT_PERIODS), width=8, state="readonly")
+        self.period_cb.set("day")
+        self.period_cb.pack(side=tk.LEFT, padx=5)
+        self.period_cb.bind("<<ComboboxSelected>>", self.show_collections)
+
+        ttk.Button(controls, text="Show (Enter)", command=self.show_collections,
+                   style='Action.TButton').pack(side=tk.LEFT, padx=5)
+
+        self.report_tree = ttk.Treeview(self, columns=REPORT_HEADINGS, show="headings")
+        for heading in REPORT_HEADINGS:
+            self.report_tree.heading(heading, text=heading, anchor="center")
+            self.report_tree.column(heading, anchor="center", width=140)
+        self.report_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def show_collections(self, event=None):
+        """Requests the report for the chosen dates and period."""
+        start = self.start_entry.get_date().strftime("%Y-%m-%d")
+        end = self.end_entry.get_date().strftime("%Y-%m-%d")
+        self.worker.submit(self.service.collections, start, end, self.period_cb.get(), key="collections_report",
+                           callback=self.fill_report,
+                           errback=lambda e: messagebox.showerror("Database Error",
+                                                                  f"Error loading collections: {str(e)}", parent=self))
+
+    def fill_report(self, rows):
+        """Fills the table with the report rows, a total per period and a grand total."""
+        if not self.winfo_exists():  # Closed while the report was read
+            return
+        self.report_tree.delete(*self.report_tree.get_children())
+        totals = collection_totals(rows)
+        period = None
+        for row in rows:
+            if period is not None and row[0] != period:
+                self.insert_total(period, *totals[period])
+            period = row[0]
+            self.report_tree.insert("", "end", values=(row[0], row[1], row[2] or "-", row[3], row[4],
+                                                       format_rupees(row[5])))
+        if period is not None:
+            self.insert_total(period, *totals[period])
+        self.insert_total("Total", sum(count for count, _ in totals.values()),
+                          sum(paise for _, paise in totals.values()))
+
+    def insert_total(self, label, count, paise):
+        """Adds a total row."""
+        self.report_tree.insert("", "end", values=(label, "Total", "", "", count, format_rupees(paise)))
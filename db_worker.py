@@ -0,0 +1,165 @@
+# --- db_worker.py ---
+
+"""Runs database work on a background thread so the Tk event loop never waits on SQLite."""
+
+import queue
+import threading
+
+POLL_INTERVAL_MS = 16  # One frame at 60 fps
+
+
+class DbRequest:
+    """One queued call: `func(conn, *args)` (or `func(*args)`) plus what to do with its result."""
+
+    def __init__(self, func, args, key, callback, errback, interruptible, background=False):
+        self.func = func
+        self.args = args
+        self.key = key
+        self.callback = callback
+        self.errback = errback
+        self.interruptible = interruptible
+        self.background = background
+        self.cancelled = False
+
+
+class DbWorker:
+    """Runs database calls on one worker thread and hands the results back to Tk.
+
+    The worker thread owns the ConnectionManager's connection and runs requests in the
+    order they were submitted. Results come back through a queue that the Tk side polls
+    with after(), so callbacks and errbacks always run on the event thread.
+
+    A request submitted with a `key` supersedes any earlier request with the same key:
+    a queued one is skipped, a running interruptible (read-only) one is interrupted, and
+    the result of either is dropped. Rapid clicks or combobox changes therefore only
+    ever pay for the last one.
+
+    With `pass_connection` False, requests are called without the connection; use that
+    for methods of an object, such as a TrueCopyService, that holds the same `db`.
+    """
+
+    def __init__(self, widget, db, on_busy=None, metrics=None, pass_connection=True):
+        self.widget = widget
+        self.db = db
+        self.pass_connection = pass_connection
+        self.on_busy = on_busy  # Called from the poll loop with True/False as requests start and drain
+        self.metrics = metrics  # Optional EntryMetrics timing every request
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = {}  # key -> newest request submitted under it
+        self._running = None
+        self._running_lock = threading.Lock()
+        self._outstanding = 0  # Submitted but not yet delivered; touched on the Tk thread only
+        self._foreground = 0  # ...of which not background, so they show on the busy indicator
+        self._busy = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="entry-db-worker", daemon=True)
+        self._thread.start()
+        self._poll_id = widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def submit(self, func, *args, key=None, callback=None, errback=None, interruptible=False, background=None):
+        """Queues `func(conn, *args)`; `callback(result)` or `errback(error)` runs later on the Tk thread.
+
+        `background` labels periodic work, such as polling, that the user did not ask for: it
+        does not start the busy indicator and is recorded under that label in the metrics.
+        """
+        if key is not None:
+            self.cancel(key)
+        if self.metrics is not None:
+            func = self.metrics.timed_db(func, background)
+        request = DbRequest(func, args, key, callback, errback, interruptible, bool(background))
+        if key is not None:
+            self._latest[key] = request
+        self._outstanding += 1
+        if not request.background:
+            self._foreground += 1
+        self._requests.put(request)
+        return request
+
+    def cancel(self, key):
+        """Drops the latest request submitted under `key`, interrupting it if it is a running read."""
+        request = self._latest.pop(key, None)
+        if request is None:
+            return
+        request.cancelled = True
+        with self._running_lock:
+            if self._running is request and request.interruptible:
+                self.db.interrupt()
+
+    def idle(self):
+        """Tells whether every submitted request has been delivered."""
+        return self._outstanding == 0
+
+    def drain(self):
+        """Waits for every submitted request, running callbacks and errbacks here on the Tk thread.
+
+        Work a callback submits is waited for too. For a window about to close, which must know
+        how its last writes went; the event loop does not run meanwhile.
+        """
+        while self._outstanding:
+            self._deliver(*self._results.get())
+        self._set_busy(False)
+
+    def stop(self):
+        """Stops polling, waits for the worker to finish queued writes and close its connection."""
+        self._stopped = True
+        self.widget.after_cancel(self._poll_id)
+        self._requests.put(None)
+        self._thread.join()  # No timeout: a write waiting out a lock and its retries must not be cut off
+
+    def _set_busy(self, busy):
+        if busy != self._busy:
+            self._busy = busy
+            if self.on_busy:
+                self.on_busy(busy)
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+            result = error = None
+            if not request.cancelled:
+                with self._running_lock:
+                    self._running = request
+                try:
+                    if self.pass_connection:
+                        result = request.func(self.db.connection(), *request.args)
+                    else:
+                        result = request.func(*request.args)
+                except Exception as e:  # Handed to the errback on the Tk thread
+                    error = e
+                finally:
+                    with self._running_lock:
+                        self._running = None
+            self._results.put((request, result, error))
+        self.db.close()
+
+    def _deliver(self, request, result, error):
+        self._outstanding -= 1
+        if not request.background:
+            self._foreground -= 1
+        if request.cancelled:
+            return
+        if self._latest.get(request.key) is request:
+            del self._latest[request.key]
+        if error is not None:
+            if request.errback:
+                request.errback(error)
+            else:
+                self.widget.report_callback_exception(type(error), error, error.__traceback__)
+        elif request.callback:
+            request.callback(result)
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    request, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._deliver(request, result, error)
+            self._set_busy(self._foreground > 0)
+        finally:
+            if not self._stopped:  # A callback may have closed the window
+                self._poll_id = self.widget.after(POLL_INTERVAL_MS, self._poll)
@@ -0,0 +1,340 @@
+# --- entry_archive.py ---
+
+"""Moves disposed applications from past years out of the working tables into an archive file.
+
+true_copy_applications and receipt_register otherwise grow forever, and every disposed
+row stays in the B-trees the entry screen searches. Archiving moves disposed applications
+dated before a cutoff, with their receipts, into per-year tables (true_copy_applications_2023,
+receipt_register_2023, ...) of a separate SQLite file next to the database, so the working
+set stays small after years of use. The number counters are left alone, so archived
+numbers are never issued again.
+
+Historical lookups see both: attach_archive adds the archive to a connection and defines
+the temporary views all_true_copy_applications and all_receipts, each a UNION ALL of the
+archive's year tables and the working table.
+
+    python entry_archive.py archive --keep-years 2
+    python entry_archive.py find --true-copy-number CC/001/2021
+    python entry_archive.py years
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from datetime import date
+
+from entry_store import chunked, database_path, migrate, open_connection, retry_on_busy
+
+ARCHIVE_SCHEMA = "archive"  # Name the archive file is attached under
+ARCHIVE_KEEP_YEARS = 2  # Disposed applications of this year and the one before stay in the working tables
+ARCHIVE_BATCH_SIZE = 5000  # Applications moved per pair of transactions, so other clerks wait briefly
+ARCHIVED_TABLES = {"true_copy_applications": "all_true_copy_applications", "receipt_register": "all_receipts"}
+_YEAR_TABLE = re.compile(r"^(true_copy_applications|receipt_register)_(\d{4})$")
+
+
+def default_archive_path(conn):
+    """Returns the archive file next to the connection's database: court.db -> court_archive.db."""
+    path = database_path(conn)
+    if not path:
+        raise ValueError("An in-memory database has no archive file; pass one explicitly.")
+    stem, extension = os.path.splitext(path)
+    return f"{stem}_archive{extension or '.db'}"
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({_quote(table)})")]
+
+
+def archive_attached(conn):
+    """Tells whether the archive file is attached to the connection."""
+    return any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list"))
+
+
+def archive_years(conn):
+    """Returns the years that have archive tables, oldest first; empty when nothing is attached."""
+    if not archive_attached(conn):
+        return []
+    years = set()
+    for (name,) in conn.execute(f"SELECT name FROM {ARCHIVE_SCHEMA}.sqlite_master WHERE type = 'table'"):
+        match = _YEAR_TABLE.match(name)
+        if match:
+            years.add(int(match.group(2)))
+    return sorted(years)
+
+
+def attach_archive(conn, path=None, create=False):
+    """Attaches the archive file and (re)defines the all_* views over it; returns its years.
+
+    A missing archive file is only created with `create`; without one (or for an in-memory
+    database) the views cover the working tables alone, so callers can query them either
+    way. Must be called outside a transaction.
+    """
+    if not archive_attached(conn):
+        path = path or (default_archive_path(conn) if database_path(conn) else None)
+        if path and (create or os.path.exists(path)):
+            conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    create_archive_views(conn)
+    return archive_years(conn)
+
+
+def detach_archive(conn):
+    """Drops the all_* views and detaches the archive file."""
+    for view in ARCHIVED_TABLES.values():
+        conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+    if archive_attached(conn):
+        conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+
+
+def create_archive_views(conn):
+    """Defines each all_* view as its archive year tables, oldest first, followed by the working table.
+
+    The views have the working table's columns; ones an older year table lacks read as NULL.
+    Lookups on the views are pushed down into every branch, so each uses that table's index.
+    """
+    years = archive_years(conn)
+    for table, view in ARCHIVED_TABLES.items():
+        columns = _columns(conn, "main", table)
+        branches = []
+        for year in years:
+            archived = set(_columns(conn, ARCHIVE_SCHEMA, f"{table}_{year}"))
+            if archived:
+                select = ", ".join(_quote(c) if c in archived else f"NULL AS {_quote(c)}" for c in columns)
+                branches.append(f"SELECT {select} FROM {ARCHIVE_SCHEMA}.{table}_{year}")
+        branches.append(f"SELECT {', '.join(_quote(c) for c in columns)} FROM main.{table}")
+        conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+        conn.execute(f"CREATE TEMP VIEW {view} AS " + "\nUNION ALL\n".join(branches))
+
+
+def _ensure_archive_table(conn, table, year):
+    """Creates an archive year table like the working one, or adds columns the working one has gained.
+
+    Returns the columns both tables share, in the working table's order.
+    """
+    name = f"{table}_{year}"
+    archived = _columns(conn, ARCHIVE_SCHEMA, name)
+    if not archived:
+        sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                           (table,)).fetchone()[0]
+        # Same definition (primary key included), renamed into the archive
+        conn.execute(re.sub(r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(\"[^\"]+\"|\S+?)\s*\(",
+                            f"CREATE TABLE {ARCHIVE_SCHEMA}.{name} (", sql, count=1, flags=re.IGNORECASE))
+        for column in ("receipt_number", "true_copy_number"):  # The lookups find_applications/find_receipts make
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.{name}_by_{column} ON {name} ({column})")
+        archived = _columns(conn, ARCHIVE_SCHEMA, name)
+    for row in conn.execute(f"PRAGMA main.table_info({table})").fetchall():
+        if row[1] not in archived:  # Added after the year was archived; no NOT NULL, old rows have none
+            default = f" DEFAULT {row[4]}" if row[4] is not None else ""
+            conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} ADD COLUMN {_quote(row[1])} {row[2]}{default}")
+    return _columns(conn, "main", table)
+
+
+@retry_on_busy
+def _copy_batch(conn, before, after_id, batch_size):
+    """Copies the next batch of disposed applications older than `before`, and their receipts, into the archive.
+
+    Returns (application ids, receipt ids) of the rows now in the archive, applications
+    lowest id first; both empty when none are left. A receipt whose number a working
+    application outside the batch also carries is not taken.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Walks the primary key from the last batch on, so the table is read once overall.
+        # Dates not in YYYY-MM-DD form have no year to file them under, so they stay.
+        rows = conn.execute("""SELECT id, substr(application_date, 1, 4), receipt_number
+                               FROM main.true_copy_applications
+                               WHERE id > ? AND status = 'Disposed' AND application_date < ?
+                               AND application_date GLOB '[0-9][0-9][0-9][0-9]-*'
+                               ORDER BY id
+                               LIMIT ?""", (after_id, before, batch_size)).fetchall()
+        batch_ids = {row[0] for row in rows}
+        shared = set()  # Receipt numbers a working application outside the batch still carries
+        for chunk in chunked(sorted({row[2] for row in rows if row[2]})):
+            shared.update(number for entry_id, number in conn.execute(
+                f"""SELECT id, receipt_number
+                    FROM main.true_copy_applications
+                    WHERE receipt_number IN ({','.join('?' * len(chunk))})""", chunk) if entry_id not in batch_ids)
+        by_year = {}
+        for entry_id, year, receipt_number in rows:
+            numbers = by_year.setdefault(year, ([], []))
+            numbers[0].append(entry_id)
+            if receipt_number and receipt_number not in shared:
+                numbers[1].append(receipt_number)
+        receipt_ids = []
+        for year, (entry_ids, receipt_numbers) in by_year.items():
+            ids = []
+            for chunk in chunked(receipt_numbers):
+                ids.extend(row[0] for row in conn.execute(
+                    f"""SELECT id
+                        FROM main.receipt_register
+                        WHERE receipt_number IN ({','.join('?' * len(chunk))})""", chunk))
+            for table, values in (("true_copy_applications", entry_ids), ("receipt_register", ids)):
+                columns = ", ".join(_quote(c) for c in _ensure_archive_table(conn, table, year))
+                for chunk in chunked(values):
+                    # OR IGNORE: rows a broken-off earlier run copied but did not delete are already there
+                    conn.execute(f"""INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.{table}_{year} ({columns})
+                                     SELECT {columns}
+                                     FROM main.{table}
+                                     WHERE id IN ({','.join('?' * len(chunk))})""", chunk)
+            # Only receipts whose row really is in the archive may be deleted; OR IGNORE can skip one
+            for chunk in chunked(ids):
+                receipt_ids.extend(row[0] for row in conn.execute(
+                    f"""SELECT a.id
+                        FROM {ARCHIVE_SCHEMA}.receipt_register_{year} a
+                        JOIN main.receipt_register r ON r.id = a.id AND r.receipt_number IS a.receipt_number
+                        WHERE a.id IN ({','.join('?' * len(chunk))})""", chunk))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return [row[0] for row in rows], receipt_ids
+
+
+@retry_on_busy
+def _delete_batch(conn, entry_ids, receipt_ids):
+    """Deletes archived applications, and the receipts copied with them, from the working tables."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for chunk in chunked(receipt_ids):
+            conn.execute(f"DELETE FROM main.receipt_register WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        for chunk in chunked(entry_ids):
+            conn.execute(f"""DELETE FROM main.true_copy_applications
+                             WHERE status = 'Disposed' AND id IN ({','.join('?' * len(chunk))})""", chunk)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def archive_disposed(conn, before, path=None, batch_size=ARCHIVE_BATCH_SIZE, on_progress=None):
+    """Moves disposed applications dated before `before` (YYYY-MM-DD), with their receipts, into the archive.
+
+    A receipt goes with the application whose receipt number it carries. Each batch is
+    copied into the archive and committed before it is deleted from the working tables,
+    since a commit spanning two WAL databases is not atomic across them; a run that is
+    broken off loses nothing and the next one finishes it. `on_progress(moved)` is called
+    after each batch. Returns the number of applications moved.
+    """
+    migrate(conn)  # Archived deletes must not reach the change log (007_archiving)
+    attach_archive(conn, path or default_archive_path(conn), create=True)
+    moved = last_id = 0
+    while True:
+        entry_ids, receipt_ids = _copy_batch(conn, before, last_id, batch_size)
+        if not entry_ids:
+            break
+        _delete_batch(conn, entry_ids, receipt_ids)
+        moved += len(entry_ids)
+        last_id = entry_ids[-1]
+        if on_progress:
+            on_progress(moved)
+    create_archive_views(conn)  # Picks up year tables made by this run
+    return moved
+
+
+def archive_cutoff(keep_years=ARCHIVE_KEEP_YEARS, today=None):
+    """Returns the first day of the oldest year kept in the working tables, as YYYY-MM-DD."""
+    today = today or date.today()
+    return date(today.year - keep_years + 1, 1, 1).isoformat()
+
+
+def find_applications(conn, true_copy_number=None, receipt_number=None, limit=100):
+    """Returns applications, archived ones included, with a True Copy # and/or receipt #; archived years first.
+
+    Needs the all_* views; attach_archive defines them.
+    """
+    conditions, params = [], []
+    if true_copy_number:
+        conditions.append("true_copy_number = ?")
+        params.append(true_copy_number)
+    if receipt_number:
+        conditions.append("receipt_number = ?")
+        params.append(receipt_number)
+    if not conditions:
+        raise ValueError("Give a True Copy # or a receipt #.")
+    params.append(limit)
+    return conn.execute(f"""SELECT *
+                            FROM all_true_copy_applications
+                            WHERE {' AND '.join(conditions)}
+                            LIMIT ?""", params).fetchall()
+
+
+def find_receipts(conn, receipt_number=None, true_copy_number=None, limit=100):
+    """Returns receipts, archived ones included, with a receipt # and/or True Copy #; archived years first."""
+    conditions, params = [], []
+    if receipt_number:
+        conditions.append("receipt_number = ?")
+        params.append(receipt_number)
+    if true_copy_number:
+        conditions.append("true_copy_number = ?")
+        params.append(true_copy_number)
+    if not conditions:
+        raise ValueError("Give a receipt # or a True Copy #.")
+    params.append(limit)
+    return conn.execute(f"""SELECT *
+                            FROM all_receipts
+                            WHERE {' AND '.join(conditions)}
+                            LIMIT ?""", params).fetchall()
+
+
+def main(argv=None):
+    """Command-line archiving and historical lookups."""
+    parser = argparse.ArgumentParser(description="Archive disposed True Copy applications from past years.")
+    parser.add_argument("--db", help="database file (default: the one config.py opens)")
+    parser.add_argument("--archive", help="archive file (default: the database's name with _archive)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive = commands.add_parser("archive", help="move old disposed applications and their receipts")
+    cutoff = archive.add_mutually_exclusive_group()
+    cutoff.add_argument("--before", help="archive applications dated before this day, YYYY-MM-DD")
+    cutoff.add_argument("--keep-years", type=int, default=ARCHIVE_KEEP_YEARS,
+                        help=f"calendar years kept in the working tables, this one included "
+                             f"(default {ARCHIVE_KEEP_YEARS})")
+    archive.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="applications per batch")
+    archive.add_argument("--vacuum", action="store_true",
+                         help="shrink the database file afterwards (needs every other window closed)")
+    find = commands.add_parser("find", help="look up applications and receipts, archived ones included")
+    find.add_argument("--true-copy-number")
+    find.add_argument("--receipt")
+    commands.add_parser("years", help="list the archived years")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        conn = open_connection(args.db)
+    else:
+        from config import get_db_connection  # Import here so --db works without config
+        conn = get_db_connection()
+    try:
+        if args.command == "archive":
+            before = args.before or archive_cutoff(args.keep_years)
+            moved = archive_disposed(conn, before, args.archive, args.batch_size,
+                                     on_progress=lambda moved: print(f"Archived {moved} applications...",
+                                                                     end="\r", file=sys.stderr))
+            print(f"Archived {moved} disposed applications dated before {before}.")
+            if args.vacuum and moved:
+                conn.execute("VACUUM main")
+            return 0
+
+        attach_archive(conn, args.archive)
+        if args.command == "years":
+            for year in archive_years(conn):
+                count = conn.execute(f"SELECT COUNT(*) FROM {ARCHIVE_SCHEMA}.true_copy_applications_{year}"
+                                     ).fetchone()[0]
+                print(f"{year} {count:>10}")
+            return 0
+        if not (args.true_copy_number or args.receipt):
+            parser.error("find needs --true-copy-number or --receipt")
+        for label, rows in (("Application", find_applications(conn, args.true_copy_number, args.receipt)),
+                            ("Receipt", find_receipts(conn, args.receipt, args.true_copy_number))):
+            for row in rows:
+                print(label, "\t".join("" if value is None else str(value) for value in row), sep="\t")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
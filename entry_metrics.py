@@ -0,0 +1,221 @@
+# --- entry_metrics.py ---
+
+"""Opt-in timing of the entry window's database calls and Treeview rebuilds.
+
+Set ENTRY_METRICS=1 before starting the application to record, for every database call
+and UI rebuild, its wall time, the rows it returned, the Treeview items it touched and
+the event that set it off (Ctrl+S, FocusOut on the date, a combobox change and so on).
+Records go to a rotating JSON-lines log and to an in-memory buffer behind the F12 stats
+panel, where calls repeated within one event show up as "Repeats".
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+METRICS_ENV = "ENTRY_METRICS"
+METRICS_LOG_ENV = "ENTRY_METRICS_LOG"
+METRICS_LOG = "entry_metrics.log"
+LOG_MAX_BYTES = 2 * 2 ** 20  # Rotate the log at 2 MiB...
+LOG_BACKUPS = 3  # ...keeping this many old files
+RECENT_LIMIT = 5000  # Records kept in memory for the stats panel
+BACKGROUND_EVENT = -1  # Event of periodic work labelled with its own trigger; never counted as repeated
+_loggers = {}  # Absolute log path -> its logger
+_loggers_lock = threading.Lock()
+
+
+def count_rows(result):
+    """Counts the rows in a database call's result: lists and dicts by length, tuples by their parts."""
+    if result is None:
+        return 0
+    if isinstance(result, (list, dict, set)):
+        return len(result)
+    if isinstance(result, tuple):
+        return sum(len(part) for part in result if isinstance(part, (list, dict, set)))
+    return 1
+
+
+def metrics_logger(path):
+    """Returns the logger writing to the metrics log at `path`, shared by every window that logs there.
+
+    Each file gets one RotatingFileHandler for the life of the process (logging closes it at
+    exit), so opening and closing windows neither leaks file handles nor writes a record twice.
+    """
+    path = os.path.abspath(path)
+    with _loggers_lock:
+        log = _loggers.get(path)
+        if log is None:
+            log = _loggers[path] = logging.getLogger(f"entry_metrics.log{len(_loggers)}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            log.addHandler(RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                               encoding="utf-8"))
+    return log
+
+
+class EntryMetrics:
+    """Collects timing records for one window; every method is a no-op unless enabled."""
+
+    def __init__(self, enabled=None, log_path=None):
+        self.enabled = os.environ.get(METRICS_ENV) == "1" if enabled is None else enabled
+        self.records = deque(maxlen=RECENT_LIMIT)
+        self.trigger = "startup"
+        self.event = 0  # Bumped per trigger so repeated work within one event can be spotted
+        self._lock = threading.Lock()
+        self._log = None
+        if self.enabled:
+            self._log = metrics_logger(log_path or os.environ.get(METRICS_LOG_ENV, METRICS_LOG))
+
+    def set_trigger(self, trigger):
+        """Labels the work that follows, until the next trigger, with `trigger`."""
+        self.trigger = trigger
+        self.event += 1
+
+    def record(self, kind, name, seconds, rows=None, items=None, trigger=None, event=None):
+        """Stores one timing record; `kind` is "db" or "ui"."""
+        if not self.enabled:
+            return
+        record = {
+            "at": round(time.time(), 3),
+            "kind": kind,
+            "name": name,
+            "ms": round(seconds * 1000, 3),
+            "rows": rows,
+            "items": items,
+            "trigger": trigger or self.trigger,
+            "event": self.event if event is None else event,
+        }
+        with self._lock:  # Database records arrive from the worker thread
+            self.records.append(record)
+        self._log.info(json.dumps(record))
+
+    def timed_db(self, func, trigger=None):
+        """Wraps a DbWorker call so its run is recorded against the trigger current at submit time.
+
+        Periodic work passes its own `trigger` instead, so it is not counted against whatever
+        event happened last.
+        """
+        if not self.enabled:
+            return func
+        trigger, event = (trigger, BACKGROUND_EVENT) if trigger else (self.trigger, self.event)
+        name = getattr(getattr(func, "func", func), "__name__", repr(func))  # Sees through partial()
+
+        def timed(*args):
+            started = time.perf_counter()
+            result = func(*args)
+            self.record("db", name, time.perf_counter() - started, rows=count_rows(result),
+                        trigger=trigger, event=event)
+            return result
+
+        return timed
+
+    @contextmanager
+    def ui(self, name, items=None):
+        """Times a UI rebuild; the caller may set `timing["items"]` to the Treeview items it touched."""
+        timing = {"items": items}
+        started = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            self.record("ui", name, time.perf_counter() - started, items=timing["items"])
+
+    def stats(self):
+        """Aggregates the buffered records per (kind, name), slowest total first.
+
+        "repeats" counts calls beyond the first within the same triggering event, which is
+        where redundant work shows up.
+        """
+        with self._lock:
+            records = list(self.records)
+        groups = {}
+        for record in records:
+            group = groups.setdefault((record["kind"], record["name"]),
+                                      {"kind": record["kind"], "name": record["name"], "times": [],
+                                       "rows": 0, "items": 0, "events": {}})
+            group["times"].append(record["ms"])
+            group["rows"] += record["rows"] or 0
+            group["items"] += record["items"] or 0
+            if record["event"] != BACKGROUND_EVENT:
+                group["events"][record["event"]] = group["events"].get(record["event"], 0) + 1
+
+        stats = []
+        for group in groups.values():
+            times = sorted(group["times"])
+            stats.append({
+                "kind": group["kind"],
+                "name": group["name"],
+                "calls": len(times),
+                "repeats": sum(count - 1 for count in group["events"].values()),
+                "total_ms": round(sum(times), 3),
+                "mean_ms": round(sum(times) / len(times), 3),
+                "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+                "rows": group["rows"],
+                "items": group["items"],
+            })
+        return sorted(stats, key=lambda stat: stat["total_ms"], reverse=True)
+
+    def recent(self, limit=200):
+        """Returns the newest `limit` records, newest first."""
+        with self._lock:
+            return list(self.records)[-limit:][::-1]
+
+    def reset(self):
+        """Forgets the buffered records; the log file is left alone."""
+        with self._lock:
+            self.records.clear()
+
+
+def show_stats_panel(parent, metrics):
+    """Opens a window listing the aggregated and most recent metrics records."""
+    import tkinter as tk  # Import here so the recorder stays usable without a display
+    from tkinter import ttk
+
+    panel = tk.Toplevel(parent)
+    panel.title("Entry Screen Statistics")
+    panel.geometry("1000x600")
+    if not metrics.enabled:
+        ttk.Label(panel, text=f"Statistics are off. Start the application with {METRICS_ENV}=1 to record them.",
+                  padding=20).pack()
+        return panel
+
+    columns = ("Kind", "Name", "Calls", "Repeats", "Total ms", "Mean ms", "p95 ms", "Rows", "Items")
+    summary_tree = ttk.Treeview(panel, columns=columns, show="headings", height=12)
+    for col in columns:
+        summary_tree.heading(col, text=col, anchor="center")
+        summary_tree.column(col, anchor="center", width=100, stretch=True)
+    summary_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+    recent_columns = ("Trigger", "Event", "Kind", "Name", "ms", "Rows", "Items")
+    recent_tree = ttk.Treeview(panel, columns=recent_columns, show="headings", height=12)
+    for col in recent_columns:
+        recent_tree.heading(col, text=col, anchor="center")
+        recent_tree.column(col, anchor="center", width=100, stretch=True)
+    recent_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+    def refresh():
+        summary_tree.delete(*summary_tree.get_children())
+        for stat in metrics.stats():
+            summary_tree.insert("", "end", values=(stat["kind"], stat["name"], stat["calls"], stat["repeats"],
+                                                   stat["total_ms"], stat["mean_ms"], stat["p95_ms"],
+                                                   stat["rows"], stat["items"]))
+        recent_tree.delete(*recent_tree.get_children())
+        for record in metrics.recent():
+            recent_tree.insert("", "end", values=(record["trigger"], record["event"], record["kind"],
+                                                  record["name"], record["ms"], record["rows"], record["items"]))
+
+    def reset():
+        metrics.reset()
+        refresh()
+
+    button_frame = ttk.Frame(panel)
+    button_frame.pack(pady=5)
+    ttk.Button(button_frame, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Reset", command=reset).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Close", command=panel.destroy).pack(side=tk.LEFT, padx=5)
+    refresh()
+    return panel
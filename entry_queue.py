@@ -0,0 +1,134 @@
+# --- entry_queue.py ---
+
+"""The write-behind queue behind the entry window's rapid-entry mode.
+
+In rapid entry, Enter only validates the form and queues the entry; the window's flusher
+later hands the queue to save_entries a batch at a time on the DbWorker thread. The queue
+also remembers which numbers the form showed for queued entries, so the next form can
+show the numbers after them before anything has been written. This module does not
+import tkinter and is plain bookkeeping; nothing in it touches the database.
+"""
+
+from collections import deque
+
+from entry_store import format_true_copy_number, true_copy_serial
+
+
+class QueuedEntry:
+    """One validated entry waiting to be saved, with the automatic numbers the form showed for it.
+
+    `true_copy_number` and `receipt_number` are None where the clerk typed the number in
+    (it is then in `entry`) or where no prediction could be made.
+    """
+
+    def __init__(self, entry, true_copy_number=None, receipt_number=None):
+        self.entry = entry
+        self.true_copy_number = true_copy_number
+        self.receipt_number = receipt_number
+
+    def renumbered(self, saved):
+        """Tells whether saving gave the entry other numbers than the form showed for it."""
+        return ((self.true_copy_number is not None and saved["true_copy_number"] != self.true_copy_number)
+                or (self.receipt_number is not None and saved["receipt_number"] != self.receipt_number))
+
+
+class EntryQueue:
+    """Entries waiting to be saved, the batch being saved, and the ones that were rejected.
+
+    Automatic numbers are queued as None, so save_entries allocates them inside its
+    transaction exactly as a normal save does. With nobody else saving in between they
+    come out as the numbers the form predicted; otherwise the entry is reported as
+    renumbered. The predictions only ever move forward, so a stored counter read while
+    entries are still queued cannot take the form back to a number already handed out.
+    """
+
+    def __init__(self):
+        self.waiting = deque()  # QueuedEntry, oldest first
+        self.in_flight = []  # The batch handed to save_entries and not yet answered
+        self.failed = deque()  # (QueuedEntry, message) for entries save_entries rejected
+        self.saved_count = 0
+        self._true_copy_serials = {}  # (copy type, category, year) -> last serial predicted
+        self._receipt_serial = None  # Last receipt number predicted
+
+    def __len__(self):
+        """Entries not yet saved: waiting or in flight."""
+        return len(self.waiting) + len(self.in_flight)
+
+    def next_true_copy_number(self, key, stored_next):
+        """Returns the True Copy # the form should show for a (copy type, category, year) key.
+
+        `stored_next` is what peek_true_copy_number returned, or None if it is not known.
+        """
+        copy_type, _, year = key
+        serial = max(true_copy_serial(stored_next) or 0, self._true_copy_serials.get(key, 0) + 1)
+        if stored_next is None and key not in self._true_copy_serials:
+            return None
+        return format_true_copy_number(copy_type, serial, year)
+
+    def last_receipt_number(self, stored_last):
+        """Returns the receipt number the next one should follow, given the stored last receipt number."""
+        if self._receipt_serial is None:
+            return stored_last
+        return max(stored_last or 0, self._receipt_serial)
+
+    def put(self, entry, key, stored_next=None, stored_last_receipt=None):
+        """Queues a validated entry and returns its QueuedEntry.
+
+        `key` is the entry's (copy type, category, year). `stored_next` and `stored_last_receipt`
+        are the stored counters the form's automatic numbers came from, where known; the
+        predictions for the entries after this one move past the numbers it should get.
+        Typed numbers move them too, as the counter triggers do once the entry is saved.
+        """
+        true_copy_number = receipt_number = None
+        typed_true_copy = entry["true_copy_number"]
+        if not typed_true_copy:
+            true_copy_number = self.next_true_copy_number(key, stored_next)
+            if true_copy_number is not None:
+                self._true_copy_serials[key] = true_copy_serial(true_copy_number)
+        elif typed_true_copy == format_true_copy_number(key[0], true_copy_serial(typed_true_copy) or 0, key[2]):
+            serial = true_copy_serial(typed_true_copy)
+            self._true_copy_serials[key] = max(self._true_copy_serials.get(key, 0), serial)
+
+        typed_receipt = entry["receipt_number"]
+        if not typed_receipt:
+            if stored_last_receipt is not None or self._receipt_serial is not None:
+                self._receipt_serial = self.last_receipt_number(stored_last_receipt) + 1
+                receipt_number = str(self._receipt_serial)
+        elif typed_receipt.isdigit():
+            self._receipt_serial = max(self._receipt_serial or 0, int(typed_receipt))
+
+        queued = QueuedEntry(entry, true_copy_number, receipt_number)
+        self.waiting.append(queued)
+        return queued
+
+    def take(self, limit):
+        """Moves up to `limit` waiting entries into flight and returns their entries for save_entries."""
+        while self.waiting and len(self.in_flight) < limit:
+            self.in_flight.append(self.waiting.popleft())
+        return [queued.entry for queued in self.in_flight]
+
+    def finish(self, result):
+        """Records save_entries' (saved, errors) for the batch in flight.
+
+        Returns (saved, failed): (QueuedEntry, saved entry) pairs in order, and the
+        (QueuedEntry, message) pairs that were rejected and added to `failed`.
+        """
+        saved_entries, errors = result
+        rejected = dict(errors)
+        batch, self.in_flight = self.in_flight, []
+        saved = []
+        failed = []
+        remaining = iter(saved_entries)  # save_entries returns the accepted entries in batch order
+        for index, queued in enumerate(batch):
+            if index in rejected:
+                failed.append((queued, rejected[index]))
+            else:
+                saved.append((queued, next(remaining)))
+        self.failed.extend(failed)
+        self.saved_count += len(saved)
+        return saved, failed
+
+    def retry(self):
+        """Puts the batch in flight back at the head of the queue after the save itself failed."""
+        self.waiting.extendleft(reversed(self.in_flight))
+        self.in_flight = []
@@ -0,0 +1,102 @@
+# --- entry_seed.py ---
+
+"""Synthetic True Copy databases for the query-plan checks and benchmarks.
+
+BASE_SCHEMA mirrors the columns of the tables config.py creates that the entry screens
+read and write; seed_database fills them with realistic-looking applications and
+receipts so plans and timings match a busy counter.
+"""
+
+import random
+import sqlite3
+from datetime import date, timedelta
+
+from entry_store import format_true_copy_number, migrate
+
+BASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS true_copy_applications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    application_date TEXT NOT NULL,
+    copy_type TEXT NOT NULL,
+    application_category TEXT,
+    true_copy_number TEXT,
+    received_date TEXT,
+    advance_amount REAL,
+    receipt_number TEXT,
+    status TEXT NOT NULL DEFAULT 'Pending'
+);
+CREATE TABLE IF NOT EXISTS receipt_register (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    receipt_date TEXT NOT NULL,
+    receipt_number TEXT NOT NULL,
+    payment_type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    true_copy_number TEXT
+);
+"""
+
+ADVANCE_AMOUNTS = (10, 20, 25, 50, 100, 150, 200, 500)
+SEED_BATCH_SIZE = 10000
+
+
+def create_database(path=":memory:"):
+    """Opens `path`, creates the base tables and returns the connection."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(BASE_SCHEMA)
+    return conn
+
+
+def generate_entries(count, pending_ratio=0.2, years=3, seed=1):
+    """Yields (application, receipt) row tuples for `count` applications spread over `years` years.
+
+    Numbers are issued in date order per (prefix, category, year), the way the entry screen
+    issues them; roughly `pending_ratio` of the applications are still pending.
+    """
+    rng = random.Random(seed)
+    first_day = date.today() - timedelta(days=365 * years)
+    span = 365 * years
+    serials = {}
+    for index in range(count):
+        day = first_day + timedelta(days=span * index // count)
+        copy_type = "Certified Copy" if rng.random() < 0.7 else "Simple Copy"
+        category = rng.choice(("Urgent", "Ordinary")) if copy_type == "Certified Copy" else None
+        key = (copy_type, category, day.year)
+        serials[key] = serials.get(key, 0) + 1
+        true_copy_number = format_true_copy_number(copy_type, serials[key], day.year)
+        receipt_number = str(index + 1)
+        amount = float(rng.choice(ADVANCE_AMOUNTS))
+        # The newest applications are the ones still waiting to be disposed of
+        pending = index >= count * (1 - pending_ratio) or rng.random() < 0.01
+        app_date = day.isoformat()
+        yield ((app_date, copy_type, category, true_copy_number, app_date, amount, receipt_number,
+                "Pending" if pending else "Disposed"),
+               (app_date, receipt_number, rng.choice(("advance", "advance", "recovery")), amount,
+                true_copy_number))
+
+
+def seed_database(conn, count, pending_ratio=0.2, years=3, seed=1):
+    """Bulk-loads `count` applications with their receipts, then applies the migrations.
+
+    Loading before migrating keeps the triggers out of the bulk insert; the migrations then
+    seed the summary and counters from the loaded rows just as they would on a real database.
+    """
+    batch = []
+    for entry in generate_entries(count, pending_ratio, years, seed):
+        batch.append(entry)
+        if len(batch) >= SEED_BATCH_SIZE:
+            _insert_batch(conn, batch)
+            batch = []
+    _insert_batch(conn, batch)
+    conn.commit()
+    migrate(conn)
+    return conn
+
+
+def _insert_batch(conn, batch):
+    conn.executemany("""INSERT INTO true_copy_applications
+                        (application_date, copy_type, application_category, true_copy_number, received_date,
+                         advance_amount, receipt_number, status)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", [application for application, _ in batch])
+    conn.executemany("""INSERT INTO receipt_register (receipt_date, receipt_number, payment_type, amount, true_copy_number)
+                        VALUES (?, ?, ?, ?, ?)""", [receipt for _, receipt in batch])
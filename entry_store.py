@@ -0,0 +1,1105 @@
+# --- entry_store.py ---
+
+"""Schema additions and change tracking for the True Copy Application tables.
+
+The base tables (true_copy_applications, receipt_register) are created by config.py.
+This module layers the extra tables and triggers the entry screens rely on, applied
+once per database through a small named-migration log.
+"""
+
+import argparse
+import functools
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from money import format_rupees, paise_to_float, to_paise
+
+CHANGE_LOG_RETENTION = 50000  # Change-log rows kept for incremental refreshes
+SQL_CHUNK_SIZE = 500  # Ids per "IN (...)" query, well under SQLite's variable limit
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection (sqlite3 defaults to 128)
+# The register file is shared with the other screens, so its journal mode is left as it is
+# unless ENTRY_JOURNAL_MODE asks for one. WAL lets the entry screens read while another clerk
+# writes, but its shared-memory index does not work on a network share, and the mode stays
+# with the file once set. Memory-mapped reads (ENTRY_MMAP_SIZE, in bytes) are off by default
+# for the same reason.
+JOURNAL_MODE_ENV = "ENTRY_JOURNAL_MODE"
+MMAP_SIZE_ENV = "ENTRY_MMAP_SIZE"
+JOURNAL_MODE = os.environ.get(JOURNAL_MODE_ENV) or None  # e.g. "WAL" or "DELETE"; None keeps the file's mode
+MMAP_SIZE = int(os.environ.get(MMAP_SIZE_ENV) or 0)  # e.g. 268435456 maps up to 256 MiB of a local file
+CONNECTION_PRAGMAS = (
+    "PRAGMA cache_size = -32768",  # 32 MiB page cache
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",  # Wait up to 5 s for another clerk's write lock
+)
+BUSY_RETRIES = 5  # Attempts at a write transaction that keeps finding the database locked
+BUSY_BACKOFF_SECONDS = 0.05  # Pause before the first retry; doubled for each one after, with jitter
+TRUE_COPY_PREFIXES = {"Certified Copy": "CC", "Simple Copy": "SC"}
+RECEIPT_CATEGORIES = ("advance", "recovery")
+CATEGORIES = ("Urgent", "Ordinary")  # Application categories of Certified Copies, each with its own numbering
+MAX_ADVANCE_PAISE = 10 ** 9  # ₹1 crore: far above any advance, far below what SQLite's INTEGER holds
+PENDING_PAGE_SIZE = 200  # Rows fetched per keyset page of the pending list
+# The receipt's payment type rides along with each row, so selecting one needs no query
+PENDING_COLUMNS = """id, application_date, copy_type, application_category, true_copy_number,
+                     advance_amount, receipt_number,
+                     (SELECT payment_type
+                      FROM receipt_register
+                      WHERE receipt_register.receipt_number = true_copy_applications.receipt_number
+                      AND receipt_register.amount = true_copy_applications.advance_amount) AS payment_type,
+                     row_version"""
+
+# Pieces of a "CC/001/2024" style True Copy # pulled apart in SQL, for the seeding query
+# and the insert trigger below. The number sits between the first "/" and the "/YYYY" tail.
+_TRUE_COPY_NUMBER_GLOB = "'[A-Z]*/[0-9]*/[0-9][0-9][0-9][0-9]'"
+_TRUE_COPY_PREFIX_SQL = "substr({n}, 1, instr({n}, '/') - 1)"
+_TRUE_COPY_YEAR_SQL = "CAST(substr({n}, -4) AS INTEGER)"
+_TRUE_COPY_SERIAL_SQL = "CAST(substr({n}, instr({n}, '/') + 1, length({n}) - instr({n}, '/') - 5) AS INTEGER)"
+# A REAL rupee column as whole paise; exact for amounts written as paise / 100
+_PAISE_SQL = "CAST(round({n} * 100) AS INTEGER)"
+ROLLUP_REBUILD = "*"  # Marked in receipt_rollup_dirty to have reports.refresh_rollup rebuild every day
+
+
+def _rebuild_pending_summary(conn):
+    """Recomputes pending_summary from true_copy_applications inside the caller's transaction."""
+    conn.execute("DELETE FROM pending_summary")
+    conn.execute("""INSERT INTO pending_summary (advance_paise, application_count, total_paise)
+                    SELECT COALESCE(advance_paise, 0), COUNT(*), SUM(COALESCE(advance_paise, 0))
+                    FROM true_copy_applications
+                    WHERE status = 'Pending'
+                    GROUP BY COALESCE(advance_paise, 0)""")
+
+
+def _update_without_triggers(sql):
+    """Returns a migration step running `sql` (an UPDATE of one table) with that table's triggers dropped.
+
+    Used to backfill new columns without filling the change log or bumping row versions.
+    """
+    table = sql.split()[1]
+
+    def step(conn):
+        triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+                                (table,)).fetchall()
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute(sql)
+        for _, trigger_sql in triggers:
+            conn.execute(trigger_sql)
+
+    return step
+
+
+def _paise_triggers(table, amount, paise):
+    """Builds the triggers that fill a paise column for rows other screens write with only the REAL amount."""
+    expected = _PAISE_SQL.format(n=f"NEW.{amount}")
+    return tuple(f"""CREATE TRIGGER IF NOT EXISTS {table}_{paise}_{event.split()[0].lower()}
+                     AFTER {event} ON {table}
+                     WHEN NEW.{paise} IS NOT {expected}
+                     BEGIN
+                         UPDATE {table} SET {paise} = {expected} WHERE id = NEW.id;
+                     END""" for event in ("INSERT", f"UPDATE OF {amount}"))
+
+
+def _pending_summary_triggers():
+    """Builds the triggers keeping the paise pending_summary current.
+
+    The amount is taken from the REAL column, so the summary comes out right whichever of
+    these and the paise triggers runs first.
+    """
+    old = _PAISE_SQL.format(n="COALESCE(OLD.advance_amount, 0)")
+    new = _PAISE_SQL.format(n="COALESCE(NEW.advance_amount, 0)")
+    add = f"""INSERT INTO pending_summary (advance_paise, application_count, total_paise)
+              VALUES ({new}, 1, {new})
+              ON CONFLICT (advance_paise) DO UPDATE
+              SET application_count = application_count + 1,
+                  total_paise = total_paise + excluded.total_paise;"""
+    remove = f"""UPDATE pending_summary
+                 SET application_count = application_count - 1,
+                     total_paise = total_paise - {old}
+                 WHERE advance_paise = {old};
+                 DELETE FROM pending_summary WHERE application_count <= 0;"""
+    return tuple(f"""CREATE TRIGGER {name}
+                     AFTER {event} ON true_copy_applications
+                     WHEN {side}.status = 'Pending'
+                     BEGIN
+                         {body}
+                     END""" for name, event, side, body in (
+        ("pending_summary_insert", "INSERT", "NEW", add),
+        ("pending_summary_delete", "DELETE", "OLD", remove),
+        # An update is the removal of the old row from the summary plus the addition of the new one
+        ("pending_summary_update_old", "UPDATE OF status, advance_amount", "OLD", remove),
+        ("pending_summary_update_new", "UPDATE OF status, advance_amount", "NEW", add),
+    ))
+
+
+def _true_copy_parts_sql(column):
+    """Returns the prefix, year and serial SQL expressions for a True Copy # column."""
+    return (_TRUE_COPY_PREFIX_SQL.format(n=column), _TRUE_COPY_YEAR_SQL.format(n=column),
+            _TRUE_COPY_SERIAL_SQL.format(n=column))
+
+
+def _seed_number_sequences(conn):
+    """Seeds both counters from the numbers already issued."""
+    prefix, year, serial = _true_copy_parts_sql("true_copy_number")
+    conn.execute(f"""INSERT OR REPLACE INTO true_copy_sequences (prefix, category, year, last_number)
+                     SELECT {prefix}, COALESCE(application_category, ''), {year}, MAX({serial})
+                     FROM true_copy_applications
+                     WHERE true_copy_number GLOB {_TRUE_COPY_NUMBER_GLOB}
+                     GROUP BY 1, 2, 3""")
+
+    # Only plain numbers count, as in receipt_sequence_insert: "2023/15" or "R-12" were typed by
+    # hand and are not in the series. Comparing numerically fixes the text ordering that put "9" after "10".
+    conn.execute("""INSERT OR REPLACE INTO receipt_sequence (id, last_number)
+                    SELECT 1, COALESCE(MAX(CAST(receipt_number AS INTEGER)), 0)
+                    FROM receipt_register
+                    WHERE receipt_number <> '' AND receipt_number NOT GLOB '*[^0-9]*'""")
+
+
+def _true_copy_sequence_trigger(event="INSERT"):
+    """Builds the trigger that moves a counter past any True Copy # inserted (or edited) by hand or by other screens."""
+    prefix, year, serial = _true_copy_parts_sql("NEW.true_copy_number")
+    name = "true_copy_sequences_" + event.split()[0].lower()
+    return f"""CREATE TRIGGER IF NOT EXISTS {name}
+               AFTER {event} ON true_copy_applications
+               WHEN NEW.true_copy_number GLOB {_TRUE_COPY_NUMBER_GLOB}
+               BEGIN
+                   INSERT INTO true_copy_sequences (prefix, category, year, last_number)
+                   VALUES ({prefix}, COALESCE(NEW.application_category, ''), {year}, {serial})
+                   ON CONFLICT (prefix, category, year) DO UPDATE
+                   SET last_number = max(last_number, excluded.last_number);
+               END"""
+
+
+def _duplicate_numbers_sql(table, columns, where):
+    return f"""SELECT {', '.join(columns)}, COUNT(*)
+               FROM {table}
+               WHERE {where}
+               GROUP BY {', '.join(columns)}
+               HAVING COUNT(*) > 1"""
+
+
+# Numbers no two applications or receipts may share, enforced by the database so two windows
+# saving at once cannot both issue one. True Copy serials run per category, so a Certified
+# Copy number is unique together with its category. name -> (table, columns, partial-index condition)
+UNIQUE_NUMBERS = {
+    "receipt_register_number_unique": ("receipt_register", ("receipt_number",), "receipt_number <> ''"),
+    "true_copy_number_unique": ("true_copy_applications",
+                                ("true_copy_number", "COALESCE(application_category, '')"),
+                                "true_copy_number <> ''"),
+}
+
+
+def duplicate_numbers(conn, name):
+    """Returns the (number..., count) rows that keep a UNIQUE_NUMBERS index from being created."""
+    return conn.execute(_duplicate_numbers_sql(*UNIQUE_NUMBERS[name])).fetchall()
+
+
+def create_unique_number_indexes(conn):
+    """Creates the UNIQUE_NUMBERS indexes whose rows allow it; returns the names left out for duplicates.
+
+    Older registers may already hold duplicates typed in by hand. Those are left for a clerk
+    to correct (see `python entry_store.py unique-numbers`) rather than failing the migration.
+    """
+    skipped = []
+    for name, (table, columns, where) in UNIQUE_NUMBERS.items():
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone():
+            continue
+        if conn.execute(_duplicate_numbers_sql(table, columns, where) + " LIMIT 1").fetchone():
+            skipped.append(name)
+            continue
+        conn.execute(f"CREATE UNIQUE INDEX {name} ON {table} ({', '.join(columns)}) WHERE {where}")
+    return skipped
+
+
+MIGRATIONS = [
+    ("001_change_log", (
+        # One row per insert, update or delete of an application. Open windows remember the
+        # last seq they have seen and only re-read the applications changed after it.
+        """CREATE TABLE IF NOT EXISTS true_copy_changes (
+               seq INTEGER PRIMARY KEY AUTOINCREMENT,
+               application_id INTEGER NOT NULL
+           )""",
+        """CREATE TRIGGER IF NOT EXISTS true_copy_changes_insert
+           AFTER INSERT ON true_copy_applications
+           BEGIN
+               INSERT INTO true_copy_changes (application_id) VALUES (NEW.id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS true_copy_changes_update
+           AFTER UPDATE ON true_copy_applications
+           BEGIN
+               INSERT INTO true_copy_changes (application_id) VALUES (NEW.id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS true_copy_changes_delete
+           AFTER DELETE ON true_copy_applications
+           BEGIN
+               INSERT INTO true_copy_changes (application_id) VALUES (OLD.id);
+           END""",
+    )),
+    ("002_pending_summary", (
+        # Count and total of pending applications per advance amount, kept current by the
+        # triggers below so the summary panel never has to aggregate the base table.
+        """CREATE TABLE IF NOT EXISTS pending_summary (
+               advance_amount REAL PRIMARY KEY,
+               application_count INTEGER NOT NULL,
+               total_rupees REAL NOT NULL
+           )""",
+        """CREATE TRIGGER IF NOT EXISTS pending_summary_insert
+           AFTER INSERT ON true_copy_applications
+           WHEN NEW.status = 'Pending'
+           BEGIN
+               INSERT INTO pending_summary (advance_amount, application_count, total_rupees)
+               VALUES (COALESCE(NEW.advance_amount, 0), 1, COALESCE(NEW.advance_amount, 0))
+               ON CONFLICT (advance_amount) DO UPDATE
+               SET application_count = application_count + 1,
+                   total_rupees = total_rupees + excluded.total_rupees;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS pending_summary_delete
+           AFTER DELETE ON true_copy_applications
+           WHEN OLD.status = 'Pending'
+           BEGIN
+               UPDATE pending_summary
+               SET application_count = application_count - 1,
+                   total_rupees = total_rupees - COALESCE(OLD.advance_amount, 0)
+               WHERE advance_amount = COALESCE(OLD.advance_amount, 0);
+               DELETE FROM pending_summary WHERE application_count <= 0;
+           END""",
+        # An update is the removal of the old row from the summary plus the addition of the new
+        # one; each half only applies when that side of the update is pending.
+        """CREATE TRIGGER IF NOT EXISTS pending_summary_update_old
+           AFTER UPDATE OF status, advance_amount ON true_copy_applications
+           WHEN OLD.status = 'Pending'
+           BEGIN
+               UPDATE pending_summary
+               SET application_count = application_count - 1,
+                   total_rupees = total_rupees - COALESCE(OLD.advance_amount, 0)
+               WHERE advance_amount = COALESCE(OLD.advance_amount, 0);
+               DELETE FROM pending_summary WHERE application_count <= 0;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS pending_summary_update_new
+           AFTER UPDATE OF status, advance_amount ON true_copy_applications
+           WHEN NEW.status = 'Pending'
+           BEGIN
+               INSERT INTO pending_summary (advance_amount, application_count, total_rupees)
+               VALUES (COALESCE(NEW.advance_amount, 0), 1, COALESCE(NEW.advance_amount, 0))
+               ON CONFLICT (advance_amount) DO UPDATE
+               SET application_count = application_count + 1,
+                   total_rupees = total_rupees + excluded.total_rupees;
+           END""",
+        # Filled in rupees here; 008_paise rebuilds it in paise
+        """INSERT INTO pending_summary (advance_amount, application_count, total_rupees)
+           SELECT COALESCE(advance_amount, 0), COUNT(*), SUM(COALESCE(advance_amount, 0))
+           FROM true_copy_applications
+           WHERE status = 'Pending'
+           GROUP BY COALESCE(advance_amount, 0)""",
+    )),
+    ("003_number_sequences", (
+        # Last issued True Copy # per (prefix, category, year); category is '' for Simple Copies
+        """CREATE TABLE IF NOT EXISTS true_copy_sequences (
+               prefix TEXT NOT NULL,
+               category TEXT NOT NULL,
+               year INTEGER NOT NULL,
+               last_number INTEGER NOT NULL,
+               PRIMARY KEY (prefix, category, year)
+           ) WITHOUT ROWID""",
+        # Single-row counter for the receipt register
+        """CREATE TABLE IF NOT EXISTS receipt_sequence (
+               id INTEGER PRIMARY KEY CHECK (id = 1),
+               last_number INTEGER NOT NULL
+           )""",
+        _true_copy_sequence_trigger(),
+        """CREATE TRIGGER IF NOT EXISTS receipt_sequence_insert
+           AFTER INSERT ON receipt_register
+           WHEN NEW.receipt_number <> '' AND NEW.receipt_number NOT GLOB '*[^0-9]*'
+           BEGIN
+               INSERT INTO receipt_sequence (id, last_number)
+               VALUES (1, CAST(NEW.receipt_number AS INTEGER))
+               ON CONFLICT (id) DO UPDATE SET last_number = max(last_number, excluded.last_number);
+           END""",
+        _seed_number_sequences,
+    )),
+    ("004_indexes", (
+        # Covering index over pending rows only, in keyset order: the pending list, its pages
+        # and the incremental refresh never touch disposed rows or the table itself.
+        """CREATE INDEX IF NOT EXISTS true_copy_pending_by_date
+           ON true_copy_applications (application_date, id, copy_type, application_category,
+                                      true_copy_number, advance_amount, receipt_number)
+           WHERE status = 'Pending'""",
+        """CREATE INDEX IF NOT EXISTS true_copy_by_number
+           ON true_copy_applications (true_copy_number)""",
+        # Duplicate checks by receipt number, and the payment type lookup by (number, amount)
+        """CREATE INDEX IF NOT EXISTS receipt_register_by_number
+           ON receipt_register (receipt_number, amount, payment_type)""",
+    )),
+    ("005_row_versions", (
+        # Bumped by every update, so a window saving an edit can tell whether someone else
+        # changed the application since it was read (see update_entry)
+        "ALTER TABLE true_copy_applications ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1",
+        # Other screens update applications without knowing about the column; bump it for them
+        """CREATE TRIGGER IF NOT EXISTS true_copy_row_version
+           AFTER UPDATE ON true_copy_applications
+           WHEN NEW.row_version = OLD.row_version
+           BEGIN
+               UPDATE true_copy_applications SET row_version = OLD.row_version + 1 WHERE id = NEW.id;
+           END""",
+        # The pending list carries the version, so the covering index has to as well
+        "DROP INDEX IF EXISTS true_copy_pending_by_date",
+        """CREATE INDEX true_copy_pending_by_date
+           ON true_copy_applications (application_date, id, copy_type, application_category,
+                                      true_copy_number, advance_amount, receipt_number, row_version)
+           WHERE status = 'Pending'""",
+        # Edited numbers move the counters just as inserted ones do
+        _true_copy_sequence_trigger("UPDATE OF true_copy_number"),
+        """CREATE TRIGGER IF NOT EXISTS receipt_sequence_update
+           AFTER UPDATE OF receipt_number ON receipt_register
+           WHEN NEW.receipt_number <> '' AND NEW.receipt_number NOT GLOB '*[^0-9]*'
+           BEGIN
+               INSERT INTO receipt_sequence (id, last_number)
+               VALUES (1, CAST(NEW.receipt_number AS INTEGER))
+               ON CONFLICT (id) DO UPDATE SET last_number = max(last_number, excluded.last_number);
+           END""",
+    )),
+    ("006_unique_numbers", (
+        create_unique_number_indexes,
+    )),
+    ("007_archiving", (
+        # Only pending rows are shown from the change log, so deleting disposed ones (archiving,
+        # see entry_archive.py) must not fill it with ids every open window would re-read
+        "DROP TRIGGER IF EXISTS true_copy_changes_delete",
+        """CREATE TRIGGER true_copy_changes_delete
+           AFTER DELETE ON true_copy_applications
+           WHEN OLD.status = 'Pending'
+           BEGIN
+               INSERT INTO true_copy_changes (application_id) VALUES (OLD.id);
+           END""",
+        # Historical lookups by receipt # (entry_archive.find_applications) on the working table
+        """CREATE INDEX IF NOT EXISTS true_copy_by_receipt
+           ON true_copy_applications (receipt_number)""",
+    )),
+    ("008_paise", (
+        # Money as whole paise (see money.py). The REAL columns stay for the other screens;
+        # the entry screen writes both, and triggers fill the paise for everyone else.
+        "ALTER TABLE true_copy_applications ADD COLUMN advance_paise INTEGER",
+        "ALTER TABLE receipt_register ADD COLUMN amount_paise INTEGER",
+        _update_without_triggers(f"""UPDATE true_copy_applications
+                                     SET advance_paise = {_PAISE_SQL.format(n="advance_amount")}"""),
+        _update_without_triggers(f"""UPDATE receipt_register
+                                     SET amount_paise = {_PAISE_SQL.format(n="amount")}"""),
+        *_paise_triggers("true_copy_applications", "advance_amount", "advance_paise"),
+        *_paise_triggers("receipt_register", "amount", "amount_paise"),
+        # The summary's running totals were REAL sums, which drift; they are kept in paise now
+        "DROP TRIGGER IF EXISTS pending_summary_insert",
+        "DROP TRIGGER IF EXISTS pending_summary_delete",
+        "DROP TRIGGER IF EXISTS pending_summary_update_old",
+        "DROP TRIGGER IF EXISTS pending_summary_update_new",
+        "DROP TABLE pending_summary",
+        """CREATE TABLE pending_summary (
+               advance_paise INTEGER PRIMARY KEY,
+               application_count INTEGER NOT NULL,
+               total_paise INTEGER NOT NULL
+           )""",
+        *_pending_summary_triggers(),
+        _rebuild_pending_summary,
+    )),
+    ("009_receipt_rollup", (
+        # Collections per day, copy type, category and payment type for reports.py. Triggers
+        # only mark the days a write touched; reports recompute those days before reading.
+        """CREATE TABLE receipt_daily_rollup (
+               receipt_date TEXT NOT NULL,
+               copy_type TEXT NOT NULL,
+               application_category TEXT NOT NULL,
+               payment_type TEXT NOT NULL,
+               receipt_count INTEGER NOT NULL,
+               total_paise INTEGER NOT NULL,
+               PRIMARY KEY (receipt_date, copy_type, application_category, payment_type)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE receipt_rollup_dirty (
+               receipt_date TEXT PRIMARY KEY
+           ) WITHOUT ROWID""",
+        """CREATE INDEX IF NOT EXISTS receipt_register_by_date
+           ON receipt_register (receipt_date)""",
+        """CREATE TRIGGER receipt_rollup_insert
+           AFTER INSERT ON receipt_register
+           BEGIN
+               INSERT OR IGNORE INTO receipt_rollup_dirty (receipt_date) VALUES (NEW.receipt_date);
+           END""",
+        """CREATE TRIGGER receipt_rollup_update
+           AFTER UPDATE OF receipt_date, receipt_number, payment_type, amount, true_copy_number ON receipt_register
+           BEGIN
+               INSERT OR IGNORE INTO receipt_rollup_dirty (receipt_date) VALUES (OLD.receipt_date), (NEW.receipt_date);
+           END""",
+        """CREATE TRIGGER receipt_rollup_delete
+           AFTER DELETE ON receipt_register
+           BEGIN
+               INSERT OR IGNORE INTO receipt_rollup_dirty (receipt_date) VALUES (OLD.receipt_date);
+           END""",
+        # A receipt is counted under its application's copy type and category
+        """CREATE TRIGGER true_copy_rollup_insert
+           AFTER INSERT ON true_copy_applications
+           WHEN NEW.receipt_number <> ''
+           BEGIN
+               INSERT OR IGNORE INTO receipt_rollup_dirty (receipt_date)
+               SELECT receipt_date FROM receipt_register WHERE receipt_number = NEW.receipt_number;
+           END""",
+        """CREATE TRIGGER true_copy_rollup_update
+           AFTER UPDATE OF copy_type, application_category, receipt_number ON true_copy_applications
+           BEGIN
+               INSERT OR IGNORE INTO receipt_rollup_dirty (receipt_date)
+               SELECT receipt_date
+               FROM receipt_register
+               WHERE receipt_number IN (OLD.receipt_number, NEW.receipt_number);
+           END""",
+        f"INSERT INTO receipt_rollup_dirty (receipt_date) VALUES ('{ROLLUP_REBUILD}')",
+    )),
+]
+
+
+def database_path(conn):
+    """Returns the file behind a connection's main database, or '' for an in-memory one."""
+    for row in conn.execute("PRAGMA database_list"):
+        if row[1] == "main":
+            return row[2]
+    return ""
+
+
+def tune_connection(conn, journal_mode=None, mmap_size=None):
+    """Applies the performance pragmas to a connection.
+
+    `journal_mode` and `mmap_size` default to JOURNAL_MODE and MMAP_SIZE; without a journal
+    mode the file keeps the one it has. synchronous is relaxed to NORMAL only in WAL mode,
+    where that is still safe against power loss.
+    """
+    journal_mode = journal_mode or JOURNAL_MODE
+    if journal_mode:
+        conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    current = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    conn.execute(f"PRAGMA synchronous = {'NORMAL' if current.lower() == 'wal' else 'FULL'}")
+    conn.execute(f"PRAGMA mmap_size = {int(MMAP_SIZE if mmap_size is None else mmap_size)}")
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def open_connection(path, journal_mode=None, mmap_size=None):
+    """Opens a tuned connection with a large statement cache and sqlite3.Row rows (see tune_connection)."""
+    conn = sqlite3.connect(path, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return tune_connection(conn, journal_mode, mmap_size)
+
+
+class ConnectionManager:
+    """Keeps one long-lived, tuned connection for a window instead of one per query.
+
+    `connect` is the usual way of opening the database (config.get_db_connection). It is
+    called once to find the database file, which is then reopened with open_connection so
+    the statement cache and pragmas apply; the page cache stays warm between UI actions.
+    """
+
+    def __init__(self, connect=None, path=None):
+        self._connect = connect
+        self._path = path
+        self._conn = None
+
+    def connection(self):
+        """Returns the shared connection, opening it on first use."""
+        if self._conn is None:
+            if self._path:
+                self._conn = open_connection(self._path)
+            else:
+                bootstrap = self._connect()
+                self._path = database_path(bootstrap)
+                if self._path:
+                    bootstrap.close()
+                    self._conn = open_connection(self._path)
+                else:  # In-memory database: it only exists on this connection, so keep it
+                    self._conn = tune_connection(bootstrap)
+        return self._conn
+
+    def interrupt(self):
+        """Aborts the statement running on the shared connection; safe to call from any thread."""
+        if self._conn is not None:
+            self._conn.interrupt()
+
+    def close(self):
+        """Closes the shared connection; the next connection() call reopens it."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def is_busy_error(error):
+    """Tells whether an sqlite3 error means another connection held the lock for too long."""
+    code = getattr(error, "sqlite_errorcode", None)  # Python 3.11+
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)  # Extended codes included
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+
+def retry_on_busy(transaction):
+    """Reruns a function holding one whole write transaction when SQLite reports the database busy.
+
+    busy_timeout already waits for the lock; this covers the cases it gives up on (the wait
+    ran out, or a read snapshot went stale under WAL). Retries back off exponentially with
+    random jitter, so clerks who collided do not all come back at the same moment.
+    """
+    @functools.wraps(transaction)
+    def run(conn, *args, **kwargs):
+        for attempt in range(BUSY_RETRIES):
+            try:
+                return transaction(conn, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if attempt == BUSY_RETRIES - 1 or not is_busy_error(e):
+                    raise
+            time.sleep(BUSY_BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+    return run
+
+
+@retry_on_busy
+def migrate(conn):
+    """Applies any migrations not yet recorded in entry_schema_migrations.
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction, so two windows starting
+    against the same database at once apply it exactly once. A step is either an SQL
+    statement or a callable taking the connection.
+    """
+    conn.execute("""CREATE TABLE IF NOT EXISTS entry_schema_migrations (
+                        name TEXT PRIMARY KEY,
+                        applied_at TEXT NOT NULL
+                    )""")
+    conn.commit()
+    applied = {row[0] for row in conn.execute("SELECT name FROM entry_schema_migrations")}
+
+    for name, steps in MIGRATIONS:
+        if name in applied:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another window may have applied it while we waited for the write lock
+            if not conn.execute("SELECT 1 FROM entry_schema_migrations WHERE name = ?", (name,)).fetchone():
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute("INSERT INTO entry_schema_migrations (name, applied_at) VALUES (?, datetime('now'))",
+                             (name,))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+
+def prepare_database(conn):
+    """Applies pending migrations and trims the change log; run once when a window opens."""
+    migrate(conn)
+    prune_changes(conn)
+
+
+def prune_changes(conn, keep=CHANGE_LOG_RETENTION):
+    """Trims the change log to its newest `keep` rows."""
+    conn.execute("DELETE FROM true_copy_changes WHERE seq <= (SELECT MAX(seq) FROM true_copy_changes) - ?",
+                 (keep,))
+    conn.commit()
+
+
+def latest_change(conn):
+    """Returns the newest change-log sequence number, or 0 for an empty log."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM true_copy_changes").fetchone()[0]
+
+
+def data_version(conn):
+    """Returns PRAGMA data_version, which changes whenever another connection commits a write."""
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def changed_application_ids(conn, since):
+    """Returns (watermark, ids) for the applications changed after change-log seq `since`.
+
+    `ids` is None when the log has been pruned past `since`; the caller must then reload
+    everything and continue from the returned watermark.
+    """
+    # Two subqueries, so each of MAX and MIN is a single seek on the primary key
+    latest, oldest = conn.execute("""SELECT (SELECT COALESCE(MAX(seq), 0) FROM true_copy_changes),
+                                            (SELECT MIN(seq) FROM true_copy_changes)""").fetchone()
+    if latest <= since:
+        return since, []
+    if oldest is not None and oldest > since + 1:
+        return latest, None
+
+    cursor = conn.execute("""SELECT DISTINCT application_id
+                             FROM true_copy_changes
+                             WHERE seq > ? AND seq <= ?""", (since, latest))
+    return latest, [row[0] for row in cursor]
+
+
+def pending_changes(conn, since):
+    """Returns (watermark, ids, rows) for the applications changed after change-log seq `since`.
+
+    `rows` maps each changed id that is still pending to its current row; ids missing from
+    it are no longer pending. `ids` is None when the caller must reload from scratch.
+    """
+    watermark, changed_ids = changed_application_ids(conn, since)
+    rows = {}
+    for ids in chunked(changed_ids or []):
+        cursor = conn.execute(f"""SELECT {PENDING_COLUMNS}
+                                  FROM true_copy_applications
+                                  WHERE status = 'Pending'
+                                  AND id IN ({','.join('?' * len(ids))})""", ids)
+        rows.update((row['id'], row) for row in cursor)
+    return watermark, changed_ids, rows
+
+
+def fetch_pending_page(conn, older_than=None, newer_than=None, limit=PENDING_PAGE_SIZE):
+    """Fetches one keyset page of pending entries next to an (application_date, id) key.
+
+    Rows older than `older_than` come back newest first; rows newer than `newer_than` come
+    back oldest first (nearest the key first). With neither, returns the newest page.
+    """
+    sql_query = f"""SELECT {PENDING_COLUMNS}
+                    FROM true_copy_applications
+                    WHERE status = 'Pending'"""
+    params = []
+    # Row-value comparisons let SQLite seek straight into true_copy_pending_by_date
+    if newer_than:
+        sql_query += """ AND (application_date, id) > (?, ?)
+                         ORDER BY application_date ASC, id ASC"""
+        params = list(newer_than)
+    else:
+        if older_than:
+            sql_query += " AND (application_date, id) < (?, ?)"
+            params = list(older_than)
+        sql_query += " ORDER BY application_date DESC, id DESC"
+    sql_query += " LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql_query, params).fetchall()
+
+
+def first_pending_page(conn, limit=PENDING_PAGE_SIZE):
+    """Returns (watermark, rows) for the newest pending page.
+
+    The watermark is read first so no change can slip in between it and the page.
+    """
+    return latest_change(conn), fetch_pending_page(conn, limit=limit)
+
+
+def fetch_entry_detail(conn, entry_id):
+    """Returns (application row, receipt payment type or None) for one application, or None.
+
+    The row ends with the application's row_version, for update_entry.
+    """
+    entry = conn.execute("""SELECT application_date, copy_type, application_category, true_copy_number,
+                                   advance_amount, receipt_number, row_version
+                            FROM true_copy_applications
+                            WHERE id = ?""", (entry_id,)).fetchone()
+    if entry is None:
+        return None
+    receipt = conn.execute("""SELECT payment_type
+                              FROM receipt_register
+                              WHERE receipt_number = ?
+                              AND amount = ?""", (entry['receipt_number'], entry['advance_amount'])).fetchone()
+    return entry, receipt['payment_type'] if receipt else None
+
+
+def chunked(items, size=SQL_CHUNK_SIZE):
+    """Yields successive slices of `items` no longer than `size`."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def true_copy_prefix(copy_type):
+    """Returns the True Copy # prefix for a copy type."""
+    return TRUE_COPY_PREFIXES.get(copy_type, "SC")
+
+
+def format_true_copy_number(copy_type, serial, year):
+    """Formats a True Copy # such as CC/007/2024."""
+    return f"{true_copy_prefix(copy_type)}/{str(serial).zfill(3)}/{year}"
+
+
+def true_copy_serial(true_copy_number):
+    """Returns the serial of a True Copy # such as CC/007/2024 (7), or None for any other shape."""
+    parts = str(true_copy_number or "").split("/")
+    if len(parts) != 3 or not parts[1].isdigit():
+        return None
+    return int(parts[1])
+
+
+def peek_true_copy_number(conn, copy_type, category, year):
+    """Returns the next True Copy # for a copy type, category and year without reserving it."""
+    row = conn.execute("""SELECT last_number
+                          FROM true_copy_sequences
+                          WHERE prefix = ? AND category = ? AND year = ?""",
+                       (true_copy_prefix(copy_type), category or '', year)).fetchone()
+    return format_true_copy_number(copy_type, (row[0] if row else 0) + 1, year)
+
+
+def last_receipt_number(conn):
+    """Returns the last issued receipt number, or 0 before the first receipt."""
+    row = conn.execute("SELECT last_number FROM receipt_sequence WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+class EntryValidationError(ValueError):
+    """Raised when an entry is missing a required field or has an invalid value."""
+
+
+class EntryConflictError(Exception):
+    """Raised when an application was changed or disposed of by someone else since it was read."""
+
+
+def validate_entry(entry):
+    """Checks one entry and returns a normalized copy ready for save_entries.
+
+    An entry is a dict with application_date (YYYY-MM-DD), copy_type, application_category,
+    true_copy_number, advance_amount, receipt_number and payment_type, plus an optional
+    receipt_date (YYYY-MM-DD, default today). Leave true_copy_number or receipt_number empty
+    to have one allocated. Every path that saves entries (the screen, save_entries' callers
+    and imports) goes through here.
+    """
+    app_date = str(entry.get("application_date") or "").strip()
+    copy_type = entry.get("copy_type") or ""
+    category = entry.get("application_category") or None
+    advance = entry.get("advance_amount")
+    payment_type = entry.get("payment_type") or ""
+
+    if not all([app_date, copy_type, payment_type]) or advance in (None, ""):
+        raise EntryValidationError("All fields are required!")
+    if copy_type not in TRUE_COPY_PREFIXES:
+        raise EntryValidationError(f"Unknown copy type: {copy_type}")
+    if copy_type == "Certified Copy" and not category:
+        raise EntryValidationError("Category is required for Certified Copies!")
+    if copy_type == "Certified Copy" and category not in CATEGORIES:
+        raise EntryValidationError(f"Unknown category: {category}")
+    if payment_type not in RECEIPT_CATEGORIES:
+        raise EntryValidationError(f"Unknown receipt category: {payment_type}")
+    receipt_date = str(entry.get("receipt_date") or "").strip() or datetime.now().strftime("%Y-%m-%d")
+    for label, value in (("application", app_date), ("receipt", receipt_date)):
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise EntryValidationError(f"Invalid {label} date: {value}") from None
+    try:
+        advance_paise = to_paise(advance)
+    except ValueError:
+        raise EntryValidationError("Invalid input value. Please enter a valid number.") from None
+    if advance_paise < 0:
+        raise EntryValidationError("The advance amount cannot be negative.")
+    if advance_paise > MAX_ADVANCE_PAISE:
+        raise EntryValidationError(f"The advance amount cannot be over {format_rupees(MAX_ADVANCE_PAISE)}.")
+
+    return {
+        "application_date": app_date,
+        "copy_type": copy_type,
+        "application_category": category if copy_type == "Certified Copy" else None,
+        "true_copy_number": str(entry.get("true_copy_number") or "").strip() or None,
+        "advance_amount": paise_to_float(advance_paise),
+        "advance_paise": advance_paise,
+        "receipt_number": str(entry.get("receipt_number") or "").strip() or None,
+        "payment_type": payment_type,
+        "receipt_date": receipt_date,
+    }
+
+
+class _NumberAllocator:
+    """Hands out consecutive numbers from the counters inside one write transaction.
+
+    Counters are read once and advanced in memory; the insert triggers then move the stored
+    counters past the numbers written, so a batch costs one lookup per counter.
+    """
+
+    def __init__(self, conn, taken_receipts, taken_true_copies=()):
+        self.conn = conn
+        self.taken_receipts = taken_receipts
+        self.taken_true_copies = set(taken_true_copies)  # (True Copy #, category or '') typed into the batch
+        self.true_copy_serials = {}
+        self.receipt_serial = None
+
+    def true_copy_number(self, copy_type, category, year):
+        key = (true_copy_prefix(copy_type), category or '', year)
+        if key not in self.true_copy_serials:
+            row = self.conn.execute("""SELECT last_number
+                                       FROM true_copy_sequences
+                                       WHERE prefix = ? AND category = ? AND year = ?""", key).fetchone()
+            self.true_copy_serials[key] = row[0] if row else 0
+        while True:  # Step over numbers typed in by hand elsewhere in the batch
+            self.true_copy_serials[key] += 1
+            true_copy_number = format_true_copy_number(copy_type, self.true_copy_serials[key], year)
+            if (true_copy_number, category or '') not in self.taken_true_copies:
+                return true_copy_number
+
+    def receipt_number(self):
+        if self.receipt_serial is None:
+            self.receipt_serial = last_receipt_number(self.conn)
+        while True:  # Step over numbers typed in by hand elsewhere in the batch
+            self.receipt_serial += 1
+            receipt_number = str(self.receipt_serial)
+            if receipt_number not in self.taken_receipts:
+                self.taken_receipts.add(receipt_number)
+                return receipt_number
+
+
+def _number_tables(conn):
+    """Returns the (applications, receipts) tables a typed number must be new to.
+
+    Once entry_archive.attach_archive has defined the all_* views on the connection, numbers
+    moved into the archive count as taken too; otherwise only the working tables are read.
+    """
+    views = {row[0] for row in conn.execute("""SELECT name
+                                               FROM temp.sqlite_master
+                                               WHERE type = 'view'
+                                               AND name IN ('all_true_copy_applications', 'all_receipts')""")}
+    if len(views) == 2:
+        return "all_true_copy_applications", "all_receipts"
+    return "main.true_copy_applications", "main.receipt_register"
+
+
+def _existing_true_copy_numbers(conn, pairs, exclude_id=None):
+    """Returns which (True Copy #, category or '') pairs already belong to an application, archived ones included."""
+    applications, _ = _number_tables(conn)
+    existing = set()
+    for numbers in chunked(sorted({number for number, _ in pairs})):
+        cursor = conn.execute(f"""SELECT true_copy_number, COALESCE(application_category, ''), id
+                                  FROM {applications}
+                                  WHERE true_copy_number IN ({','.join('?' * len(numbers))})""", numbers)
+        existing.update((row[0], row[1]) for row in cursor if row[2] != exclude_id)
+    return existing & set(pairs)
+
+
+@retry_on_busy
+def save_entries(conn, entries, year=None, by_application_year=False):
+    """Saves applications and their receipts in a single BEGIN IMMEDIATE transaction.
+
+    Every entry is validated first, then duplicate receipts and True Copy numbers are
+    checked, numbers allocated and both tables filled with executemany before one commit.
+    Rows that fail validation or reuse a number are skipped and reported rather than
+    aborting the batch. A save that finds the database busy is retried (retry_on_busy).
+
+    Allocated True Copy numbers are for `year` (default this year), or for the year of each
+    entry's application date with `by_application_year`, as imports of old registers need.
+
+    Returns (saved, errors): the saved entries with their final numbers, and a list of
+    (index, message) pairs for the rejected ones.
+    """
+    year = year or datetime.now().year
+    errors = []
+    valid = []
+    for index, entry in enumerate(entries):
+        try:
+            valid.append((index, validate_entry(entry)))
+        except EntryValidationError as e:
+            errors.append((index, str(e)))
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Receipt numbers typed in must be new to the register and to the batch itself
+        typed = [entry["receipt_number"] for _, entry in valid if entry["receipt_number"]]
+        _, receipts = _number_tables(conn)
+        existing = set()
+        for numbers in chunked(sorted(set(typed))):
+            cursor = conn.execute(f"""SELECT receipt_number
+                                      FROM {receipts}
+                                      WHERE receipt_number IN ({','.join('?' * len(numbers))})""", numbers)
+            existing.update(row[0] for row in cursor)
+
+        # So must True Copy numbers, within their category
+        typed_true_copies = [(entry["true_copy_number"], entry["application_category"] or '')
+                             for _, entry in valid if entry["true_copy_number"]]
+        existing_true_copies = _existing_true_copy_numbers(conn, typed_true_copies)
+
+        allocator = _NumberAllocator(conn, set(typed) | existing, typed_true_copies)
+        seen = set()
+        seen_true_copies = set()
+        saved = []
+        for index, entry in valid:
+            receipt_number = entry["receipt_number"]
+            true_copy = (entry["true_copy_number"], entry["application_category"] or '')
+            if receipt_number in existing or receipt_number in seen:
+                errors.append((index, f"Receipt number {receipt_number} already exists!"))
+                continue
+            if true_copy in existing_true_copies or true_copy in seen_true_copies:
+                errors.append((index, f"True Copy # {true_copy[0]} already exists!"))
+                continue
+            if true_copy[0]:
+                seen_true_copies.add(true_copy)
+            if receipt_number:
+                seen.add(receipt_number)
+            else:
+                entry["receipt_number"] = allocator.receipt_number()
+            if not entry["true_copy_number"]:
+                entry["true_copy_number"] = allocator.true_copy_number(
+                    entry["copy_type"], entry["application_category"],
+                    int(entry["application_date"][:4]) if by_application_year else year)
+            saved.append(entry)
+
+        # Application first, so the receipt always has its application to point at
+        conn.executemany("""INSERT INTO true_copy_applications
+                            (application_date, copy_type, application_category, true_copy_number,
+                             received_date, advance_amount, advance_paise, receipt_number, status)
+                            VALUES (:application_date, :copy_type, :application_category, :true_copy_number,
+                                    :application_date, :advance_amount, :advance_paise, :receipt_number,
+                                    'Pending')""", saved)
+        conn.executemany("""INSERT INTO receipt_register
+                            (receipt_date, receipt_number, payment_type, amount, amount_paise, true_copy_number)
+                            VALUES (:receipt_date, :receipt_number, :payment_type, :advance_amount, :advance_paise,
+                                    :true_copy_number)""", saved)
+        conn.commit()
+    except BaseException:  # Whatever failed (a bind overflowing, say), the write lock must not stay held
+        conn.rollback()
+        raise
+
+    errors.sort()
+    return saved, errors
+
+
+@retry_on_busy
+def update_entry(conn, entry_id, entry, row_version):
+    """Saves changes to a pending application and its receipt, unless someone else got there first.
+
+    `row_version` is the version the caller read the application at (fetch_entry_detail,
+    PENDING_COLUMNS). If it has moved on, or the application is no longer pending, nothing
+    is written and EntryConflictError is raised, so the caller can reload and try again.
+    Both numbers are required; a number belonging to another application or receipt raises
+    EntryValidationError. Returns the entry as saved, with its new row_version.
+    """
+    entry = validate_entry(entry)
+    if not entry["true_copy_number"] or not entry["receipt_number"]:
+        raise EntryValidationError("All fields are required!")
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = conn.execute("""SELECT application_category, true_copy_number, advance_amount, receipt_number,
+                                         row_version
+                                  FROM true_copy_applications
+                                  WHERE id = ? AND status = 'Pending'""", (entry_id,)).fetchone()
+        if current is None or current['row_version'] != row_version:
+            raise EntryConflictError("This entry was changed or disposed of by another user since it was opened.")
+
+        receipt_number = entry["receipt_number"]
+        if receipt_number != current['receipt_number'] and conn.execute(
+                f"SELECT 1 FROM {_number_tables(conn)[1]} WHERE receipt_number = ?", (receipt_number,)).fetchone():
+            raise EntryValidationError(f"Receipt number {receipt_number} already exists!")
+        true_copy = (entry["true_copy_number"], entry["application_category"] or '')
+        if _existing_true_copy_numbers(conn, [true_copy], exclude_id=entry_id):
+            raise EntryValidationError(f"True Copy # {true_copy[0]} already exists!")
+
+        entry["id"] = entry_id
+        entry["row_version"] = row_version + 1
+        entry["old_receipt_number"] = current['receipt_number']
+        conn.execute("""UPDATE true_copy_applications
+                        SET application_date = :application_date, copy_type = :copy_type,
+                            application_category = :application_category, true_copy_number = :true_copy_number,
+                            advance_amount = :advance_amount, advance_paise = :advance_paise,
+                            receipt_number = :receipt_number, row_version = :row_version
+                        WHERE id = :id""", entry)
+        # The receipt is found by its number alone; an amount changed elsewhere must not hide it
+        cursor = conn.execute("""UPDATE receipt_register
+                                 SET receipt_number = :receipt_number, payment_type = :payment_type,
+                                     amount = :advance_amount, amount_paise = :advance_paise,
+                                     true_copy_number = :true_copy_number
+                                 WHERE id = (SELECT id
+                                             FROM receipt_register
+                                             WHERE receipt_number = :old_receipt_number
+                                             LIMIT 1)""", entry)
+        if cursor.rowcount != 1:
+            raise EntryConflictError(f"Receipt number {current['receipt_number']} of this entry is no longer "
+                                     "in the receipt register.")
+        conn.commit()
+    except BaseException:  # Conflicts and rejects included; see save_entries
+        conn.rollback()
+        raise
+
+    del entry["old_receipt_number"], entry["receipt_date"]  # receipt_date is not edited
+    return entry
+
+
+def pending_summary(conn):
+    """Returns the (advance_paise, application_count, total_paise) rows, largest amount first."""
+    cursor = conn.execute("""SELECT advance_paise, application_count, total_paise
+                             FROM pending_summary
+                             ORDER BY advance_paise DESC""")
+    return cursor.fetchall()
+
+
+@retry_on_busy
+def rebuild_pending_summary(conn):
+    """Recomputes pending_summary from the base table in one transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _rebuild_pending_summary(conn)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def verify_pending_summary(conn):
+    """Compares pending_summary with a fresh aggregate of the base table.
+
+    Returns a list of (advance_paise, expected_count, expected_total, actual_count, actual_total)
+    tuples, totals in paise, for every amount that disagrees; an empty list means the
+    aggregate is in sync. Paise are integers, so the comparison is exact.
+    """
+    expected = {row[0]: (row[1], row[2]) for row in conn.execute(
+        """SELECT COALESCE(advance_paise, 0), COUNT(*), SUM(COALESCE(advance_paise, 0))
+           FROM true_copy_applications
+           WHERE status = 'Pending'
+           GROUP BY COALESCE(advance_paise, 0)""")}
+    actual = {row[0]: (row[1], row[2]) for row in conn.execute(
+        "SELECT advance_paise, application_count, total_paise FROM pending_summary")}
+
+    mismatches = []
+    for amount in sorted(expected.keys() | actual.keys(), reverse=True):
+        expected_count, expected_total = expected.get(amount, (0, 0))
+        actual_count, actual_total = actual.get(amount, (0, 0))
+        if (expected_count, expected_total) != (actual_count, actual_total):
+            mismatches.append((amount, expected_count, expected_total, actual_count, actual_total))
+    return mismatches
+
+
+def main(argv=None):
+    """Command-line maintenance for the entry-screen schema additions."""
+    parser = argparse.ArgumentParser(description="Maintain the True Copy entry-screen tables.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="apply pending schema migrations")
+    verify = commands.add_parser("verify-summary", help="check pending_summary against the applications")
+    verify.add_argument("--repair", action="store_true", help="rebuild the summary if it is out of sync")
+    commands.add_parser("rebuild-summary", help="recompute pending_summary from the applications")
+    commands.add_parser("unique-numbers", help="list duplicate receipt and True Copy numbers, and enforce "
+                                               "uniqueness once there are none")
+    args = parser.parse_args(argv)
+
+    from config import get_db_connection  # Import here so the module itself stays free of config
+    with get_db_connection() as conn:
+        migrate(conn)
+        if args.command == "unique-numbers":
+            for name in UNIQUE_NUMBERS:
+                for row in duplicate_numbers(conn, name):
+                    print(f"{name}: {' / '.join(str(value) for value in row[:-1])} used {row[-1]} times")
+            conn.execute("BEGIN IMMEDIATE")
+            skipped = create_unique_number_indexes(conn)
+            conn.commit()
+            if skipped:
+                print("Correct the duplicates above, then run this again.")
+                return 1
+            print("Receipt and True Copy numbers are unique.")
+        elif args.command == "rebuild-summary":
+            rebuild_pending_summary(conn)
+            print("Pending summary rebuilt.")
+        elif args.command == "verify-summary":
+            mismatches = verify_pending_summary(conn)
+            for amount, expected_count, expected_total, actual_count, actual_total in mismatches:
+                print(f"Amount {format_rupees(amount)}: expected {expected_count} / {format_rupees(expected_total)}, "
+                      f"found {actual_count} / {format_rupees(actual_total)}")
+            if not mismatches:
+                print("Pending summary is in sync.")
+            elif args.repair:
+                rebuild_pending_summary(conn)
+                print("Pending summary rebuilt.")
+            else:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# --- money.py ---
+
+"""Rupee amounts as whole paise.
+
+Amounts typed into the screens are parsed with Decimal and kept as integer paise, so
+adding up thousands of advances and receipts gives the exact total instead of drifting
+the way sums of floats do. The REAL rupee columns the other screens read are still
+written alongside, as paise / 100.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+PAISE_PER_RUPEE = 100
+_ONE_PAISA = Decimal("0.01")
+
+
+def to_paise(value):
+    """Parses a rupee amount ("50", "1,250.5", "₹12.75", 12.75, Decimal) into whole paise.
+
+    Fractions of a paisa are rounded half up. Raises ValueError for anything that is not a
+    finite number.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid amount: {value!r}")
+    if isinstance(value, int):
+        return value * PAISE_PER_RUPEE
+    # str() of a float is its shortest round-tripping form, so 0.1 + 0.2 reads as 0.30000000000000004
+    text = str(value).strip().lstrip("₹").replace(",", "")
+    try:
+        rupees = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}") from None
+    if not rupees.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        paise = rupees.quantize(_ONE_PAISA, rounding=ROUND_HALF_UP)
+    except InvalidOperation:  # More digits than the Decimal context holds, e.g. "1e30"
+        raise ValueError(f"Invalid amount: {value!r}") from None
+    return int(paise * PAISE_PER_RUPEE)
+
+
+def to_rupees(paise):
+    """Returns whole paise as an exact Decimal rupee amount."""
+    return Decimal(paise) / PAISE_PER_RUPEE
+
+
+def paise_to_float(paise):
+    """Returns whole paise as the float rupee amount stored in the REAL columns."""
+    return paise / PAISE_PER_RUPEE
+
+
+def format_rupees(paise):
+    """Formats whole paise as rupees with two decimals, e.g. 125050 -> "1250.50"."""
+    sign = "-" if paise < 0 else ""
+    rupees, remainder = divmod(abs(paise), PAISE_PER_RUPEE)
+    return f"{sign}{rupees}.{remainder:02d}"
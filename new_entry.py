@@ -1,541 +1,1112 @@
-# --- new_entry.py ---
-
-import tkinter as tk
-from tkinter import ttk, messagebox
-from tkcalendar import DateEntry
-from config import get_db_connection, style_config
-from datetime import datetime
-import sqlite3
-
-class DataEntryManagement(tk.Toplevel):
-    """A standalone window for managing True Copy Application entries."""
-
-    def __init__(self, parent):
-        super().__init__(parent)
-        self.title("True Copy Application Management")
-        self.geometry("1200x800")  # Initial geometry
-        self.selected_entry_id = None  # Track the selected entry ID for editing
-        self.last_receipt_number = None
-        self.parent = parent  # Store parent for go_back
-
-        # Configure style
-        self.style = style_config()
-        self.configure_custom_styles()
-
-        self.create_widgets()
-        self.load_entries()
-        self.load_last_receipt_number()  # Load the last receipt number on startup
-
-        # Set True Copy and Receipt number for auto
-        self.new_true_copy_number()
-        self.update_receipt_number()
-
-        # Setup keyboard shortcuts
-        self.bind('<Control-n>', self.new_entry)
-        self.bind('<Control-s>', self.save_and_new)  # Save and new
-        self.bind('<Control-r>', self.load_entries)
-        self.bind('<Control-q>', self.destroy)
-        self.bind('<Escape>', self.go_back)  # Go Back
-        self.bind('<Return>', self.handle_enter_key)
-
-    def configure_custom_styles(self):
-        """Configure custom styles for widgets."""
-        # No custom styles beyond what's in config.py for now.  You can add if needed.
-        pass
-
-    def create_widgets(self):
-        """Creates the UI elements for the management window."""
-        # Reduced padding below main_frame
-        main_frame = ttk.Frame(self, style='Main.TFrame')
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)  # REDUCE THE PADY=10
-
-        # Pending Entries List (Treeview)
-        self.pending_entry_tree = ttk.Treeview(main_frame,
-                                               columns=("ID", "App Date", "Copy Type", "Category", "True Copy #",
-                                                        "Advance", "Receipt #"),
-                                               show="headings")
-        self.pending_entry_tree.heading("ID", text="ID", anchor="center")
-        self.pending_entry_tree.heading("App Date", text="App Date", anchor="center")
-        self.pending_entry_tree.heading("Copy Type", text="Copy Type", anchor="center")  # Added Copy Type
-        self.pending_entry_tree.heading("Category", text="Category", anchor="center")
-        self.pending_entry_tree.heading("True Copy #", text="True Copy #", anchor="center")
-        self.pending_entry_tree.heading("Advance", text="Advance", anchor="center")
-        self.pending_entry_tree.heading("Receipt #", text="Receipt #", anchor="center")
-
-        # Set column widths to automatically adjust
-        for col in ("ID", "App Date", "Copy Type", "Category", "True Copy #", "Advance", "Receipt #"):
-            self.pending_entry_tree.column(col, anchor="center", stretch=True)
-
-        self.pending_entry_tree.pack(fill=tk.BOTH, expand=True, pady=10)  # Use grid for resizing
-        self.pending_entry_tree.bind("<ButtonRelease-1>", self.on_pending_entry_select)  # Select entry
-
-        # Add Scrollbar
-        self.add_scrollbar(main_frame, self.pending_entry_tree)
-
-        # Details and Summary Frame
-        details_summary_frame = ttk.Frame(main_frame)
-        details_summary_frame.pack(fill=tk.X, padx=10, pady=5)
-
-        # Entry Details Frame (Left Side)
-        details_frame = ttk.LabelFrame(details_summary_frame, text="Entry Details", padding=10)
-        details_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=5)
-
-        ttk.Label(details_frame, text="App Date:", style='Main.TLabel').grid(row=0, column=0, sticky="w", padx=5,
-                                                                              pady=2)
-        self.app_date_entry = DateEntry(details_frame, date_pattern="yyyy-mm-dd")
-        self.app_date_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=2)
-        self.app_date_entry.bind("<FocusOut>", self.new_true_copy_number) #UPDATE copy NUMBER
-
-        ttk.Label(details_frame, text="Copy Type:", style='Main.TLabel').grid(row=1, column=0, sticky="w", padx=5,
-                                                                               pady=2)
-        self.copy_type_cb = ttk.Combobox(details_frame, values=["Certified Copy", "Simple Copy"], width=20,
-                                         style='TCombobox')
-        self.copy_type_cb.grid(row=1, column=1, sticky="ew", padx=5, pady=2)
-        self.copy_type_cb.bind("<<ComboboxSelected>>", self.on_copy_type_select)
-        self.copy_type_cb.set("Certified Copy")  # Default to Certified Copy
-
-        ttk.Label(details_frame, text="Category:", style='Main.TLabel').grid(row=2, column=0, sticky="w", padx=5,
-                                                                              pady=2)
-        self.category_cb = ttk.Combobox(details_frame, values=["Urgent", "Ordinary"], width=20, style='TCombobox')
-        self.category_cb.grid(row=2, column=1, sticky="ew", padx=5, pady=2)
-        self.category_cb.bind("<<ComboboxSelected>>", self.new_true_copy_number) #Update true copy number
-
-        ttk.Label(details_frame, text="True Copy #:", style='Main.TLabel').grid(row=3, column=0, sticky="w", padx=5,
-                                                                                 pady=2)
-        self.true_copy_number_entry = ttk.Entry(details_frame, width=20, style='Main.TEntry')
-        self.true_copy_number_entry.grid(row=3, column=1, sticky="ew", padx=5, pady=2)
-
-        ttk.Label(details_frame, text="Advance:", style='Main.TLabel').grid(row=4, column=0, sticky="w", padx=5,
-                                                                             pady=2)
-        self.advance_entry = ttk.Entry(details_frame, width=20, style='Main.TEntry')
-        self.advance_entry.grid(row=4, column=1, sticky="ew", padx=5, pady=2)
-
-        ttk.Label(details_frame, text="Receipt #:", style='Main.TLabel').grid(row=5, column=0, sticky="w", padx=5,
-                                                                               pady=2)
-        self.receipt_entry = ttk.Entry(details_frame, width=20, style='Main.TEntry')
-        self.receipt_entry.grid(row=5, column=1, sticky="ew", padx=5, pady=2)
-
-        ttk.Label(details_frame, text="Receipt Category:", style='Main.TLabel').grid(row=6, column=0, sticky="w",
-                                                                                       padx=5, pady=2)
-        self.receipt_category_cb = ttk.Combobox(details_frame, values=["advance", "recovery"], width=20,
-                                                 style='TCombobox')
-        self.receipt_category_cb.grid(row=6, column=1, sticky="ew", padx=5, pady=2)
-        self.receipt_category_cb.set("advance")  # Default to advance
-
-        # Summary Table Frame (Right Side)
-        self.summary_frame = ttk.LabelFrame(details_summary_frame, text="Pending Applications Summary", padding=10)
-        self.summary_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=5)
-
-        # Create Treeview for Summary
-        self.summary_tree = ttk.Treeview(self.summary_frame,
-                                         columns=("Amount", "Application Count", "Total Rupees"),
-                                         show="headings")
-
-        self.summary_tree.heading("Amount", text="Amount (Rs.)", anchor="center")
-        self.summary_tree.heading("Application Count", text="Application Count", anchor="center")
-        self.summary_tree.heading("Total Rupees", text="Total Rupees", anchor="center")
-
-        self.summary_tree.column("Amount", anchor="center", width=150)
-        self.summary_tree.column("Application Count", anchor="center", width=150)
-        self.summary_tree.column("Total Rupees", anchor="center", width=150)
-
-        self.summary_tree.pack(pady=5, fill=tk.BOTH, expand=True)
-
-        self.update_summary_table()
-
-        # Buttons Frame (Bottom)
-        button_frame = ttk.Frame(main_frame)
-        button_frame.pack(pady=5)
-
-        # Button Style and Layout
-        btn_params = {'side': tk.LEFT, 'padx': 5}
-        ttk.Button(button_frame, text="New Entry (Ctrl+N)", command=self.new_entry, style='Action.TButton').pack(
-            **btn_params)
-        ttk.Button(button_frame, text="Save and New (Ctrl+S)", command=self.save_and_new, style='Action.TButton').pack(
-            **btn_params)
-        ttk.Button(button_frame, text="Go to Dispose Entry", command=self.open_dispose_entry, style='Action.TButton').pack(
-            **btn_params)
-        ttk.Button(button_frame, text="Refresh (Ctrl+R)", command=self.load_entries,
-                   style='Secondary.TButton').pack(**btn_params)
-        ttk.Button(button_frame, text="Go Back (Esc)", command=self.go_back, style='Secondary.TButton').pack(
-            **btn_params)
-        ttk.Button(button_frame, text="Exit (Ctrl+Q)", command=self.destroy, style='Secondary.TButton').pack(
-            **btn_params)
-
-        self.on_copy_type_select()  # Set initial state of category combobox
-
-    def generate_true_copy_number(self):
-        """Generates a True Copy Number with prefix and based on the last number + 1 or starts from 001 for the current year."""
-        year = datetime.now().year
-        copy_type = self.copy_type_cb.get()
-        category = self.category_cb.get() if copy_type == "Certified Copy" else None
-
-        if copy_type == "Certified Copy":
-            prefix = "CC"
-        else:
-            prefix = "SC"
-
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-
-                sql_query = """
-                    SELECT true_copy_number
-                    FROM true_copy_applications
-                    WHERE strftime('%Y', application_date) = ?
-                    AND copy_type = ?
-                """
-                params = [str(year), copy_type]
-
-                if copy_type == "Certified Copy":
-                    sql_query += " AND application_category = ?"
-                    params.append(category)
-                else:
-                     sql_query += " AND application_category IS NULL"
-
-                sql_query += " ORDER BY id DESC LIMIT 1"
-                cursor.execute(sql_query, params)
-
-                result = cursor.fetchone()
-
-                if result:
-                    last_number = result['true_copy_number'].split('/')[1]  # Extract number part (after prefix)
-                    next_number = int(last_number) + 1
-                    next_number_str = str(next_number).zfill(3)  # Pad with zeros
-                else:
-                    next_number_str = "001"  # Start from 001 if no entries this year
-
-                # Auto-generate the number
-                auto_true_copy_number = f"{prefix}/{next_number_str}/{year}"
-                return auto_true_copy_number
-
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Error generating True Copy #: {str(e)}")
-            return None
-
-    def new_true_copy_number(self, event=None):
-        """Handles the creation of a new True Copy number and inserts it into the entry."""
-        auto_true_copy_number = self.generate_true_copy_number()  # Generate the new True Copy number
-        if auto_true_copy_number:
-            self.true_copy_number_entry.delete(0, tk.END)
-            self.true_copy_number_entry.insert(0, auto_true_copy_number)
-
-
-    def update_summary_table(self):
-        """Updates the summary table with the count of pending applications by amount."""
-        for item in self.summary_tree.get_children():
-            self.summary_tree.delete(item)
-
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                sql_query = """
-                    SELECT
-                        advance_amount,
-                        COUNT(*) AS application_count,
-                        SUM(advance_amount) AS total_rupees
-                    FROM
-                        true_copy_applications
-                    WHERE
-                        status = 'Pending'
-                    GROUP BY
-                        advance_amount
-                    ORDER BY
-                        advance_amount DESC;
-                """
-                cursor.execute(sql_query)
-                summary_data = cursor.fetchall()
-
-                total_applications = 0
-                total_rupees = 0
-
-                for row in summary_data:
-                    self.summary_tree.insert("", "end", values=(
-                        row['advance_amount'],
-                        row['application_count'],
-                        row['total_rupees']
-                    ))
-                    total_applications += row['application_count']
-                    total_rupees += row['total_rupees']
-
-                # Insert Total Row
-                self.summary_tree.insert("", "end", values=("Total", total_applications, total_rupees))
-
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Error updating summary table: {str(e)}")
-
-    def on_copy_type_select(self, event=None):
-        """Handles the change of Copy Type selection, enabling/disabling category."""
-        copy_type = self.copy_type_cb.get()
-        if copy_type == "Certified Copy":
-            self.category_cb.config(state='normal')  # Enable Category
-            self.category_cb.set("Urgent")  # Set default when enabling
-        else:
-            self.category_cb.set("")
-            self.category_cb.config(state='disabled')  # Disable Category
-        self.new_true_copy_number()  # Generate new true copy number on copy type change
-
-    def handle_enter_key(self, event):
-        """Handle Enter key press: Modify entry or trigger focused button."""
-        focused_widget = self.focus_get()  # Get the currently focused widget
-
-        if focused_widget in [
-            self.app_date_entry, self.copy_type_cb, self.category_cb,
-            self.advance_entry, self.receipt_entry, self.receipt_category_cb
-        ]:
-            # If focus is on any entry field, save/modify the entry
-            #self.save_and_new()
-            self.save_entry(new_entry=True) 
-        elif focused_widget == self.pending_entry_tree:
-            # If focus is on the Treeview, do nothing
-            pass
-        elif isinstance(focused_widget, ttk.Button):
-            # If focus is on a button, trigger its command
-            focused_widget.invoke()
-
-    def add_scrollbar(self, parent, tree):
-        """Adds a vertical scrollbar to the treeview widget."""
-        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        tree.configure(yscrollcommand=scrollbar.set)
-
-    def load_entries(self, event=None):
-        """Loads only Pending True Copy Application entries from the database into the Treeview."""
-        for item in self.pending_entry_tree.get_children():
-            self.pending_entry_tree.delete(item)
-
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                sql_query = """SELECT id, application_date, copy_type, application_category, true_copy_number,
-                                       advance_amount, receipt_number
-                                FROM true_copy_applications
-                                WHERE status = 'Pending'
-                                ORDER BY application_date DESC"""
-                cursor.execute(sql_query)
-                entries = cursor.fetchall()
-                for entry in entries:
-                    # Convert the entry tuple to a list for easier manipulation
-                    entry_list = list(entry)
-                    # Format the advance amount to display as a float with 2 decimal places
-                    entry_list[5] = f"₹{entry_list[5]:.2f}"
-                    self.pending_entry_tree.insert("", "end", values=entry_list)
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Error loading entries: {str(e)}")
-
-        self.update_summary_table()  # Update summary table when loading entries.
-
-    def on_pending_entry_select(self, event=None):
-        """Populates entry details fields when an entry is selected in the Treeview."""
-        selected_item = self.pending_entry_tree.selection()
-        if not selected_item:
-            # Clear the entry fields if no selection
-            self.clear_entry_fields()
-            return
-
-        entry_id = self.pending_entry_tree.item(selected_item, "values")[0]
-        self.selected_entry_id = entry_id
-
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                sql_query = """SELECT application_date, copy_type, application_category, true_copy_number,
-                                      advance_amount, receipt_number
-                               FROM true_copy_applications
-                               WHERE id = ?"""
-                cursor.execute(sql_query, (entry_id,))
-                entry = cursor.fetchone()
-
-                if entry:
-                    app_date, copy_type, category, true_copy_number, advance, receipt = entry
-                    self.app_date_entry.set_date(datetime.strptime(app_date, "%Y-%m-%d"))
-                    self.copy_type_cb.set(copy_type)
-                    self.on_copy_type_select()
-
-                    if copy_type == "Certified Copy":
-                        self.category_cb.set(category)
-                    else:
-                        self.category_cb.set("")
-
-                    self.true_copy_number_entry.delete(0, tk.END)
-                    self.true_copy_number_entry.insert(0, true_copy_number)
-                    self.advance_entry.delete(0, tk.END)
-                    self.advance_entry.insert(0, str(advance))
-                    self.receipt_entry.delete(0, tk.END)
-                    self.receipt_entry.insert(0, receipt)
-
-                    # Load Receipt Category based on receipt number and amount
-                    sql_query = """SELECT payment_type
-                                FROM receipt_register
-                                WHERE receipt_number = ?
-                                AND amount = ?"""
-
-                    cursor.execute(sql_query, (receipt, advance))
-                    receipt_data = cursor.fetchone()
-                    if receipt_data:
-                        self.receipt_category_cb.set(receipt_data['payment_type'])
-                    else:
-                        self.receipt_category_cb.set("advance")  # Default set to advance
-
-                else:
-                    self.clear_entry_fields()  # Clear if no entry found
-
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Error fetching entry details: {str(e)}")
-
-    def clear_entry_fields(self):
-        """Clears all entry detail fields."""
-        self.app_date_entry.set_date(datetime.now())
-        self.copy_type_cb.set("Certified Copy")
-        self.on_copy_type_select()  # update based on copy type
-        self.true_copy_number_entry.delete(0, tk.END)
-        self.advance_entry.delete(0, tk.END)
-        #UPDATE recipt number
-        self.update_receipt_number() # generate new recipt number
-        self.receipt_entry.delete(0, tk.END)
-
-        self.receipt_category_cb.set("advance")  # Reset the receipt category
-
-        # Initialize receipt number when clearing
-        self.load_last_receipt_number()
-        next_receipt_number = self.get_next_receipt_number()
-        self.receipt_entry.delete(0, tk.END)
-        self.receipt_entry.insert(0, next_receipt_number)
-        self.selected_entry_id = None
-        self.new_true_copy_number()
-
-
-    def new_entry(self, event=None):
-        """Clears the entry details fields for creating a new entry."""
-        self.clear_entry_fields()
-
-
-    def save_and_new(self, event=None):
-        """Saves the entry to the database and prepares for a new entry."""
-        self.save_entry(new_entry=True)
-
-    def save_entry(self, new_entry=False):
-        """Saves the entry to the database."""
-        app_date = self.app_date_entry.get_date().strftime("%Y-%m-%d")
-        copy_type = self.copy_type_cb.get()
-        category = self.category_cb.get() if copy_type == "Certified Copy" else None
-        true_copy_number = self.true_copy_number_entry.get()  # Get from the entry (even though enabled)
-        received_date = app_date  # Use the app_date as the received_date, since the UI element is removed
-        advance = self.advance_entry.get()
-        receipt = self.receipt_entry.get()
-        receipt_category = self.receipt_category_cb.get()
-
-        if not all([app_date, copy_type, true_copy_number, advance, receipt, receipt_category]):
-            messagebox.showerror("Error", "All fields are required!")
-            return
-
-        if copy_type == "Certified Copy" and not category:
-            messagebox.showerror("Error", "Category is required for Certified Copies!")
-            return
-
-        try:
-            advance = float(advance)  # Ensure advance is a valid number
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-
-                # Check if a receipt with the same number already exists
-                cursor.execute("SELECT COUNT(*) FROM receipt_register WHERE receipt_number = ?", (receipt,))
-                receipt_count = cursor.fetchone()[0]
-
-                if receipt_count > 0:
-                    messagebox.showerror("Error", "Receipt number already exists!")
-                    return
-
-                # Create a new entry with default 'Pending' status
-                sql_query = """INSERT INTO true_copy_applications
-                               (application_date, copy_type, application_category, true_copy_number,
-                                received_date, advance_amount, receipt_number, status)
-                               VALUES (?, ?, ?, ?, ?, ?, ?, 'Pending')"""
-                cursor.execute(sql_query,
-                               (app_date, copy_type, category, true_copy_number, received_date, advance, receipt))
-                conn.commit()
-
-                # Add entry to receipt register
-                receipt_date = datetime.now().strftime("%Y-%m-%d")
-                sql_query = """INSERT INTO receipt_register (receipt_date, receipt_number, payment_type, amount, true_copy_number)
-                               VALUES (?, ?, ?, ?, ?)"""
-                cursor.execute(sql_query, (receipt_date, receipt, receipt_category, advance, true_copy_number))
-                conn.commit()
-
-                messagebox.showinfo("Success", "Entry created successfully!")
-
-                self.load_entries()  # Refresh the entry list
-
-                if new_entry:
-                    self.new_entry()  # Prepare for a new entry if save_and_new
-
-
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to save entry: {str(e)}")
-        except ValueError:
-            messagebox.showerror("Input Error", f"Invalid input value. Please enter a valid number.")
-        finally:
-             self.update_receipt_number() # update next receipt number
-
-
-
-    def load_last_receipt_number(self):
-        """Loads the last used receipt number from the database."""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT receipt_number FROM receipt_register
-                    WHERE receipt_number IS NOT NULL
-                    ORDER BY receipt_number DESC
-                    LIMIT 1
-                """)
-                result = cursor.fetchone()
-                if result and (result[0] is not None):
-                    # Extract only the numeric part of the receipt number and convert to integer
-                    receipt_number_str = ''.join(filter(str.isdigit, result[0]))
-                    self.last_receipt_number = int(receipt_number_str)
-                else:
-                    self.last_receipt_number = 0  # Start from 1 if no previous entries
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Error loading last receipt number: {str(e)}")
-            self.last_receipt_number = 0
-
-    def get_next_receipt_number(self):
-        """Generates the next receipt number based on the last number."""
-         # Load the last receipt number to ensure that we are using the most recent one
-        self.load_last_receipt_number()
-        if self.last_receipt_number is not None:
-            next_number = self.last_receipt_number + 1
-            next_number_str = str(next_number)  # .zfill(3)  # Pad with zeros, if needed
-        else:
-            next_number_str = "1"  # Start from 1 if no previous entries
-
-        return next_number_str
-
-    def update_receipt_number(self):
-         # generate the next receipt number, not only setting it
-        next_receipt_number = self.get_next_receipt_number()
-        self.receipt_entry.delete(0, tk.END)
-        self.receipt_entry.insert(0, next_receipt_number)
-
-    def go_back(self, event=None):
-        """Closes the current window."""
-        if self.parent:
-            self.parent.focus_set()
-        self.destroy()
-
-    def open_dispose_entry(self, event=None):
-        """Open the Dispose Entry window."""
-        from dispose_entry import DisposeEntryForm  # Import here to avoid circular imports
-        DisposeEntryForm(self)
-
-    def destroy(self, event=None):
-        """Closes the current window."""
-        super().destroy()
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    root.withdraw()
-    app = DataEntryManagement(root)
+# --- new_entry.py ---
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from db_worker import DbWorker
+from entry_metrics import EntryMetrics, show_stats_panel
+from entry_queue import EntryQueue
+from entry_store import CATEGORIES, PENDING_PAGE_SIZE, EntryConflictError, EntryValidationError, validate_entry
+from money import format_rupees
+from true_copy_service import TrueCopyService
+from datetime import datetime
+from time import perf_counter
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import partial
+
+PENDING_MAX_ROWS = 1000  # Most pending rows kept in the Treeview at any time
+TRUE_COPY_DEBOUNCE_MS = 50  # Form events this close together regenerate the True Copy # once
+ENTRY_DETAIL_CACHE_SIZE = 5000  # Selected-row details kept in memory, least recently used dropped first
+DATA_VERSION_POLL_MS = 2000  # How often to look for writes made by other clerks, which are then shown
+STARTUP_FALLBACK_MS = 500  # Start loading anyway if the window is never drawn (e.g. opened minimized)
+RAPID_FLUSH_MS = 250  # Rapid entry: how long queued entries wait for more to share their transaction
+RAPID_BATCH_SIZE = 100  # Rapid entry: most entries saved per transaction
+RAPID_RETRY_MS = 2000  # Rapid entry: pause before saving again after a save failed outright
+PENDING_HEADINGS = ("ID", "App Date", "Copy Type", "Category", "True Copy #", "Advance", "Receipt #")
+
+class DataEntryManagement(tk.Toplevel):
+    """A standalone window for managing True Copy Application entries."""
+
+    def __init__(self, parent, db_path=None, fast_start=True):
+        started = perf_counter()
+        super().__init__(parent)
+        self.title("True Copy Application Management")
+        self.geometry("1200x800")  # Initial geometry
+        self.selected_entry_id = None  # Track the selected entry ID for editing
+        self.selected_row_version = None  # Its row_version when the form was filled; saving checks it
+        self.last_receipt_number = None
+        self.auto_true_copy_number = None  # Numbers last filled in automatically; saving them
+        self.auto_receipt_number = None  # allocates fresh ones in case another clerk took them
+        self.parent = parent  # Store parent for go_back
+        # Every database operation goes through the service, on one tuned connection;
+        # db_path overrides config's database
+        self.service = TrueCopyService(path=db_path)
+        self.db = self.service.db
+        self.metrics = EntryMetrics()  # Off unless ENTRY_METRICS=1; F12 shows what it recorded
+        self.worker = DbWorker(self, self.db, on_busy=self.show_loading, metrics=self.metrics,
+                               pass_connection=False)  # Runs the service's calls off the Tk thread
+        self._saving = False  # A save is in flight; further Ctrl+S presses are ignored
+        self._true_copy_after = None  # Scheduled True Copy # regeneration
+        # Next True Copy # per (copy type, category, year); cleared by our own saves and by
+        # writes from other connections, which show up as a change in PRAGMA data_version
+        self._true_copy_cache = {}
+        self._true_copy_cache_generation = 0
+        self._data_version = None
+        self._watch_after = None
+
+        # Rapid entry: Enter validates the form and queues it; a flusher saves the queue in
+        # batches on the worker thread while the clerk types the next one
+        self.rapid_entry = tk.BooleanVar(value=False)
+        self.entry_queue = EntryQueue()
+        self._flush_after = None
+        self._flushing = False  # A batch of queued entries is being saved
+
+        # Keyset window over the pending list: ascending (application_date, id) keys of the
+        # rows currently in the Treeview. The newest row is last and is shown at the top.
+        self._pending_keys = []
+        self._pending_at_top = True  # No newer pending rows above the window
+        self._pending_at_bottom = True  # No older pending rows below the window
+        self._pending_paging = False
+        self._pending_watermark = 0  # Last change-log seq reflected in the pending list
+
+        # Search and header sorting run against an in-memory index of every pending row,
+        # loaded on the first search and kept current by refresh_entries.
+        self.pending_index = None
+        self._pending_sort = None  # (column index, descending) picked by a header click
+        self._pending_filtered = False  # The Treeview shows search results, not the keyset window
+        # Form contents per application id, filled from the rows the list loads, so selecting
+        # a row (click or arrow keys) normally needs no query
+        self._entry_details = OrderedDict()
+
+        # Startup timing, also shown in the stats panel: construction to first drawn frame
+        self._started_at = started
+        self.first_paint_seconds = None
+        self.loading_started = False  # The pending list, summary and numbers have been requested
+
+        # Configure style
+        from config import style_config  # Import here so importing this module does not load config
+        self.style = style_config()
+        self.configure_custom_styles()
+
+        self.prepare_database()
+        self.create_widgets()
+
+        # Fast start: draw the form first, then fill the pending list, summary and numbers
+        self.bind('<Expose>', self.on_first_expose)
+        if fast_start:
+            self._startup_after = self.after(STARTUP_FALLBACK_MS, self.start_loading)
+        else:
+            self._startup_after = None
+            self.start_loading()
+
+        # Setup keyboard shortcuts
+        self.bind('<Control-n>', self.traced(self.new_entry, "Ctrl+N"))
+        self.bind('<Control-s>', self.traced(self.save_and_new, "Ctrl+S"))  # Save and new
+        self.bind('<Control-r>', self.traced(self.refresh_entries, "Ctrl+R"))
+        self.bind('<Control-q>', self.destroy)
+        self.bind('<Escape>', self.go_back)  # Go Back
+        self.bind('<Return>', self.traced(self.handle_enter_key, "Return"))
+        self.bind('<F7>', self.open_collections_report)
+        self.bind('<F8>', self.toggle_rapid_entry)
+        self.bind('<F9>', self.traced(self.recall_failed_entry, "F9"))  # Rapid entry: fix a rejected entry
+        self.bind('<F12>', self.show_stats)  # Timing statistics
+
+    def on_first_expose(self, event=None):
+        """Records the first drawn frame and starts loading once Tk has finished drawing it."""
+        self.unbind('<Expose>')
+        if self.first_paint_seconds is None:
+            self.first_paint_seconds = perf_counter() - self._started_at
+            self.metrics.record("ui", "startup_first_paint", self.first_paint_seconds)
+        if not self.loading_started:
+            self.after_cancel(self._startup_after)
+            self._startup_after = self.after_idle(self.start_loading)
+
+    def start_loading(self):
+        """Requests the pending list, summary, True Copy # and receipt # the form starts with."""
+        if self.loading_started:
+            return
+        self.loading_started = True
+        if self._startup_after is not None:
+            self.after_cancel(self._startup_after)
+            self._startup_after = None
+        self.load_entries()
+
+        # Set True Copy and Receipt number for auto
+        self.new_true_copy_number()
+        self.update_receipt_number()
+        self.watch_database()
+
+    def prepare_database(self):
+        """Applies the schema additions this window relies on and trims the change log.
+
+        Queued first, so every later request runs against the migrated schema.
+        """
+        self.worker.submit(self.service.prepare, errback=self.database_error("Error preparing database"))
+
+    def traced(self, handler, trigger):
+        """Wraps an event handler so the work it sets off is labelled `trigger` in the metrics."""
+        def run(*args):
+            self.metrics.set_trigger(trigger)
+            return handler(*args)
+        return run
+
+    def show_stats(self, event=None):
+        """Opens the timing statistics panel."""
+        show_stats_panel(self, self.metrics)
+
+    def database_error(self, message):
+        """Returns an errback that reports a failed database request under `message`."""
+        return lambda e: messagebox.showerror("Database Error", f"{message}: {str(e)}")
+
+    def show_loading(self, busy):
+        """Runs the loading indicator while database requests are in flight."""
+        if busy:
+            self.loading_bar.start(15)
+        else:
+            self.loading_bar.stop()
+
+    def configure_custom_styles(self):
+        """Configure custom styles for widgets."""
+        # No custom styles beyond what's in config.py for now.  You can add if needed.
+        pass
+
+    def create_widgets(self):
+        """Creates the UI elements for the management window."""
+        # Reduced padding below main_frame
+        main_frame = ttk.Frame(self, style='Main.TFrame')
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)  # REDUCE THE PADY=10
+
+        # Search bar: filters every pending entry in memory as you type
+        search_frame = ttk.Frame(main_frame)
+        search_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(search_frame, text="Search:", style='Main.TLabel').pack(side=tk.LEFT, padx=5)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40, style='Main.TEntry')
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<KeyRelease>", self.traced(self.filter_pending_entries, "Search typed"))
+        ttk.Button(search_frame, text="Clear", command=self.traced(self.clear_pending_filter, "Clear search"),
+                   style='Secondary.TButton').pack(side=tk.LEFT, padx=5)
+        self.match_label = ttk.Label(search_frame, text="", style='Main.TLabel')
+        self.match_label.pack(side=tk.LEFT, padx=5)
+
+        # Pending Entries List (Treeview)
+        self.pending_entry_tree = ttk.Treeview(main_frame,
+                                               columns=("ID", "App Date", "Copy Type", "Category", "True Copy #",
+                                                        "Advance", "Receipt #"),
+                                               show="headings")
+        self.pending_entry_tree.heading("ID", text="ID", anchor="center")
+        self.pending_entry_tree.heading("App Date", text="App Date", anchor="center")
+        self.pending_entry_tree.heading("Copy Type", text="Copy Type", anchor="center")  # Added Copy Type
+        self.pending_entry_tree.heading("Category", text="Category", anchor="center")
+        self.pending_entry_tree.heading("True Copy #", text="True Copy #", anchor="center")
+        self.pending_entry_tree.heading("Advance", text="Advance", anchor="center")
+        self.pending_entry_tree.heading("Receipt #", text="Receipt #", anchor="center")
+
+        # Set column widths to automatically adjust
+        for col in ("ID", "App Date", "Copy Type", "Category", "True Copy #", "Advance", "Receipt #"):
+            self.pending_entry_tree.column(col, anchor="center", stretch=True)
+
+        # Clicking a header sorts every pending entry by that column
+        for index, col in enumerate(PENDING_HEADINGS):
+            sort = lambda index=index: self.sort_pending_entries(index)
+            self.pending_entry_tree.heading(col, command=self.traced(sort, f"Sort by {col}"))
+
+        self.pending_entry_tree.pack(fill=tk.BOTH, expand=True, pady=10)  # Use grid for resizing
+        self.pending_entry_tree.bind("<<TreeviewSelect>>", self.traced(self.on_pending_entry_select,
+                                                                       "Select pending row"))  # Click or arrow keys
+
+        # Add Scrollbar (pages rows in and out as the list scrolls)
+        self.add_scrollbar(main_frame, self.pending_entry_tree, on_scroll=self.on_pending_tree_scroll)
+
+        # Details and Summary Frame
+        details_summary_frame = ttk.Frame(main_frame)
+        details_summary_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        # Entry Details Frame (Left Side)
+        details_frame = ttk.LabelFrame(details_summary_frame, text="Entry Details", padding=10)
+        details_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=5)
+
+        ttk.Label(details_frame, text="App Date:", style='Main.TLabel').grid(row=0, column=0, sticky="w", padx=5,
+                                                                              pady=2)
+        from tkcalendar import DateEntry  # Import here: only the window needs it, not importing the module
+        self.app_date_entry = DateEntry(details_frame, date_pattern="yyyy-mm-dd")
+        self.app_date_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=2)
+        self.app_date_entry.bind("<FocusOut>", self.traced(self.new_true_copy_number,
+                                                           "FocusOut App Date")) #UPDATE copy NUMBER
+
+        ttk.Label(details_frame, text="Copy Type:", style='Main.TLabel').grid(row=1, column=0, sticky="w", padx=5,
+                                                                               pady=2)
+        self.copy_type_cb = ttk.Combobox(details_frame, values=["Certified Copy", "Simple Copy"], width=20,
+                                         style='TCombobox')
+        self.copy_type_cb.grid(row=1, column=1, sticky="ew", padx=5, pady=2)
+        self.copy_type_cb.bind("<<ComboboxSelected>>", self.traced(self.on_copy_type_select, "Copy Type selected"))
+        self.copy_type_cb.set("Certified Copy")  # Default to Certified Copy
+
+        ttk.Label(details_frame, text="Category:", style='Main.TLabel').grid(row=2, column=0, sticky="w", padx=5,
+                                                                              pady=2)
+        self.category_cb = ttk.Combobox(details_frame, values=list(CATEGORIES), width=20, style='TCombobox')
+        self.category_cb.grid(row=2, column=1, sticky="ew", padx=5, pady=2)
+        self.category_cb.bind("<<ComboboxSelected>>", self.traced(self.new_true_copy_number,
+                                                                  "Category selected")) #Update true copy number
+
+        ttk.Label(details_frame, text="True Copy #:", style='Main.TLabel').grid(row=3, column=0, sticky="w", padx=5,
+                                                                                 pady=2)
+        self.true_copy_number_entry = ttk.Entry(details_frame, width=20, style='Main.TEntry')
+        self.true_copy_number_entry.grid(row=3, column=1, sticky="ew", padx=5, pady=2)
+
+        ttk.Label(details_frame, text="Advance:", style='Main.TLabel').grid(row=4, column=0, sticky="w", padx=5,
+                                                                             pady=2)
+        self.advance_entry = ttk.Entry(details_frame, width=20, style='Main.TEntry')
+        self.advance_entry.grid(row=4, column=1, sticky="ew", padx=5, pady=2)
+
+        ttk.Label(details_frame, text="Receipt #:", style='Main.TLabel').grid(row=5, column=0, sticky="w", padx=5,
+                                                                               pady=2)
+        self.receipt_entry = ttk.Entry(details_frame, width=20, style='Main.TEntry')
+        self.receipt_entry.grid(row=5, column=1, sticky="ew", padx=5, pady=2)
+
+        ttk.Label(details_frame, text="Receipt Category:", style='Main.TLabel').grid(row=6, column=0, sticky="w",
+                                                                                       padx=5, pady=2)
+        self.receipt_category_cb = ttk.Combobox(details_frame, values=["advance", "recovery"], width=20,
+                                                 style='TCombobox')
+        self.receipt_category_cb.grid(row=6, column=1, sticky="ew", padx=5, pady=2)
+        self.receipt_category_cb.set("advance")  # Default to advance
+
+        # Summary Table Frame (Right Side)
+        self.summary_frame = ttk.LabelFrame(details_summary_frame, text="Pending Applications Summary", padding=10)
+        self.summary_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=5)
+
+        # Create Treeview for Summary
+        self.summary_tree = ttk.Treeview(self.summary_frame,
+                                         columns=("Amount", "Application Count", "Total Rupees"),
+                                         show="headings")
+
+        self.summary_tree.heading("Amount", text="Amount (Rs.)", anchor="center")
+        self.summary_tree.heading("Application Count", text="Application Count", anchor="center")
+        self.summary_tree.heading("Total Rupees", text="Total Rupees", anchor="center")
+
+        self.summary_tree.column("Amount", anchor="center", width=150)
+        self.summary_tree.column("Application Count", anchor="center", width=150)
+        self.summary_tree.column("Total Rupees", anchor="center", width=150)
+
+        self.summary_tree.pack(pady=5, fill=tk.BOTH, expand=True)
+
+        # Buttons Frame (Bottom)
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=5)
+
+        # Button Style and Layout
+        btn_params = {'side': tk.LEFT, 'padx': 5}
+        ttk.Button(button_frame, text="New Entry (Ctrl+N)", command=self.traced(self.new_entry, "New Entry button"),
+                   style='Action.TButton').pack(**btn_params)
+        ttk.Button(button_frame, text="Save and New (Ctrl+S)",
+                   command=self.traced(self.save_and_new, "Save and New button"), style='Action.TButton').pack(
+            **btn_params)
+        ttk.Button(button_frame, text="Go to Dispose Entry", command=self.open_dispose_entry, style='Action.TButton').pack(
+            **btn_params)
+        ttk.Button(button_frame, text="Collections (F7)", command=self.open_collections_report,
+                   style='Secondary.TButton').pack(**btn_params)
+        ttk.Button(button_frame, text="Refresh (Ctrl+R)", command=self.traced(self.refresh_entries, "Refresh button"),
+                   style='Secondary.TButton').pack(**btn_params)
+        ttk.Button(button_frame, text="Go Back (Esc)", command=self.go_back, style='Secondary.TButton').pack(
+            **btn_params)
+        ttk.Button(button_frame, text="Exit (Ctrl+Q)", command=self.destroy, style='Secondary.TButton').pack(
+            **btn_params)
+
+        # Moves while a database request is in flight
+        self.loading_bar = ttk.Progressbar(button_frame, mode="indeterminate", length=80)
+        self.loading_bar.pack(**btn_params)
+
+        ttk.Checkbutton(button_frame, text="Rapid Entry (F8)", variable=self.rapid_entry,
+                        command=self.show_rapid_status).pack(**btn_params)
+        self.rapid_status = ttk.Label(button_frame, text="", style='Main.TLabel')
+        self.rapid_status.pack(**btn_params)
+
+        self.sync_category_state()  # Set initial state of category combobox; start_loading fills the number
+
+    def new_true_copy_number(self, event=None):
+        """Schedules a True Copy # regeneration; a burst of form events regenerates it once."""
+        if self._true_copy_after is not None:
+            self.after_cancel(self._true_copy_after)
+        self._true_copy_after = self.after(TRUE_COPY_DEBOUNCE_MS, self.regenerate_true_copy_number)
+
+    def cancel_true_copy_number(self):
+        """Drops a scheduled or running True Copy # regeneration."""
+        if self._true_copy_after is not None:
+            self.after_cancel(self._true_copy_after)
+            self._true_copy_after = None
+        self.worker.cancel("true_copy_number")
+
+    def regenerate_true_copy_number(self):
+        """Fills in the next True Copy number for the selected copy type and category.
+
+        Served from the number cache when it can be; otherwise looked up and cached. Numbers
+        the rapid-entry queue has handed out and not yet saved are skipped.
+        """
+        self._true_copy_after = None
+        copy_type = self.copy_type_cb.get()
+        category = self.category_cb.get() if copy_type == "Certified Copy" else None
+        cache_key = (copy_type, category, datetime.now().year)
+        if cache_key in self._true_copy_cache:
+            self.fill_true_copy_number(self.entry_queue.next_true_copy_number(cache_key,
+                                                                              self._true_copy_cache[cache_key]))
+            return
+
+        generation = self._true_copy_cache_generation
+
+        def found(number):
+            if generation == self._true_copy_cache_generation:  # Not invalidated while looking it up
+                self._true_copy_cache[cache_key] = number
+            self.fill_true_copy_number(self.entry_queue.next_true_copy_number(cache_key, number))
+
+        self.worker.submit(self.service.next_true_copy_number, *cache_key, key="true_copy_number", callback=found,
+                           errback=self.database_error("Error generating True Copy #"), interruptible=True)
+
+    def invalidate_number_cache(self):
+        """Forgets the cached True Copy numbers after a write changed the counters."""
+        self._true_copy_cache.clear()
+        self._true_copy_cache_generation += 1
+
+    def watch_database(self):
+        """Checks PRAGMA data_version every few seconds to notice other clerks' writes."""
+        self._watch_after = None
+        self.worker.submit(self.service.data_version, key="data_version", callback=self.data_version_checked,
+                           errback=lambda e: self.data_version_checked(self._data_version),
+                           interruptible=True, background="Data version poll")
+
+    def data_version_checked(self, version):
+        """Brings in other connections' writes when the data version moved and schedules the next check.
+
+        The pending list, search index and summary catch up through the change log, and the
+        numbers are looked up again if the form still shows automatic ones.
+        """
+        if self._data_version is not None and version != self._data_version:
+            self.invalidate_number_cache()
+            self.refresh_entries(background="Data version poll")
+            if self.auto_true_copy_number and self.true_copy_number_entry.get() == self.auto_true_copy_number:
+                self.new_true_copy_number()
+            if self.auto_receipt_number and self.receipt_entry.get() == self.auto_receipt_number:
+                self.update_receipt_number()
+        self._data_version = version
+        self._watch_after = self.after(DATA_VERSION_POLL_MS, self.watch_database)
+
+    def fill_true_copy_number(self, auto_true_copy_number):
+        """Inserts a freshly generated True Copy number into the entry."""
+        self.true_copy_number_entry.delete(0, tk.END)
+        self.true_copy_number_entry.insert(0, auto_true_copy_number)
+        self.auto_true_copy_number = auto_true_copy_number
+
+    def update_summary_table(self):
+        """Updates the summary table with the count of pending applications by amount.
+
+        Reads the trigger-maintained pending_summary table, which holds one row per amount.
+        """
+        self.worker.submit(self.service.pending_summary, key="summary", callback=self.show_summary,
+                           errback=self.database_error("Error updating summary table"), interruptible=True)
+
+    def show_summary(self, summary_data):
+        """Fills the summary table from pending_summary rows."""
+        with self.metrics.ui("show_summary") as timing:
+            old_items = self.summary_tree.get_children()
+            for item in old_items:
+                self.summary_tree.delete(item)
+
+            total_applications = 0
+            total_paise = 0  # Whole paise, so the total is exact
+
+            for row in summary_data:
+                self.summary_tree.insert("", "end", values=(
+                    format_rupees(row['advance_paise']),
+                    row['application_count'],
+                    format_rupees(row['total_paise'])
+                ))
+                total_applications += row['application_count']
+                total_paise += row['total_paise']
+
+            # Insert Total Row
+            self.summary_tree.insert("", "end", values=("Total", total_applications, format_rupees(total_paise)))
+            timing["items"] = len(old_items) + len(summary_data) + 1
+
+    def on_copy_type_select(self, event=None):
+        """Handles the change of Copy Type selection, enabling/disabling category."""
+        self.sync_category_state()
+        self.new_true_copy_number()  # Generate new true copy number on copy type change
+
+    def sync_category_state(self):
+        """Enables the category for Certified Copies and clears/disables it otherwise."""
+        copy_type = self.copy_type_cb.get()
+        if copy_type == "Certified Copy":
+            self.category_cb.config(state='normal')  # Enable Category
+            self.category_cb.set("Urgent")  # Set default when enabling
+        else:
+            self.category_cb.set("")
+            self.category_cb.config(state='disabled')  # Disable Category
+
+    def handle_enter_key(self, event):
+        """Handle Enter key press: Modify entry or trigger focused button."""
+        focused_widget = self.focus_get()  # Get the currently focused widget
+
+        if focused_widget in [
+            self.app_date_entry, self.copy_type_cb, self.category_cb,
+            self.advance_entry, self.receipt_entry, self.receipt_category_cb
+        ]:
+            # If focus is on any entry field, save/modify the entry
+            #self.save_and_new()
+            self.save_entry(new_entry=True) 
+        elif focused_widget == self.pending_entry_tree:
+            # If focus is on the Treeview, do nothing
+            pass
+        elif isinstance(focused_widget, ttk.Button):
+            # If focus is on a button, trigger its command
+            focused_widget.invoke()
+
+    def add_scrollbar(self, parent, tree, on_scroll=None):
+        """Adds a vertical scrollbar to the treeview widget, optionally reporting view changes."""
+        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        def yscroll(first, last):
+            scrollbar.set(first, last)
+            if on_scroll:
+                on_scroll(float(first), float(last))
+
+        tree.configure(yscrollcommand=yscroll)
+
+    def load_entries(self, event=None):
+        """Loads the newest page of Pending True Copy Application entries into the Treeview.
+
+        Only one keyset page is fetched here, so a refresh costs the same however large the
+        table grows; older rows are paged in by on_pending_tree_scroll.
+        """
+        # Pages and refreshes queued against the old window no longer apply
+        self.worker.cancel("pending_page")
+        self.worker.cancel("pending_refresh")
+        self._pending_paging = False
+        self.worker.submit(self.service.first_pending_page, key="pending_load", callback=self.show_first_pending_page,
+                           errback=self.database_error("Error loading entries"), interruptible=True)
+        if self.pending_index is not None:
+            # Queued after the page, so the index catches up to at least the page's watermark
+            self.worker.submit(self.service.pending_changes, self._pending_watermark, key="pending_index_sync",
+                               callback=self.sync_pending_index,
+                               errback=self.database_error("Error refreshing entries"))
+
+        self.update_summary_table()  # Update summary table when loading entries.
+
+    def show_first_pending_page(self, result):
+        """Replaces the pending list with the newest page of entries."""
+        self._pending_watermark, rows = result
+        if self._pending_filtered:
+            return  # Search results own the list; clearing the search loads the window again
+        old_items = self.pending_entry_tree.get_children()
+        with self.metrics.ui("clear_pending", items=len(old_items)):
+            self.pending_entry_tree.delete(*old_items)
+        self._pending_keys = []
+        self._pending_at_top = True
+        self._pending_at_bottom = False
+        self.show_older_entries(rows)
+
+    def refresh_entries(self, event=None, background=None):
+        """Applies only the pending-list changes made since the last sync, keyed by application id.
+
+        `background` labels a refresh nobody asked for (see DbWorker.submit).
+        """
+        self.worker.submit(self.service.pending_changes, self._pending_watermark, key="pending_refresh",
+                           callback=self.apply_pending_changes,
+                           errback=self.database_error("Error refreshing entries"), background=background)
+
+    def apply_pending_changes(self, result):
+        """Applies the rows returned by pending_changes to the pending list."""
+        watermark, changed_ids, rows = result
+        if changed_ids is None:  # Change log was pruned past our watermark
+            self.pending_index = None
+            if self._pending_filtered:
+                self.load_pending_index()
+            else:
+                self.load_entries()
+            return
+
+        self.sync_pending_index(result)
+        for entry_id in changed_ids:
+            self.cache_entry_detail(entry_id, rows.get(entry_id))
+        if self._pending_filtered:
+            if changed_ids:
+                self.filter_pending_entries()
+        else:
+            with self.metrics.ui("apply_pending_changes", items=len(changed_ids)):
+                for entry_id in changed_ids:
+                    self._apply_pending_change(entry_id, rows.get(entry_id))
+        self._pending_watermark = max(self._pending_watermark, watermark)
+
+        if changed_ids:
+            self.update_summary_table()
+
+    def load_pending_index(self):
+        """Loads every pending entry into the in-memory search index, then applies the search."""
+        self.worker.submit(self.service.pending_index, key="pending_index", callback=self.pending_index_loaded,
+                           errback=self.database_error("Error loading entries"), interruptible=True)
+
+    def pending_index_loaded(self, result):
+        """Keeps the freshly loaded search index and shows the current search against it."""
+        watermark, self.pending_index = result
+        if self.pending_filter_active():
+            # The list is rebuilt from the index, so it is as current as the index
+            self._pending_watermark = max(self._pending_watermark, watermark)
+        self.filter_pending_entries()
+
+    def sync_pending_index(self, result):
+        """Applies a pending_changes result to the search index, dropping it if the log was pruned."""
+        if self.pending_index is None:
+            return
+        _, changed_ids, rows = result
+        if changed_ids is None:
+            self.pending_index = None
+            return
+        for entry_id in changed_ids:  # Rows are current state, so applying a change twice is harmless
+            self.pending_index.apply(entry_id, rows.get(entry_id))
+
+    def pending_filter_active(self):
+        """Tells whether a search or a header sort is in effect."""
+        return bool(self.search_var.get().strip()) or self._pending_sort is not None
+
+    def filter_pending_entries(self, event=None):
+        """Shows the pending entries matching the search box, in the chosen sort order.
+
+        Answered from the in-memory index, so typing costs no database query. With no search
+        and no sort the list goes back to the keyset window.
+        """
+        if not self.pending_filter_active():
+            self.match_label.config(text="")
+            if self._pending_filtered:
+                self._pending_filtered = False
+                self.load_entries()
+            return
+        if self.pending_index is None:
+            self.load_pending_index()  # Filters again once loaded
+            return
+
+        column, descending = self._pending_sort or (1, True)  # Newest first by default
+        if not self._pending_filtered:
+            self._pending_filtered = True
+            self.worker.cancel("pending_page")
+            self._pending_paging = False
+            self._pending_keys = []
+        with self.metrics.ui("filter_pending_entries") as timing:
+            total, rows = self.pending_index.search(self.search_var.get(), column, descending,
+                                                    limit=PENDING_MAX_ROWS)
+            old_items = self.pending_entry_tree.get_children()
+            self.pending_entry_tree.delete(*old_items)
+            for row in rows:
+                self.pending_entry_tree.insert("", "end", iid=str(row[0]), values=self._pending_values(row))
+                self.cache_entry_detail(row[0], row)
+            timing["items"] = len(old_items) + len(rows)
+        shown = f" (first {len(rows)} shown)" if total > len(rows) else ""
+        self.match_label.config(text=f"{total} pending entries{shown}")
+
+    def sort_pending_entries(self, column):
+        """Sorts the pending list by a column; clicking the same header again reverses it."""
+        if self._pending_sort and self._pending_sort[0] == column:
+            self._pending_sort = (column, not self._pending_sort[1])
+        else:
+            self._pending_sort = (column, False)
+        self.show_sort_indicator()
+        self.filter_pending_entries()
+
+    def clear_pending_filter(self, event=None):
+        """Clears the search and sort and returns to the newest pending entries."""
+        self.search_var.set("")
+        self._pending_sort = None
+        self.show_sort_indicator()
+        self.filter_pending_entries()
+
+    def show_sort_indicator(self):
+        """Marks the sorted column's header with an arrow."""
+        for index, col in enumerate(PENDING_HEADINGS):
+            arrow = ""
+            if self._pending_sort and self._pending_sort[0] == index:
+                arrow = " ▼" if self._pending_sort[1] else " ▲"
+            self.pending_entry_tree.heading(col, text=col + arrow)
+
+    def _apply_pending_change(self, entry_id, row):
+        """Inserts, updates or removes one pending-list row; `row` is None once it is no longer pending."""
+        iid = str(entry_id)
+        key = (row['application_date'], row['id']) if row else None
+        if self.pending_entry_tree.exists(iid):
+            position = len(self._pending_keys) - 1 - self.pending_entry_tree.index(iid)
+            if self._pending_keys[position] == key:
+                self.pending_entry_tree.item(iid, values=self._pending_values(row))
+                return
+            del self._pending_keys[position]
+            self.pending_entry_tree.delete(iid)
+
+        if key is None or not self._pending_key_in_window(key):
+            return  # Rows outside the loaded window are picked up when paged in
+        position = bisect_left(self._pending_keys, key)
+        self._pending_keys.insert(position, key)
+        self.pending_entry_tree.insert("", len(self._pending_keys) - 1 - position, iid=iid,
+                                       values=self._pending_values(row))
+        if len(self._pending_keys) > PENDING_MAX_ROWS:
+            self._trim_pending_rows(1, newest=False)
+
+    def _pending_key_in_window(self, key):
+        """Tells whether a row with this key belongs inside the loaded window."""
+        if not self._pending_keys:
+            return self._pending_at_top and self._pending_at_bottom
+        return ((self._pending_at_bottom or key >= self._pending_keys[0]) and
+                (self._pending_at_top or key <= self._pending_keys[-1]))
+
+    def show_older_entries(self, rows):
+        """Appends a page of older pending entries below the loaded window."""
+        with self.metrics.ui("show_older_entries") as timing:
+            first_index = self._pending_view_index()
+            for row in rows:
+                self.pending_entry_tree.insert("", "end", iid=str(row['id']), values=self._pending_values(row))
+                self.cache_entry_detail(row['id'], row)
+            self._pending_keys[:0] = [(row['application_date'], row['id']) for row in reversed(rows)]
+            self._pending_at_bottom = len(rows) < PENDING_PAGE_SIZE
+
+            excess = max(len(self._pending_keys) - PENDING_MAX_ROWS, 0)
+            if excess:
+                self._trim_pending_rows(excess, newest=True)
+                self._move_pending_view(first_index - excess)
+            timing["items"] = len(rows) + excess
+
+    def show_newer_entries(self, rows):
+        """Prepends a page of newer pending entries above the loaded window."""
+        with self.metrics.ui("show_newer_entries") as timing:
+            first_index = self._pending_view_index()
+            for row in rows:  # Oldest first, so each row lands above the previous one
+                self.pending_entry_tree.insert("", 0, iid=str(row['id']), values=self._pending_values(row))
+                self.cache_entry_detail(row['id'], row)
+            self._pending_keys.extend((row['application_date'], row['id']) for row in rows)
+            self._pending_at_top = len(rows) < PENDING_PAGE_SIZE
+
+            excess = max(len(self._pending_keys) - PENDING_MAX_ROWS, 0)
+            if excess:
+                self._trim_pending_rows(excess, newest=False)
+            self._move_pending_view(first_index + len(rows))
+            timing["items"] = len(rows) + excess
+
+    def _pending_values(self, row):
+        """Formats a pending entry row for display in the Treeview."""
+        entry_list = list(row)[:len(PENDING_HEADINGS)]  # Without the payment type
+        # Format the advance amount to display as a float with 2 decimal places
+        entry_list[5] = f"₹{entry_list[5]:.2f}"
+        return entry_list
+
+    def _trim_pending_rows(self, count, newest):
+        """Drops `count` rows from the newest (top) or oldest (bottom) edge of the window."""
+        if newest:
+            removed = self._pending_keys[-count:]
+            del self._pending_keys[-count:]
+            self._pending_at_top = False
+        else:
+            removed = self._pending_keys[:count]
+            del self._pending_keys[:count]
+            self._pending_at_bottom = False
+        self.pending_entry_tree.delete(*(str(key[1]) for key in removed))
+
+    def _pending_view_index(self):
+        """Returns the index of the first visible row in the pending Treeview."""
+        first, _ = self.pending_entry_tree.yview()
+        return round(first * len(self._pending_keys))
+
+    def _move_pending_view(self, index):
+        """Scrolls the pending Treeview so the row at `index` is the first one visible."""
+        if self._pending_keys:
+            self.pending_entry_tree.yview_moveto(max(index, 0) / len(self._pending_keys))
+
+    def on_pending_tree_scroll(self, first, last):
+        """Pages rows in when the pending list is scrolled near either edge of the loaded window."""
+        if self._pending_paging or self._pending_filtered or not self._pending_keys:
+            return
+        if last > 0.9 and not self._pending_at_bottom:
+            anchor, older = self._pending_keys[0], True
+            args = {"older_than": anchor}
+        elif first < 0.1 and not self._pending_at_top:
+            anchor, older = self._pending_keys[-1], False
+            args = {"newer_than": anchor}
+        else:
+            return
+
+        def show_page(rows):
+            self._pending_paging = False
+            edge = self._pending_keys[0 if older else -1] if self._pending_keys else None
+            if edge != anchor:
+                return  # The window moved while the page was loading
+            if older:
+                self.show_older_entries(rows)
+            else:
+                self.show_newer_entries(rows)
+
+        def page_failed(e):
+            self._pending_paging = False
+            messagebox.showerror("Database Error", f"Error loading entries: {str(e)}")
+
+        self._pending_paging = True
+        self.metrics.set_trigger("Scroll pending list")
+        self.worker.submit(partial(self.service.pending_page, **args), key="pending_page",
+                           callback=show_page, errback=page_failed, interruptible=True)
+
+    def on_pending_entry_select(self, event=None):
+        """Populates entry details fields when an entry is selected in the Treeview."""
+        selected_item = self.pending_entry_tree.selection()
+        if not selected_item:
+            return  # Rows left the list (refresh, search); keep whatever is in the form
+
+        entry_id = int(self.pending_entry_tree.item(selected_item, "values")[0])
+        self.selected_entry_id, self.selected_row_version = entry_id, None  # Set again once the detail is shown
+        detail = self._entry_details.get(entry_id)
+        if detail is not None:
+            self._entry_details.move_to_end(entry_id)
+            self.worker.cancel("entry_detail")
+            self.show_entry_detail(detail)
+            return
+        self.load_entry_detail(entry_id)
+
+    def load_entry_detail(self, entry_id):
+        """Reads one entry from the database, caches it and fills the form with it."""
+        def found(detail):
+            if detail is not None:
+                self.remember_entry_detail(entry_id, (tuple(detail[0]), detail[1]))
+            self.show_entry_detail(detail)
+
+        # A click further down the list replaces this lookup before it touches the form
+        self.worker.submit(self.service.entry_detail, entry_id, key="entry_detail", callback=found,
+                           errback=self.database_error("Error fetching entry details"), interruptible=True)
+
+    def cache_entry_detail(self, entry_id, row):
+        """Remembers a pending row's form contents; `row` None forgets them.
+
+        `row` has the PENDING_COLUMNS layout, so the entry is stored in fetch_entry_detail's shape.
+        """
+        if row is None:
+            self._entry_details.pop(entry_id, None)
+            return
+        self.remember_entry_detail(entry_id, (tuple(row[1:7]) + (row[8],), row[7]))
+
+    def remember_entry_detail(self, entry_id, detail):
+        """Stores one entry's fetch_entry_detail result in the LRU cache."""
+        self._entry_details[entry_id] = detail
+        self._entry_details.move_to_end(entry_id)
+        if len(self._entry_details) > ENTRY_DETAIL_CACHE_SIZE:
+            self._entry_details.popitem(last=False)
+
+    def show_entry_detail(self, detail):
+        """Fills the entry details fields from fetch_entry_detail's result."""
+        if detail is None:
+            self.clear_entry_fields()  # Clear if no entry found
+            return
+
+        entry, payment_type = detail
+        app_date, copy_type, category, true_copy_number, advance, receipt, self.selected_row_version = entry
+        self.cancel_true_copy_number()  # The entry's own number wins over a pending lookup
+        self.app_date_entry.set_date(datetime.strptime(app_date, "%Y-%m-%d"))
+        self.copy_type_cb.set(copy_type)
+        self.sync_category_state()
+
+        if copy_type == "Certified Copy":
+            self.category_cb.set(category)
+        else:
+            self.category_cb.set("")
+
+        self.true_copy_number_entry.delete(0, tk.END)
+        self.true_copy_number_entry.insert(0, true_copy_number)
+        self.advance_entry.delete(0, tk.END)
+        self.advance_entry.insert(0, str(advance))
+        self.receipt_entry.delete(0, tk.END)
+        self.receipt_entry.insert(0, receipt)
+        self.auto_true_copy_number = self.auto_receipt_number = None
+
+        # Receipt Category comes from the receipt with this number and amount
+        self.receipt_category_cb.set(payment_type or "advance")  # Default set to advance
+
+    def clear_entry_fields(self):
+        """Clears all entry detail fields."""
+        self.app_date_entry.set_date(datetime.now())
+        self.copy_type_cb.set("Certified Copy")
+        self.on_copy_type_select()  # update based on copy type
+        self.true_copy_number_entry.delete(0, tk.END)
+        self.advance_entry.delete(0, tk.END)
+        self.receipt_category_cb.set("advance")  # Reset the receipt category
+
+        # Initialize receipt number when clearing
+        self.update_receipt_number()
+        self.selected_entry_id = self.selected_row_version = None
+        self.new_true_copy_number()
+
+
+    def new_entry(self, event=None):
+        """Clears the entry details fields for creating a new entry."""
+        self.clear_entry_fields()
+
+
+    def save_and_new(self, event=None):
+        """Saves the entry to the database and prepares for a new entry."""
+        self.save_entry(new_entry=True)
+
+    def save_entry(self, new_entry=False):
+        """Saves the entry to the database: a new one, or the changes to the selected one.
+
+        The duplicate-number checks, number allocation and both writes run in one transaction.
+        An edit only goes through if nobody changed the entry since the form was filled.
+        In rapid entry, a new entry is queued instead (queue_entry).
+        """
+        copy_type = self.copy_type_cb.get()
+        true_copy_number = self.true_copy_number_entry.get()  # Get from the entry (even though enabled)
+        receipt = self.receipt_entry.get()
+        # Numbers of a new entry still showing their automatic value are allocated fresh inside the
+        # save transaction, in case another clerk took them in the meantime. An edit saves the
+        # numbers shown, even ones filled in after a copy type or category change.
+        adding = self.selected_entry_id is None
+        if not adding and self.selected_row_version is None:
+            self.bell()  # The selected entry's details are still loading; saving now would add a copy of it
+            return
+        entry = {
+            "application_date": self.app_date_entry.get_date().strftime("%Y-%m-%d"),
+            "copy_type": copy_type,
+            "application_category": self.category_cb.get() if copy_type == "Certified Copy" else None,
+            "true_copy_number": None if adding and true_copy_number == self.auto_true_copy_number
+            else true_copy_number,
+            "advance_amount": self.advance_entry.get(),
+            "receipt_number": None if adding and receipt == self.auto_receipt_number else receipt,
+            "payment_type": self.receipt_category_cb.get(),
+        }
+        if self.rapid_entry.get() and adding:
+            self.queue_entry(entry)  # An empty number is allocated like an automatic one
+            return
+        if not all([true_copy_number, receipt]):
+            messagebox.showerror("Error", "All fields are required!")
+            return
+        if self._saving:
+            return
+
+        def save_failed(e):
+            self._saving = False
+            self.invalidate_number_cache()
+            messagebox.showerror("Database Error", f"Failed to save entry: {str(e)}")
+            self.update_receipt_number()  # update next receipt number
+
+        self._saving = True
+        if not adding:
+            self.worker.submit(self.service.update_entry, self.selected_entry_id, entry, self.selected_row_version,
+                               callback=lambda result: self.entry_updated(result, new_entry),
+                               errback=self.update_failed)
+            return
+        self.worker.submit(self.service.add_entries, [entry],
+                           callback=lambda result: self.entry_saved(result, new_entry), errback=save_failed)
+
+    def entry_saved(self, result, new_entry):
+        """Reports the outcome of save_entry and prepares the form for the next entry."""
+        self._saving = False
+        self.invalidate_number_cache()  # The save moved the counters
+        saved, errors = result
+        if errors:
+            messagebox.showerror("Error", errors[0][1])
+            return
+
+        messagebox.showinfo("Success", f"Entry created successfully!\n"
+                                       f"True Copy #: {saved[0]['true_copy_number']}\n"
+                                       f"Receipt #: {saved[0]['receipt_number']}")
+
+        self.refresh_entries()  # Apply the new row to the entry list
+
+        if new_entry:
+            self.new_entry()  # Prepare for a new entry if save_and_new
+        else:
+            self.update_receipt_number()  # update next receipt number
+
+    def entry_updated(self, entry, new_entry):
+        """Reports a saved edit and prepares the form for the next entry."""
+        self._saving = False
+        self.invalidate_number_cache()  # An edited number may have moved the counters
+        messagebox.showinfo("Success", f"Entry updated successfully!\n"
+                                       f"True Copy #: {entry['true_copy_number']}\n"
+                                       f"Receipt #: {entry['receipt_number']}")
+        self.refresh_entries()  # Apply the edited row to the entry list
+        if new_entry:
+            self.new_entry()
+        else:
+            self.selected_row_version = entry["row_version"]
+
+    def update_failed(self, e):
+        """Reports a rejected edit; one lost to another clerk's change reloads the entry first."""
+        self._saving = False
+        if isinstance(e, EntryConflictError):
+            entry_id = self.selected_entry_id
+            self._entry_details.pop(entry_id, None)
+            self.refresh_entries()
+            self.load_entry_detail(entry_id)  # Shows their version, with its row_version, to edit again
+            messagebox.showwarning("Entry Changed", f"{e}\nIt has been reloaded; please make your changes again.")
+        else:
+            messagebox.showerror("Error", f"Failed to update entry: {str(e)}")
+
+    def toggle_rapid_entry(self, event=None):
+        """Turns rapid entry on or off."""
+        self.rapid_entry.set(not self.rapid_entry.get())
+        self.show_rapid_status()
+
+    def queue_entry(self, entry):
+        """Rapid entry: validates the form locally, queues it and readies the form for the next entry.
+
+        Nothing waits on the database; the flusher saves the queue in the background and
+        mistakes are reported in the status line without interrupting the typing.
+        """
+        try:
+            entry = validate_entry(entry)
+        except EntryValidationError as e:
+            self.bell()
+            self.show_rapid_status(str(e))
+            return
+        key = (entry["copy_type"], entry["application_category"], datetime.now().year)
+        self.entry_queue.put(entry, key, self._true_copy_cache.get(key), self.last_receipt_number)
+        self.schedule_flush()
+
+        # Date, copy type and category stay for the next entry of the batch
+        self.advance_entry.delete(0, tk.END)
+        self.receipt_category_cb.set("advance")
+        self.cancel_true_copy_number()
+        self.regenerate_true_copy_number()  # From the cache and the queue, unless it was never looked up
+        if self.last_receipt_number is not None:
+            self.fill_receipt_number(self.last_receipt_number)
+        self.advance_entry.focus_set()
+        self.show_rapid_status()
+
+    def schedule_flush(self):
+        """Saves the queue soon, or now if a full batch is waiting."""
+        if self._flushing or self._flush_after is not None:
+            return
+        if len(self.entry_queue.waiting) >= RAPID_BATCH_SIZE:
+            self.flush_entry_queue()
+        else:
+            self._flush_after = self.after(RAPID_FLUSH_MS, self.flush_entry_queue)
+
+    def flush_entry_queue(self):
+        """Hands up to RAPID_BATCH_SIZE queued entries to save_entries, one transaction on the worker thread."""
+        self._flush_after = None
+        if self._flushing or not self.entry_queue.waiting:
+            return
+        self._flushing = True
+        self.worker.submit(self.service.add_entries, self.entry_queue.take(RAPID_BATCH_SIZE),
+                           callback=self.entry_queue_flushed, errback=self.entry_queue_flush_failed,
+                           background="Rapid entry flush")
+
+    def entry_queue_flushed(self, result):
+        """Takes in a saved batch: updates the list once, reports rejects and renumbering, saves the rest."""
+        self._flushing = False
+        saved, failed = self.entry_queue.finish(result)
+        renumbered = [entry for queued, entry in saved if queued.renumbered(entry)]
+        message = None
+        if renumbered:  # Another clerk saved in between; the stored counters are ahead of ours
+            entry = renumbered[-1]
+            message = (f"{len(renumbered)} saved under other numbers, last as True Copy # "
+                       f"{entry['true_copy_number']}, Receipt # {entry['receipt_number']}")
+            self.invalidate_number_cache()
+            if self.auto_true_copy_number and self.true_copy_number_entry.get() == self.auto_true_copy_number:
+                self.new_true_copy_number()
+            if self.auto_receipt_number and self.receipt_entry.get() == self.auto_receipt_number:
+                self.update_receipt_number()
+        if failed:
+            self.bell()
+            message = f"Not saved: {failed[-1][1]} (F9 to correct)"
+        if saved:
+            self.refresh_entries(background="Rapid entry flush")
+        self.show_rapid_status(message)
+        self.flush_entry_queue()  # Entries queued while this batch was saved
+
+    def entry_queue_flush_failed(self, e):
+        """Puts a batch whose save failed outright back in the queue and tries again shortly."""
+        self._flushing = False
+        self.entry_queue.retry()
+        self.show_rapid_status(f"Saving failed ({e}); retrying")
+        if self._flush_after is None:
+            self._flush_after = self.after(RAPID_RETRY_MS, self.flush_entry_queue)
+
+    def show_rapid_status(self, message=None):
+        """Shows the rapid-entry counts, and `message` if given, next to the buttons."""
+        if not self.rapid_entry.get() and not len(self.entry_queue) and not self.entry_queue.failed:
+            self.rapid_status.config(text="")
+            return
+        status = (f"Queued {len(self.entry_queue)}, saved {self.entry_queue.saved_count}, "
+                  f"rejected {len(self.entry_queue.failed)}")
+        self.rapid_status.config(text=f"{status}. {message}" if message else status)
+
+    def recall_failed_entry(self, event=None):
+        """Rapid entry: puts the oldest rejected entry back in the form to be corrected and entered again."""
+        if not self.entry_queue.failed:
+            self.bell()
+            return
+        queued, message = self.entry_queue.failed.popleft()
+        entry = queued.entry
+        self.selected_entry_id = self.selected_row_version = None
+        self.app_date_entry.set_date(datetime.strptime(entry["application_date"], "%Y-%m-%d"))
+        self.copy_type_cb.set(entry["copy_type"])
+        self.sync_category_state()
+        if entry["application_category"]:
+            self.category_cb.set(entry["application_category"])
+        self.advance_entry.delete(0, tk.END)
+        self.advance_entry.insert(0, format_rupees(entry["advance_paise"]))
+        self.receipt_category_cb.set(entry["payment_type"])
+        if entry["true_copy_number"]:  # Typed in; the automatic one is filled in otherwise
+            self.cancel_true_copy_number()
+            self.true_copy_number_entry.delete(0, tk.END)
+            self.true_copy_number_entry.insert(0, entry["true_copy_number"])
+        else:
+            self.new_true_copy_number()
+        if entry["receipt_number"]:
+            self.receipt_entry.delete(0, tk.END)
+            self.receipt_entry.insert(0, entry["receipt_number"])
+        elif self.last_receipt_number is not None:
+            self.fill_receipt_number(self.last_receipt_number)
+        self.show_rapid_status(f"Correct and press Enter: {message}")
+
+    def update_receipt_number(self):
+        """Looks up the last receipt number and fills in the next one."""
+        self.worker.submit(self.service.last_receipt_number, key="receipt_number", callback=self.fill_receipt_number,
+                           errback=self.database_error("Error loading last receipt number"), interruptible=True)
+
+    def fill_receipt_number(self, last_number):
+        """Inserts the receipt number following `last_number` into the entry."""
+        self.last_receipt_number = last_number
+        next_receipt_number = str(self.entry_queue.last_receipt_number(last_number) + 1)  # After queued ones
+        self.receipt_entry.delete(0, tk.END)
+        self.receipt_entry.insert(0, next_receipt_number)
+        self.auto_receipt_number = next_receipt_number
+
+    def go_back(self, event=None):
+        """Closes the current window."""
+        if self.parent:
+            self.parent.focus_set()
+        self.destroy()
+
+    def open_dispose_entry(self, event=None):
+        """Open the Dispose Entry window."""
+        from dispose_entry import DisposeEntryForm  # Import here to avoid circular imports
+        DisposeEntryForm(self)
+
+    def open_collections_report(self, event=None):
+        """Opens the collections report, which reads through this window's worker and service."""
+        from collections_report import CollectionsReport  # Import here: only the report needs it
+        CollectionsReport(self, self.worker, self.service)
+
+    def destroy(self, event=None):
+        """Closes the current window once rapid entry's queue is saved, or the clerk agrees to lose what is not."""
+        if self._flush_after is not None:  # Save the queue now rather than when the timer fires
+            self.after_cancel(self._flush_after)
+            self._flush_after = None
+        self.flush_entry_queue()
+        self.worker.drain()  # Every batch and its callback, so rejects and failures are known before closing
+        unsaved = len(self.entry_queue) + len(self.entry_queue.failed)
+        if unsaved and not messagebox.askyesno(
+                "Unsaved Entries", f"{unsaved} rapid entries were rejected or could not be saved "
+                                   f"(F9 recalls rejected ones). Close anyway and lose them?"):
+            return  # A failed save has already scheduled its retry
+        for after_id in (self._true_copy_after, self._watch_after, self._startup_after, self._flush_after):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self.worker.stop()  # Finishes queued writes and closes the connection on the worker thread
+        super().destroy()
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.withdraw()
+    app = DataEntryManagement(root)
     app.mainloop()
\ No newline at end of file
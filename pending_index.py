@@ -0,0 +1,213 @@
+# --- pending_index.py ---
+
+"""In-memory search and sort over every pending application.
+
+The entry screen only keeps a window of pending rows in its Treeview. Searching or
+sorting the whole list goes through a PendingIndex instead: the pending rows held
+column by column, plus one sorted index per column. Typing a query or clicking a
+column header is then answered from memory without another database query.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+from entry_store import fetch_pending_page, latest_change
+
+# Column order matches PENDING_COLUMNS; the first seven are the pending Treeview's
+COLUMNS = ("id", "application_date", "copy_type", "application_category", "true_copy_number",
+           "advance_amount", "receipt_number", "payment_type", "row_version")
+INDEXED_COLUMNS = COLUMNS.index("payment_type") + 1  # Columns with a sorted index; row_version only rides along
+# Columns whose text a search token can be a prefix of (case-insensitive)
+PREFIX_COLUMNS = ("true_copy_number", "receipt_number", "application_date", "copy_type", "application_category",
+                  "payment_type")
+AMOUNT_COLUMN = COLUMNS.index("advance_amount")
+SMALL_MATCH_FRACTION = 32  # Sort matches directly when they are under 1/32 of the rows
+KEY_CHECK_FRACTION = 4  # Check matches' keys against a token's ranges when the ranges are over 4 times larger
+
+
+def _sort_key(column, value):
+    """Returns the index key of a column value; text keys are upper-cased for prefix search."""
+    if column == AMOUNT_COLUMN:
+        return float(value or 0)
+    if column == 0:
+        return value
+    return sys.intern(str(value or "").upper())  # Interned, so repeated copy types cost one string
+
+
+class PendingIndex:
+    """The pending rows as parallel column lists, each column with a sorted index.
+
+    A row lives in a slot; a sorted index is a list of keys in order plus an array of the
+    slots holding them. Prefix lookups bisect the sorted keys, and sorting by a column walks
+    its slot array, so neither touches every row unless the query matches every row.
+    """
+
+    def __init__(self, rows=()):
+        self.columns = [[] for _ in COLUMNS]
+        self._slots = {}  # application id -> slot
+        self._free = []  # Slots of removed rows, reused by the next insert
+        self._keys = [[] for _ in range(INDEXED_COLUMNS)]
+        self._order = [array("l") for _ in range(INDEXED_COLUMNS)]
+        self._build(rows)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _build(self, rows):
+        for row in rows:
+            slot = len(self.columns[0])
+            for column, values in enumerate(self.columns):
+                values.append(row[column])
+            self._slots[row[0]] = slot
+        for column in range(INDEXED_COLUMNS):
+            keys = [_sort_key(column, value) for value in self.columns[column]]
+            order = sorted(range(len(keys)), key=keys.__getitem__)  # Stable: ties keep load order
+            self._keys[column] = [keys[slot] for slot in order]
+            self._order[column] = array("l", order)
+
+    def row(self, slot):
+        """Returns the row in `slot` as a tuple in COLUMNS order."""
+        return tuple([values[slot] for values in self.columns])
+
+    def apply(self, entry_id, row):
+        """Inserts, updates or removes one application; `row` is None once it is no longer pending."""
+        if entry_id in self._slots:
+            self._remove(entry_id)
+        if row is not None:
+            self._insert(row)
+
+    def _insert(self, row):
+        if self._free:
+            slot = self._free.pop()
+            for column, values in enumerate(self.columns):
+                values[slot] = row[column]
+        else:
+            slot = len(self.columns[0])
+            for column, values in enumerate(self.columns):
+                values.append(row[column])
+        self._slots[row[0]] = slot
+        for column in range(INDEXED_COLUMNS):
+            key = _sort_key(column, row[column])
+            position = bisect_right(self._keys[column], key)
+            self._keys[column].insert(position, key)
+            self._order[column].insert(position, slot)
+
+    def _remove(self, entry_id):
+        slot = self._slots.pop(entry_id)
+        for column in range(INDEXED_COLUMNS):
+            keys = self._keys[column]
+            key = _sort_key(column, self.columns[column][slot])
+            start = bisect_left(keys, key)
+            position = start + self._order[column][start:bisect_right(keys, key, start)].index(slot)
+            del keys[position]
+            del self._order[column][position]
+        for values in self.columns:
+            values[slot] = None
+        self._free.append(slot)
+
+    def _token_ranges(self, token):
+        """Returns the (column, start, end) ranges of sorted index entries matching one search token."""
+        prefix = token.upper()
+        ranges = []
+        for name in PREFIX_COLUMNS:
+            column = COLUMNS.index(name)
+            keys = self._keys[column]
+            start = bisect_left(keys, prefix)
+            ranges.append((column, start, bisect_left(keys, prefix + "\uffff", start)))
+        amount = _parse_amount(token)
+        if amount is not None:
+            keys = self._keys[AMOUNT_COLUMN]
+            ranges.append((AMOUNT_COLUMN, bisect_left(keys, amount), bisect_right(keys, amount)))
+        return [(column, start, end) for column, start, end in ranges if end > start]
+
+    def search(self, query="", sort_column=1, descending=True, limit=None):
+        """Returns (match count, rows) for a query, sorted by an indexed column.
+
+        Each whitespace-separated token must prefix-match a true copy #, receipt #, date,
+        copy type, category or receipt category, or equal the advance amount. Rows come back as tuples in
+        COLUMNS order; at most `limit` of them.
+
+        Tokens are looked up in the sorted indexes, smallest match first, and intersected;
+        a token every row matches (the "2" of a date) is skipped, and a few matches are
+        checked against a much larger token by key. When one index range is left, its
+        length is the count and no set is built. Small results are sorted directly; large
+        ones are produced by walking the sort column's index (only the matching stretch of
+        it when a token's range is on that column), which stops once `limit` rows are found.
+        """
+        tokens = [self._token_ranges(token) for token in query.split()]
+        if not all(tokens):
+            return 0, []
+        tokens = sorted((ranges for ranges in tokens if not self._matches_all(ranges)),
+                        key=lambda ranges: sum(end - start for _, start, end in ranges))
+
+        order = self._order[sort_column]
+        walk = reversed if descending else iter
+        if not tokens:
+            return len(self._slots), self._rows(walk(order), limit)
+        # A one-range token on the sort column holds every match in one stretch of its index
+        stretch = next(((start, end) for ranges in tokens if len(ranges) == 1
+                        for column, start, end in ranges if column == sort_column), None)
+        if len(tokens) == 1 and len(tokens[0]) == 1:
+            column, start, end = tokens[0][0]
+            if stretch is not None:
+                return end - start, self._rows(walk(order[start:end]), limit)
+            matches, total = self._order[column][start:end], end - start  # Distinct slots, counted by the range
+        else:
+            matches = None
+            for ranges in tokens:
+                if matches is None:
+                    matches = set().union(*(self._order[column][start:end] for column, start, end in ranges))
+                elif len(matches) * KEY_CHECK_FRACTION < sum(end - start for _, start, end in ranges):
+                    matches = {slot for slot in matches if self._in_ranges(slot, ranges)}
+                else:  # Only the (smaller) matches so far are hashed, never the whole range
+                    matches = set().union(*(matches.intersection(self._order[column][start:end])
+                                            for column, start, end in ranges))
+                if not matches:
+                    return 0, []
+            total = len(matches)
+
+        if total * SMALL_MATCH_FRACTION < len(self._slots):
+            values, dates, ids = self.columns[sort_column], self.columns[1], self.columns[0]
+            slots = iter(sorted(matches, reverse=descending,
+                                key=lambda slot: (_sort_key(sort_column, values[slot]), dates[slot], ids[slot])))
+        else:
+            if not isinstance(matches, set):
+                matches = set(matches)
+            start, end = stretch or (0, len(order))
+            slots = filter(matches.__contains__, walk(order[start:end]))
+        return total, self._rows(slots, limit)
+
+    def _matches_all(self, ranges):
+        return any(end - start == len(self._slots) for _, start, end in ranges)
+
+    def _in_ranges(self, slot, ranges):
+        """Tells whether a slot's keys fall in any of the (column, start, end) index ranges."""
+        for column, start, end in ranges:
+            keys = self._keys[column]
+            if keys[start] <= _sort_key(column, self.columns[column][slot]) <= keys[end - 1]:
+                return True
+        return False
+
+    def _rows(self, slots, limit):
+        return [self.row(slot) for slot in islice(slots, limit)]
+
+
+def _parse_amount(token):
+    """Returns a search token as an advance amount, or None when it is not a number."""
+    try:
+        return float(token.lstrip("₹"))
+    except ValueError:
+        return None
+
+
+def load_pending_index(conn):
+    """Returns (watermark, PendingIndex) over every pending application.
+
+    Rows are read oldest first along true_copy_pending_by_date, so ties in a sorted column
+    keep application date order; the watermark is read first, as in first_pending_page.
+    """
+    watermark = latest_change(conn)
+    rows = fetch_pending_page(conn, newer_than=("", 0), limit=-1)  # LIMIT -1: no limit
+    return watermark, PendingIndex(rows)
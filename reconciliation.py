@@ -0,0 +1,206 @@
+# --- reconciliation.py ---
+
+"""Checks the application and receipt registers against each other in one vectorized pass.
+
+Both registers, archived years included (see entry_archive.py), are read in bulk into
+NumPy arrays, then sorted and matched with array operations rather than a Python loop
+per row, so a million-row register is checked in seconds. The report lists:
+
+- mismatched amounts: an application's advance differs from its receipt's amount, or a
+  paise column disagrees with its REAL rupee column;
+- applications whose receipt number is not in the receipt register;
+- orphan receipts: receipts matching no application by receipt # or True Copy #;
+- duplicate receipt numbers, and True Copy numbers repeated within a category.
+
+    python reconciliation.py [--db court.db] [--limit 20]
+"""
+
+import argparse
+import sqlite3
+import sys
+
+from entry_archive import attach_archive
+from entry_store import migrate, open_connection
+from money import format_rupees
+
+FETCH_SIZE = 50000  # Rows read from a cursor per step while loading the arrays
+REPORT_SECTIONS = ("mismatched_amounts", "missing_receipts", "orphan_receipts", "duplicate_receipt_numbers",
+                   "duplicate_true_copy_numbers")
+# Each register as (column, NumPy dtype) pairs; text is read as Python objects and widened below
+_APPLICATION_COLUMNS = (
+    ("id", "int64"),
+    ("COALESCE(receipt_number, '')", "object"),
+    ("COALESCE(true_copy_number, '')", "object"),
+    ("COALESCE(application_category, '')", "object"),
+    # Archived years from before the paise columns have NULL there; fall back to the rupees
+    ("COALESCE(advance_paise, CAST(round(COALESCE(advance_amount, 0) * 100) AS INTEGER))", "int64"),
+    ("CAST(round(COALESCE(advance_amount, 0) * 100) AS INTEGER)", "int64"),
+)
+_RECEIPT_COLUMNS = (
+    ("id", "int64"),
+    ("COALESCE(receipt_number, '')", "object"),
+    ("COALESCE(true_copy_number, '')", "object"),
+    ("COALESCE(amount_paise, CAST(round(COALESCE(amount, 0) * 100) AS INTEGER))", "int64"),
+    ("CAST(round(COALESCE(amount, 0) * 100) AS INTEGER)", "int64"),
+)
+
+
+def _load_numpy():
+    try:
+        import numpy  # Import here so the rest of the application does not need it
+    except ImportError:
+        raise SystemExit("Reconciliation needs NumPy: pip install numpy") from None
+    return numpy
+
+
+def load_columns(conn, table, columns):
+    """Reads `columns` of a table or view into one NumPy array per column.
+
+    Text columns become fixed-width unicode arrays, which sort and compare in C.
+    """
+    np = _load_numpy()
+    cursor = conn.cursor()
+    cursor.row_factory = None  # Plain tuples; sqlite3.Row would cost a Python object per row
+    cursor.execute(f"SELECT {', '.join(sql for sql, _ in columns)} FROM {table}")
+    parts = [[] for _ in columns]
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for part, values, (_, dtype) in zip(parts, zip(*rows), columns):
+            part.append(np.array(values, dtype=dtype))
+    arrays = []
+    for part, (_, dtype) in zip(parts, columns):
+        array = np.concatenate(part) if part else np.array([], dtype=dtype)
+        arrays.append(array.astype(str) if dtype == "object" else array)
+    return arrays
+
+
+def _lookup(np, sorted_keys, keys):
+    """Returns (positions, found) locating each of `keys` in the sorted array `sorted_keys`."""
+    positions = np.searchsorted(sorted_keys, keys)
+    clipped = np.minimum(positions, max(len(sorted_keys) - 1, 0))
+    found = (positions < len(sorted_keys)) & (sorted_keys[clipped] == keys) if len(sorted_keys) else \
+        np.zeros(len(keys), dtype=bool)
+    return clipped, found
+
+
+def _duplicates(np, *keys):
+    """Returns (first index, count) for each group of rows sharing all of `keys`, for groups of two or more."""
+    order = np.lexsort(keys[::-1])  # lexsort sorts by its last key first
+    same = np.ones(max(len(order) - 1, 0), dtype=bool)
+    for key in keys:
+        ordered = key[order]
+        same &= ordered[1:] == ordered[:-1]
+    # Runs of True in `same` join neighbours into one group
+    starts = np.flatnonzero(np.diff(np.concatenate(([0], same.astype(np.int8), [0]))) == 1)
+    ends = np.flatnonzero(np.diff(np.concatenate(([0], same.astype(np.int8), [0]))) == -1)
+    return order[starts], ends - starts + 1
+
+
+def reconcile(conn):
+    """Returns the reconciliation report: a dict of REPORT_SECTIONS, each a list of tuples.
+
+    - mismatched_amounts: (application id, receipt #, advance paise, receipt paise)
+    - missing_receipts: (application id, receipt #)
+    - orphan_receipts: (receipt id, receipt #, True Copy #)
+    - duplicate_receipt_numbers: (receipt #, count)
+    - duplicate_true_copy_numbers: (True Copy #, category, count)
+
+    Reads through entry_archive's views, so archived years are checked too.
+    """
+    np = _load_numpy()
+    attach_archive(conn)
+    app_id, app_receipt, app_true_copy, app_category, app_paise, app_rupee_paise = load_columns(
+        conn, "all_true_copy_applications", _APPLICATION_COLUMNS)
+    receipt_id, receipt_number, receipt_true_copy, receipt_paise, receipt_rupee_paise = load_columns(
+        conn, "all_receipts", _RECEIPT_COLUMNS)
+    report = {section: [] for section in REPORT_SECTIONS}
+
+    # Each application against the receipt carrying its number
+    by_number = np.argsort(receipt_number, kind="stable")
+    sorted_numbers = receipt_number[by_number]
+    positions, found = _lookup(np, sorted_numbers, app_receipt)
+    has_number = app_receipt != ""
+    matched_paise = receipt_paise[by_number][positions] if len(by_number) else np.zeros(len(app_id), dtype=np.int64)
+    mismatched = (has_number & found & (matched_paise != app_paise)) | (app_paise != app_rupee_paise)
+    for index in np.flatnonzero(mismatched):
+        report["mismatched_amounts"].append((int(app_id[index]), str(app_receipt[index]), int(app_paise[index]),
+                                             int(matched_paise[index]) if found[index] else None))
+    for index in np.flatnonzero(receipt_paise != receipt_rupee_paise):  # A receipt's own columns disagree
+        report["mismatched_amounts"].append((None, str(receipt_number[index]), int(receipt_rupee_paise[index]),
+                                             int(receipt_paise[index])))
+    for index in np.flatnonzero(has_number & ~found):
+        report["missing_receipts"].append((int(app_id[index]), str(app_receipt[index])))
+
+    # Receipts no application points at, by receipt # or (recoveries) by True Copy #
+    # A blank number points at nothing, however many applications also leave it blank
+    _, by_receipt = _lookup(np, np.sort(app_receipt[has_number]), receipt_number)
+    _, by_true_copy = _lookup(np, np.sort(app_true_copy[app_true_copy != ""]), receipt_true_copy)
+    by_receipt &= receipt_number != ""
+    by_true_copy &= receipt_true_copy != ""
+    for index in np.flatnonzero(~by_receipt & ~by_true_copy):
+        report["orphan_receipts"].append((int(receipt_id[index]), str(receipt_number[index]),
+                                          str(receipt_true_copy[index])))
+
+    numbered = np.flatnonzero(receipt_number != "")
+    for first, count in zip(*_duplicates(np, receipt_number[numbered])):
+        report["duplicate_receipt_numbers"].append((str(receipt_number[numbered][first]), int(count)))
+    numbered = np.flatnonzero(app_true_copy != "")
+    for first, count in zip(*_duplicates(np, app_true_copy[numbered], app_category[numbered])):
+        report["duplicate_true_copy_numbers"].append((str(app_true_copy[numbered][first]),
+                                                      str(app_category[numbered][first]), int(count)))
+    return report
+
+
+def _describe(section, item):
+    if section == "mismatched_amounts":
+        application_id, receipt, advance, amount = item
+        received = "no receipt" if amount is None else f"receipt {format_rupees(amount)}"
+        owner = f"application {application_id}" if application_id is not None else "receipt columns"
+        return f"{owner}, receipt # {receipt}: advance {format_rupees(advance)}, {received}"
+    if section == "missing_receipts":
+        return f"application {item[0]}: receipt # {item[1]} not in the receipt register"
+    if section == "orphan_receipts":
+        return f"receipt {item[0]}: receipt # {item[1]}, True Copy # {item[2] or '-'} matches no application"
+    if section == "duplicate_receipt_numbers":
+        return f"receipt # {item[0]} used {item[1]} times"
+    return f"True Copy # {item[0]} ({item[1] or 'no category'}) used {item[2]} times"
+
+
+def main(argv=None):
+    """Command-line reconciliation report."""
+    parser = argparse.ArgumentParser(description="Reconcile the True Copy application and receipt registers.")
+    parser.add_argument("--db", help="database file (default: the one config.py opens)")
+    parser.add_argument("--limit", type=int, default=20, help="problems listed per section (default 20)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        conn = open_connection(args.db)
+    else:
+        from config import get_db_connection  # Import here so --db works without config
+        conn = get_db_connection()
+    try:
+        conn.execute("PRAGMA mmap_size = 0")  # Read the registers through the page cache, as register_io does
+        migrate(conn)
+        report = reconcile(conn)
+    except sqlite3.Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        conn.close()
+
+    problems = 0
+    for section in REPORT_SECTIONS:
+        items = report[section]
+        problems += len(items)
+        print(f"{section.replace('_', ' ').capitalize()}: {len(items)}")
+        for item in items[:args.limit]:
+            print(f"    {_describe(section, item)}")
+        if len(items) > args.limit:
+            print(f"    ... and {len(items) - args.limit} more")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
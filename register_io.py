@@ -0,0 +1,213 @@
+# --- register_io.py ---
+
+"""Streaming CSV/Excel export and import for the True Copy registers, without the Tk window.
+
+    python register_io.py export pending pending.xlsx
+    python register_io.py export receipts receipts.csv
+    python register_io.py import old_register.csv
+
+Exports step through an SQLite cursor a chunk at a time and write each chunk straight to
+the file (openpyxl's write-only mode for .xlsx), so memory stays flat however large the
+register is. Imports read the file row by row and save it in batches through
+entry_store.save_entries, which applies the same checks as the entry screen and writes
+each batch in one transaction. Imported rows are old entries: each needs its receipt_date,
+and a missing True Copy # is numbered for the year of its application_date, not this
+year. Column names are the database's, so an export of
+pending applications can be imported again. Full-register exports include the
+applications and receipts entry_archive.py has moved into the archive file.
+"""
+
+import argparse
+import csv
+import sys
+from datetime import date, datetime
+
+from entry_archive import attach_archive
+from entry_store import PENDING_COLUMNS, migrate, open_connection, save_entries
+
+EXPORT_CHUNK_SIZE = 5000  # Rows fetched from the cursor and written per step
+IMPORT_BATCH_SIZE = 10000  # Rows saved per transaction
+EXPORTS = {
+    # The receipt date rides along so the export can be imported again
+    "pending": f"""SELECT {PENDING_COLUMNS},
+                          (SELECT receipt_date
+                           FROM receipt_register
+                           WHERE receipt_register.receipt_number = true_copy_applications.receipt_number
+                           LIMIT 1) AS receipt_date
+                   FROM true_copy_applications
+                   WHERE status = 'Pending'
+                   ORDER BY application_date, id""",
+    # Archive year tables oldest first, then the working table, each in id order; no sort needed
+    "applications": "SELECT * FROM all_true_copy_applications",
+    "receipts": "SELECT * FROM all_receipts",
+}
+ARCHIVED_EXPORTS = {"applications", "receipts"}  # Read through entry_archive's all_* views
+# File columns save_entries reads; any others (id, status, ...) are ignored on import
+IMPORT_COLUMNS = ("application_date", "copy_type", "application_category", "true_copy_number", "advance_amount",
+                  "receipt_number", "payment_type", "receipt_date")
+
+
+def file_format(path):
+    """Returns "xlsx" or "csv" from a file name."""
+    return "xlsx" if path.lower().endswith((".xlsx", ".xlsm")) else "csv"
+
+
+def _load_openpyxl():
+    try:
+        import openpyxl  # Import here so CSV work does not need it
+    except ImportError:
+        raise SystemExit("Excel files need openpyxl: pip install openpyxl") from None
+    return openpyxl
+
+
+def iter_chunks(cursor, size=EXPORT_CHUNK_SIZE):
+    """Yields lists of at most `size` rows until the cursor is exhausted."""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
+
+
+def export_rows(conn, kind, path, chunk_size=EXPORT_CHUNK_SIZE):
+    """Writes one of the EXPORTS queries to a CSV or XLSX file and returns the row count."""
+    if kind in ARCHIVED_EXPORTS:
+        attach_archive(conn)
+    cursor = conn.execute(EXPORTS[kind])
+    header = [column[0] for column in cursor.description]
+    chunks = ([tuple(row) for row in rows] for rows in iter_chunks(cursor, chunk_size))
+    if file_format(path) == "xlsx":
+        return _write_xlsx(path, kind, header, chunks)
+    return _write_csv(path, header, chunks)
+
+
+def _write_csv(path, header, chunks):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as output:
+        writer = csv.writer(output)
+        writer.writerow(header)
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _write_xlsx(path, title, header, chunks):
+    openpyxl = _load_openpyxl()
+    workbook = openpyxl.Workbook(write_only=True)  # Rows go to a temporary file as they are appended
+    sheet = workbook.create_sheet(title)
+    sheet.append(header)
+    count = 0
+    for rows in chunks:
+        for row in rows:
+            sheet.append(row)
+        count += len(rows)
+    workbook.save(path)
+    return count
+
+
+def _cell_text(value):
+    """Turns a spreadsheet cell into the text save_entries expects."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Receipt numbers typed as numbers come back as 123.0
+    return str(value).strip()
+
+
+def read_entries(path):
+    """Yields (line number, entry dict) for each data row of a CSV or XLSX file."""
+    if file_format(path) == "xlsx":
+        workbook = _load_openpyxl().load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [_cell_text(cell) for cell in next(rows, ())]
+            for line, row in enumerate(rows, start=2):
+                if any(cell is not None for cell in row):
+                    yield line, {name: _cell_text(cell) for name, cell in zip(header, row) if name in IMPORT_COLUMNS}
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as source:
+            reader = csv.DictReader(source)
+            for row in reader:
+                if any(row.values()):
+                    yield reader.line_num, {name: (row[name] or "").strip() for name in IMPORT_COLUMNS if name in row}
+
+
+def import_entries(conn, path, batch_size=IMPORT_BATCH_SIZE, on_error=None):
+    """Saves every entry in a CSV or XLSX file through save_entries, `batch_size` per transaction.
+
+    `on_error(line, message)` is called for each rejected row. Returns (saved, rejected) counts.
+    """
+    saved = rejected = 0
+    batch, lines = [], []
+
+    def flush():
+        nonlocal saved, rejected
+        rows, errors = save_entries(conn, batch, by_application_year=True)
+        saved += len(rows)
+        rejected += len(errors)
+        for index, message in errors:
+            if on_error:
+                on_error(lines[index], message)
+        batch.clear()
+        lines.clear()
+
+    for line, entry in read_entries(path):
+        if not entry.get("receipt_date"):  # save_entries would date the receipt today
+            rejected += 1
+            if on_error:
+                on_error(line, "A receipt_date is required on import.")
+            continue
+        batch.append(entry)
+        lines.append(line)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return saved, rejected
+
+
+def main(argv=None):
+    """Command-line export and import of the registers."""
+    parser = argparse.ArgumentParser(description="Export or import the True Copy registers as CSV or Excel.")
+    parser.add_argument("--db", help="database file (default: the one config.py opens)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write a register to a .csv or .xlsx file")
+    export.add_argument("kind", choices=sorted(EXPORTS))
+    export.add_argument("path")
+    export.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="rows fetched per step")
+    load = commands.add_parser("import", help="save the entries in a .csv or .xlsx file")
+    load.add_argument("path")
+    load.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="rows saved per transaction")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        conn = open_connection(args.db)
+    else:
+        from config import get_db_connection  # Import here so --db works without config
+        conn = get_db_connection()
+    try:
+        # A full-register scan would otherwise map the whole file into memory; stream it instead
+        conn.execute("PRAGMA mmap_size = 0")
+        migrate(conn)
+        if args.command == "export":
+            count = export_rows(conn, args.kind, args.path, args.chunk_size)
+            print(f"Exported {count} rows to {args.path}.")
+            return 0
+        saved, rejected = import_entries(conn, args.path, args.batch_size,
+                                         on_error=lambda line, message: print(f"Line {line}: {message}",
+                                                                              file=sys.stderr))
+        print(f"Imported {saved} entries, rejected {rejected}.")
+        return 1 if rejected else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
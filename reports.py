@@ -0,0 +1,268 @@
+# --- reports.py ---
+
+"""Collections reports: receipts per day, month or year by copy type, category and payment type.
+
+Grouping the whole receipt register for every report is slow once it holds years of
+receipts. Instead, receipt_daily_rollup (migration 009) keeps one row per day, copy type,
+category and payment type with its receipt count and total in paise. Triggers on both
+registers only mark the days a write touched in receipt_rollup_dirty; refresh_rollup
+recomputes those days, so keeping the rollup current costs a few rows per new receipt.
+A report over any date range then adds up at most a few rows per day, and a ReportCache
+answers a repeated report from memory until the database changes.
+
+Once anything is archived, days are recomputed through entry_archive's views, so archiving
+does not change past collections. A receipt counts under the copy type and category of the
+application with its receipt number; receipts without one fall back to the prefix of
+their True Copy # and no category.
+
+    python reports.py collections --from 2024-04-01 --to 2025-03-31 --period month
+    python reports.py verify
+    python reports.py rebuild
+"""
+
+import argparse
+import sqlite3
+import sys
+from collections import OrderedDict
+from datetime import date
+
+from entry_archive import archive_years, attach_archive
+from entry_store import (ROLLUP_REBUILD, TRUE_COPY_PREFIXES, chunked, data_version, migrate, open_connection,
+                         retry_on_busy)
+from money import format_rupees
+
+REPORT_PERIODS = {"day": 10, "month": 7, "year": 4}  # Leading characters of a YYYY-MM-DD date kept per period
+REPORT_CACHE_SIZE = 64  # Report results kept in a ReportCache, least recently used dropped first
+REPORT_COLUMNS = ("period", "copy_type", "application_category", "payment_type", "receipt_count", "total_paise")
+_COPY_TYPE_BY_PREFIX = "CASE " + " ".join(f"WHEN r.true_copy_number LIKE '{prefix}/%' THEN '{copy_type}'"
+                                          for copy_type, prefix in TRUE_COPY_PREFIXES.items()) + " ELSE '' END"
+
+
+def _rollup_select(receipts, applications, where):
+    """Builds the query grouping the receipts matching `where` into rollup rows."""
+    return f"""SELECT r.receipt_date,
+                      COALESCE((SELECT a.copy_type FROM {applications} a
+                                WHERE a.receipt_number = r.receipt_number LIMIT 1), {_COPY_TYPE_BY_PREFIX}),
+                      COALESCE((SELECT a.application_category FROM {applications} a
+                                WHERE a.receipt_number = r.receipt_number LIMIT 1), ''),
+                      r.payment_type, COUNT(*), SUM(COALESCE(r.amount_paise, CAST(round(r.amount * 100) AS INTEGER)))
+               FROM {receipts} r
+               WHERE {where}
+               GROUP BY 1, 2, 3, 4"""
+
+
+def _application_lookup(conn, where=None, params=()):
+    """Fills temp.rollup_applications with the copy type and category per receipt #, archived applications included.
+
+    A correlated subquery into the all_true_copy_applications view would materialize the
+    whole view for every receipt; this table is filled once and searched by its key. With
+    `where`, only the applications of the receipts matching it are looked up.
+    """
+    conn.execute("DROP TABLE IF EXISTS temp.rollup_applications")
+    conn.execute("""CREATE TEMP TABLE rollup_applications (
+                        receipt_number TEXT PRIMARY KEY,
+                        copy_type TEXT,
+                        application_category TEXT
+                    ) WITHOUT ROWID""")
+    if where is None:
+        conn.execute("""INSERT OR IGNORE INTO temp.rollup_applications
+                        SELECT receipt_number, copy_type, application_category
+                        FROM all_true_copy_applications
+                        WHERE receipt_number <> ''""")
+    else:
+        numbers = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT r.receipt_number FROM all_receipts r WHERE {where} AND r.receipt_number <> ''", params)]
+        for batch in chunked(numbers):
+            conn.execute(f"""INSERT OR IGNORE INTO temp.rollup_applications
+                             SELECT receipt_number, copy_type, application_category
+                             FROM all_true_copy_applications
+                             WHERE receipt_number IN ({','.join('?' * len(batch))})""", batch)
+    return "temp.rollup_applications"
+
+
+def _rollup_insert(receipts, applications, where):
+    return f"""INSERT INTO receipt_daily_rollup
+               (receipt_date, copy_type, application_category, payment_type, receipt_count, total_paise)
+               {_rollup_select(receipts, applications, where)}"""
+
+
+@retry_on_busy
+def _recompute_days(conn, days, archived):
+    """Recomputes the rollup for `days` in one transaction and clears their marks.
+
+    Once any year is `archived`, every day reads the all_* views: a receipt is archived with
+    its application's year, which need not be the year it was paid in. Without an archive
+    the working tables are read through their indexes only.
+    """
+    rebuild = ROLLUP_REBUILD in days
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if rebuild:
+            conn.execute("DELETE FROM receipt_daily_rollup")
+            conn.execute(_rollup_insert("all_receipts", _application_lookup(conn), "r.receipt_date IS NOT NULL"))
+            conn.execute("DELETE FROM receipt_rollup_dirty")
+        else:
+            for batch in chunked(days):
+                marks = ",".join("?" * len(batch))
+                where = f"r.receipt_date IN ({marks})"
+                conn.execute(f"DELETE FROM receipt_daily_rollup WHERE receipt_date IN ({marks})", batch)
+                if archived:
+                    conn.execute(_rollup_insert("all_receipts", _application_lookup(conn, where, batch), where), batch)
+                else:
+                    conn.execute(_rollup_insert("main.receipt_register", "main.true_copy_applications", where), batch)
+                conn.execute(f"DELETE FROM receipt_rollup_dirty WHERE receipt_date IN ({marks})", batch)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.rollup_applications")
+
+
+def refresh_rollup(conn):
+    """Brings receipt_daily_rollup up to date with every write since the last refresh; returns the days redone.
+
+    Cheap when nothing changed: one lookup in receipt_rollup_dirty. Must be called outside a
+    transaction, since archived days need the archive attached.
+    """
+    days = [row[0] for row in conn.execute("SELECT receipt_date FROM receipt_rollup_dirty")]
+    if not days:
+        return 0
+    attach_archive(conn)  # Also redefines the views, so years archived since are included
+    _recompute_days(conn, days, set(archive_years(conn)))
+    return len(days)
+
+
+def rebuild_rollup(conn):
+    """Recomputes the whole rollup from both registers, archived years included."""
+    conn.execute("INSERT OR IGNORE INTO receipt_rollup_dirty (receipt_date) VALUES (?)", (ROLLUP_REBUILD,))
+    conn.commit()
+    refresh_rollup(conn)
+
+
+def collections(conn, start=None, end=None, period="month", cache=None):
+    """Returns collections between two YYYY-MM-DD dates (inclusive; open-ended when None).
+
+    Rows are sqlite3.Rows (or tuples) of REPORT_COLUMNS, one per period, copy type, category
+    and payment type, in that order; `period` is "day", "month" or "year". Reads the rollup
+    after refreshing it, and goes through `cache` (a ReportCache) when given.
+    """
+    if period not in REPORT_PERIODS:
+        raise ValueError(f"Unknown report period: {period}")
+    refresh_rollup(conn)
+    if cache is None:
+        return _read_collections(conn, start, end, period)
+    return cache.get(conn, ("collections", start, end, period),
+                     lambda: _read_collections(conn, start, end, period))
+
+
+def _read_collections(conn, start, end, period):
+    length = REPORT_PERIODS[period]
+    return conn.execute(f"""SELECT substr(receipt_date, 1, {length}) AS period, copy_type, application_category,
+                                   payment_type, SUM(receipt_count) AS receipt_count, SUM(total_paise) AS total_paise
+                            FROM receipt_daily_rollup
+                            WHERE receipt_date BETWEEN ? AND ?
+                            GROUP BY 1, 2, 3, 4
+                            ORDER BY 1, 2, 3, 4""", (start or "", end or "9999-12-31")).fetchall()
+
+
+def collection_totals(rows):
+    """Returns (receipt count, total paise) per period for collections() rows, in period order."""
+    totals = OrderedDict()
+    for row in rows:
+        count, paise = totals.get(row[0], (0, 0))
+        totals[row[0]] = (count + row[4], paise + row[5])
+    return totals
+
+
+class ReportCache:
+    """Report results for one connection, least recently used dropped first.
+
+    Every result is dropped once the database changes: another connection's write moves
+    PRAGMA data_version, and one of our own moves the connection's total_changes.
+    """
+
+    def __init__(self, size=REPORT_CACHE_SIZE):
+        self.size = size
+        self._results = OrderedDict()
+        self._state = None
+
+    def get(self, conn, key, compute):
+        """Returns the cached result for `key`, or computes, caches and returns it."""
+        state = (data_version(conn), conn.total_changes)
+        if state != self._state:
+            self._results.clear()
+            self._state = state
+        if key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+        result = self._results[key] = compute()
+        if len(self._results) > self.size:
+            self._results.popitem(last=False)
+        return result
+
+
+def verify_rollup(conn):
+    """Compares the rollup with a fresh GROUP BY of both registers; returns the rows that differ."""
+    refresh_rollup(conn)
+    attach_archive(conn)
+    stored = {tuple(row[:4]): tuple(row[4:]) for row in conn.execute("SELECT * FROM receipt_daily_rollup")}
+    try:
+        expected = {tuple(row[:4]): tuple(row[4:]) for row in conn.execute(
+            _rollup_select("all_receipts", _application_lookup(conn), "r.receipt_date IS NOT NULL"))}
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.rollup_applications")
+        conn.commit()
+    return [(key, stored.get(key), expected.get(key)) for key in sorted(stored.keys() | expected.keys())
+            if stored.get(key) != expected.get(key)]
+
+
+def main(argv=None):
+    """Command-line collections report."""
+    parser = argparse.ArgumentParser(description="Report collections from the receipt register.")
+    parser.add_argument("--db", help="database file (default: the one config.py opens)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("collections", help="print collections per period")
+    report.add_argument("--from", dest="start", default=f"{date.today().year}-01-01", help="first day, YYYY-MM-DD")
+    report.add_argument("--to", dest="end", default=date.today().isoformat(), help="last day, YYYY-MM-DD")
+    report.add_argument("--period", default="month", choices=REPORT_PERIODS)
+    commands.add_parser("verify", help="compare the rollup with the registers")
+    commands.add_parser("rebuild", help="recompute the whole rollup")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        conn = open_connection(args.db)
+    else:
+        from config import get_db_connection  # Import here so --db works without config
+        conn = get_db_connection()
+    try:
+        migrate(conn)
+        if args.command == "rebuild":
+            rebuild_rollup(conn)
+            print("Rollup rebuilt.")
+        elif args.command == "verify":
+            differences = verify_rollup(conn)
+            for key, stored, expected in differences:
+                print(f"{' / '.join(key)}: rollup {stored}, registers {expected}")
+            print(f"{len(differences)} rollup row(s) differ.")
+            return 1 if differences else 0
+        else:
+            rows = collections(conn, args.start, args.end, args.period)
+            totals = collection_totals(rows)
+            for row in rows:
+                print(f"{row[0]:<10} {row[1]:<15} {row[2] or '-':<9} {row[3]:<9} {row[4]:>8} "
+                      f"{format_rupees(row[5]):>14}")
+            for period, (count, paise) in totals.items():
+                print(f"{period:<10} {'Total':<35} {count:>8} {format_rupees(paise):>14}")
+            print(f"{'All':<10} {'':<35} {sum(c for c, _ in totals.values()):>8} "
+                  f"{format_rupees(sum(p for _, p in totals.values())):>14}")
+    except sqlite3.Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
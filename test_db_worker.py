@@ -0,0 +1,56 @@
+# --- test_db_worker.py ---
+
+"""Tests for DbWorker, with a stand-in for the Tk widget whose poll loop is never run."""
+
+import threading
+
+from db_worker import DbWorker
+
+
+class FakeWidget:
+    def after(self, ms, func):
+        return "after#1"
+
+    def after_cancel(self, after_id):
+        pass
+
+    def report_callback_exception(self, *exc_info):
+        raise AssertionError(f"unhandled {exc_info[1]!r}")
+
+
+class FakeDb:
+    def __init__(self):
+        self.closed = False
+
+    def connection(self):
+        return None
+
+    def interrupt(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_drain_delivers_every_result_including_follow_up_work():
+    worker = DbWorker(FakeWidget(), FakeDb(), pass_connection=False)
+    results = []
+    worker.submit(lambda: 1, callback=lambda result: (results.append(result),
+                                                      worker.submit(lambda: 2, callback=results.append)))
+    worker.submit(lambda: 1 / 0, errback=lambda e: results.append(type(e).__name__))
+    worker.drain()
+    assert results == [1, "ZeroDivisionError", 2]
+    assert worker.idle()
+    worker.stop()
+
+
+def test_stop_waits_for_queued_writes():
+    db = FakeDb()
+    worker = DbWorker(FakeWidget(), db, pass_connection=False)
+    release = threading.Event()
+    written = []
+    worker.submit(lambda: release.wait(10) and written.append("slow write"))
+    threading.Timer(0.2, release.set).start()
+    worker.stop()
+    assert written == ["slow write"]
+    assert db.closed
@@ -0,0 +1,121 @@
+# --- test_entry_archive.py ---
+
+"""Tests for moving disposed applications into the archive file and finding them there."""
+
+from datetime import date
+
+import pytest
+
+import entry_archive
+from entry_archive import archive_disposed, archive_years, attach_archive, find_applications, find_receipts
+from entry_seed import create_database, seed_database
+from entry_store import EntryValidationError, fetch_entry_detail, save_entries, update_entry
+
+CUTOFF = f"{date.today().year}-01-01"
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = seed_database(create_database(str(tmp_path / "court.db")), 1000)
+    yield conn
+    conn.close()
+
+
+def counts(conn, tables=("main.true_copy_applications", "main.receipt_register")):
+    return tuple(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables)
+
+
+def archived_application(conn):
+    return conn.execute("""SELECT * FROM all_true_copy_applications a
+                           WHERE NOT EXISTS (SELECT 1 FROM main.true_copy_applications m WHERE m.id = a.id)
+                           AND receipt_number <> ''
+                           LIMIT 1""").fetchone()
+
+
+def test_archive_moves_disposed_rows_by_year(conn, tmp_path):
+    moving = conn.execute("""SELECT COUNT(*) FROM true_copy_applications
+                             WHERE status = 'Disposed' AND application_date < ?""", (CUTOFF,)).fetchone()[0]
+    applications, receipts = counts(conn)
+    assert archive_disposed(conn, CUTOFF, batch_size=100) == moving > 0
+    assert (tmp_path / "court_archive.db").exists()
+
+    assert counts(conn) == (applications - moving, receipts - moving)
+    assert conn.execute("""SELECT COUNT(*) FROM true_copy_applications
+                           WHERE status = 'Disposed' AND application_date < ?""", (CUTOFF,)).fetchone()[0] == 0
+    assert counts(conn, ("all_true_copy_applications", "all_receipts")) == (applications, receipts)
+    years = archive_years(conn)
+    assert years and max(years) < date.today().year
+    for year in years:
+        assert conn.execute(f"""SELECT COUNT(*) FROM archive.true_copy_applications_{year}
+                                WHERE substr(application_date, 1, 4) <> '{year}'""").fetchone()[0] == 0
+
+
+def test_receipts_reach_the_archive_before_they_are_deleted(conn, monkeypatch):
+    seen = []
+    delete_batch = entry_archive._delete_batch
+
+    def checked_delete(conn, entry_ids, receipt_ids):
+        for receipt_id in receipt_ids:
+            assert any(conn.execute(f"SELECT 1 FROM archive.receipt_register_{year} WHERE id = ?",
+                                    (receipt_id,)).fetchone() for year in archive_years(conn))
+        seen.extend(receipt_ids)
+        return delete_batch(conn, entry_ids, receipt_ids)
+
+    monkeypatch.setattr(entry_archive, "_delete_batch", checked_delete)
+    archive_disposed(conn, CUTOFF, batch_size=100)
+    assert seen
+
+
+def test_archived_rows_can_still_be_found(conn):
+    archive_disposed(conn, CUTOFF)
+    application = archived_application(conn)
+    assert [row["id"] for row in find_applications(conn, true_copy_number=application["true_copy_number"])
+            if row["application_category"] == application["application_category"]] == [application["id"]]
+    assert [row["id"] for row in find_applications(conn, receipt_number=application["receipt_number"])] == [
+        application["id"]]
+    receipts = find_receipts(conn, receipt_number=application["receipt_number"])
+    assert [row["true_copy_number"] for row in receipts] == [application["true_copy_number"]]
+
+
+def test_a_receipt_shared_with_a_working_application_stays(conn):
+    disposed = conn.execute("""SELECT id, receipt_number FROM true_copy_applications
+                               WHERE status = 'Disposed' AND application_date < ? AND receipt_number <> ''
+                               LIMIT 1""", (CUTOFF,)).fetchone()
+    conn.execute("""UPDATE true_copy_applications SET receipt_number = ?
+                    WHERE id = (SELECT MAX(id) FROM true_copy_applications WHERE status = 'Pending')""",
+                 (disposed["receipt_number"],))
+    conn.commit()
+    archive_disposed(conn, CUTOFF)
+    assert conn.execute("SELECT COUNT(*) FROM main.receipt_register WHERE receipt_number = ?",
+                        (disposed["receipt_number"],)).fetchone()[0] == 1
+
+
+def test_archived_numbers_cannot_be_typed_again(conn):
+    archive_disposed(conn, CUTOFF)
+    application = archived_application(conn)
+    entry = {"application_date": date.today().isoformat(), "copy_type": application["copy_type"],
+             "application_category": application["application_category"], "advance_amount": "50",
+             "payment_type": "advance"}
+    saved, errors = save_entries(conn, [dict(entry, receipt_number=application["receipt_number"]),
+                                        dict(entry, true_copy_number=application["true_copy_number"])])
+    assert saved == []
+    assert [message for _, message in errors] == [
+        f"Receipt number {application['receipt_number']} already exists!",
+        f"True Copy # {application['true_copy_number']} already exists!"]
+
+    pending_id = conn.execute("SELECT MAX(id) FROM true_copy_applications WHERE status = 'Pending'").fetchone()[0]
+    detail, payment_type = fetch_entry_detail(conn, pending_id)
+    edited = dict(detail, payment_type=payment_type or "advance", advance_amount=str(detail["advance_amount"]))
+    with pytest.raises(EntryValidationError, match="Receipt number"):
+        update_entry(conn, pending_id, dict(edited, receipt_number=application["receipt_number"]),
+                     detail["row_version"])
+
+
+def test_without_the_views_only_working_tables_are_checked(tmp_path):
+    conn = seed_database(create_database(str(tmp_path / "court.db")), 200)
+    assert attach_archive(conn) == []  # No archive file yet: the views cover the working tables
+    saved, errors = save_entries(conn, [{"application_date": date.today().isoformat(), "copy_type": "Simple Copy",
+                                         "advance_amount": "5", "payment_type": "advance",
+                                         "receipt_number": "R-new"}])
+    assert (len(saved), errors) == (1, [])
+    conn.close()
@@ -0,0 +1,96 @@
+# --- test_entry_queue.py ---
+
+"""Tests for rapid entry's EntryQueue, alone and against save_entries."""
+
+import pytest
+
+from entry_queue import EntryQueue
+from entry_seed import create_database
+from entry_store import migrate, peek_true_copy_number, save_entries, validate_entry
+
+KEY = ("Certified Copy", "Urgent", 2024)
+
+
+def make_entry(**changes):
+    entry = {"application_date": "2024-05-06", "copy_type": "Certified Copy", "application_category": "Urgent",
+             "true_copy_number": "", "advance_amount": "50", "receipt_number": "", "payment_type": "advance",
+             "receipt_date": "2024-05-06"}
+    entry.update(changes)
+    return validate_entry(entry)
+
+
+@pytest.fixture
+def conn():
+    conn = create_database()
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def test_put_predicts_consecutive_numbers():
+    entries = EntryQueue()
+    first = entries.put(make_entry(), KEY, "CC/005/2024", 41)
+    second = entries.put(make_entry(), KEY, "CC/005/2024", 41)  # Stored counters unchanged until saved
+    assert (first.true_copy_number, first.receipt_number) == ("CC/005/2024", "42")
+    assert (second.true_copy_number, second.receipt_number) == ("CC/006/2024", "43")
+    assert entries.next_true_copy_number(KEY, "CC/005/2024") == "CC/007/2024"
+    assert entries.next_true_copy_number(KEY, "CC/009/2024") == "CC/009/2024"  # Someone else saved meanwhile
+    assert entries.last_receipt_number(41) == 43
+    assert len(entries) == 2
+
+
+def test_put_without_stored_counters_predicts_nothing():
+    queued = EntryQueue().put(make_entry(), KEY)
+    assert (queued.true_copy_number, queued.receipt_number) == (None, None)
+
+
+def test_typed_numbers_move_the_predictions():
+    entries = EntryQueue()
+    typed = entries.put(make_entry(true_copy_number="CC/020/2024", receipt_number="100"), KEY, "CC/005/2024", 41)
+    assert (typed.true_copy_number, typed.receipt_number) == (None, None)
+    after = entries.put(make_entry(), KEY, "CC/005/2024", 41)
+    assert (after.true_copy_number, after.receipt_number) == ("CC/021/2024", "101")
+
+
+def test_take_limits_the_batch_and_finish_sorts_out_rejects():
+    entries = EntryQueue()
+    for _ in range(3):
+        entries.put(make_entry(), KEY, "CC/001/2024", 0)
+    batch = entries.take(2)
+    assert len(batch) == 2 and len(entries.waiting) == 1 and len(entries) == 3
+    saved, failed = entries.finish(([dict(batch[1], true_copy_number="CC/002/2024", receipt_number="2")],
+                                    [(0, "Receipt number 1 already exists!")]))
+    assert [queued.true_copy_number for queued, _ in saved] == ["CC/002/2024"]
+    assert not saved[0][0].renumbered(saved[0][1])
+    assert [(queued.true_copy_number, message) for queued, message in failed] == [
+        ("CC/001/2024", "Receipt number 1 already exists!")]
+    assert list(entries.failed) == failed
+    assert (entries.saved_count, len(entries), entries.in_flight) == (1, 1, [])
+
+
+def test_retry_puts_the_batch_back_in_order():
+    entries = EntryQueue()
+    queued = [entries.put(make_entry(), KEY, "CC/001/2024", 0) for _ in range(3)]
+    entries.take(2)
+    entries.retry()
+    assert list(entries.waiting) == queued
+    assert entries.take(5) == [item.entry for item in queued]
+
+
+def test_queued_entries_save_under_the_predicted_numbers(conn):
+    entries = EntryQueue()
+    for _ in range(3):
+        entries.put(make_entry(), KEY, peek_true_copy_number(conn, *KEY), 0)
+    saved, failed = entries.finish(save_entries(conn, entries.take(10), year=2024))
+    assert failed == []
+    assert [entry["true_copy_number"] for _, entry in saved] == ["CC/001/2024", "CC/002/2024", "CC/003/2024"]
+    assert not any(queued.renumbered(entry) for queued, entry in saved)
+
+
+def test_an_entry_saved_in_between_is_reported_as_renumbered(conn):
+    entries = EntryQueue()
+    queued = entries.put(make_entry(), KEY, peek_true_copy_number(conn, *KEY), 0)
+    save_entries(conn, [make_entry()], year=2024)  # Another clerk
+    (_, entry), = entries.finish(save_entries(conn, entries.take(10), year=2024))[0]
+    assert queued.renumbered(entry)
+    assert (entry["true_copy_number"], entry["receipt_number"]) == ("CC/002/2024", "2")
@@ -0,0 +1,286 @@
+# --- test_entry_store.py ---
+
+"""Tests for entry_store's validation, saves, edits and migrations, against an in-memory database."""
+
+import pytest
+
+import entry_store
+from entry_seed import create_database
+from entry_store import (MIGRATIONS, ROLLUP_REBUILD, EntryConflictError, EntryValidationError, fetch_entry_detail,
+                         last_receipt_number, migrate, peek_true_copy_number, save_entries, update_entry,
+                         validate_entry, verify_pending_summary)
+
+
+@pytest.fixture
+def conn():
+    conn = create_database()
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def make_entry(**changes):
+    entry = {
+        "application_date": "2024-05-06",
+        "copy_type": "Certified Copy",
+        "application_category": "Urgent",
+        "true_copy_number": "",
+        "advance_amount": "50",
+        "receipt_number": "",
+        "payment_type": "advance",
+        "receipt_date": "2024-05-07",
+    }
+    entry.update(changes)
+    return entry
+
+
+def test_validate_entry_normalizes():
+    entry = validate_entry(make_entry(advance_amount="12.345", true_copy_number=" CC/001/2024 "))
+    assert entry["advance_paise"] == 1235
+    assert entry["advance_amount"] == 12.35
+    assert entry["true_copy_number"] == "CC/001/2024"
+    assert entry["receipt_number"] is None
+    assert entry["receipt_date"] == "2024-05-07"
+
+
+def test_validate_entry_drops_category_of_simple_copy():
+    assert validate_entry(make_entry(copy_type="Simple Copy", application_category="Urgent"))[
+        "application_category"] is None
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"payment_type": ""}, "All fields are required!"),
+    ({"advance_amount": ""}, "All fields are required!"),
+    ({"copy_type": "Photo Copy"}, "Unknown copy type"),
+    ({"application_category": ""}, "Category is required"),
+    ({"application_category": "Weird"}, "Unknown category"),
+    ({"payment_type": "cash"}, "Unknown receipt category"),
+    ({"application_date": "06/05/2024"}, "Invalid application date"),
+    ({"receipt_date": "2024-13-01"}, "Invalid receipt date"),
+    ({"advance_amount": "fifty"}, "valid number"),
+    ({"advance_amount": "-5"}, "cannot be negative"),
+    ({"advance_amount": "1e20"}, "cannot be over 10000000.00"),
+    ({"advance_amount": "1e30"}, "valid number"),
+])
+def test_validate_entry_rejects(changes, message):
+    with pytest.raises(EntryValidationError, match=message):
+        validate_entry(make_entry(**changes))
+
+
+def test_save_entries_allocates_numbers(conn):
+    saved, errors = save_entries(conn, [make_entry(), make_entry(), make_entry(copy_type="Simple Copy")], year=2024)
+    assert errors == []
+    assert [entry["true_copy_number"] for entry in saved] == ["CC/001/2024", "CC/002/2024", "SC/001/2024"]
+    assert [entry["receipt_number"] for entry in saved] == ["1", "2", "3"]
+    rows = conn.execute("SELECT receipt_number, receipt_date, amount_paise FROM receipt_register ORDER BY id")
+    assert [tuple(row) for row in rows] == [("1", "2024-05-07", 5000), ("2", "2024-05-07", 5000),
+                                            ("3", "2024-05-07", 5000)]
+
+
+def test_save_entries_reports_rejects_and_saves_the_rest(conn):
+    save_entries(conn, [make_entry(receipt_number="7", true_copy_number="CC/005/2024")])
+    saved, errors = save_entries(conn, [
+        make_entry(advance_amount="-1"),
+        make_entry(receipt_number="7"),  # Already in the register
+        make_entry(receipt_number="8"),
+        make_entry(receipt_number="8"),  # Repeated within the batch
+        make_entry(true_copy_number="CC/005/2024"),  # Taken in its category...
+        make_entry(true_copy_number="CC/005/2024", application_category="Ordinary"),  # ...but not in this one
+    ], year=2024)
+    assert [index for index, _ in errors] == [0, 1, 3, 4]
+    assert "negative" in errors[0][1]
+    assert [entry["receipt_number"] for entry in saved] == ["8", "9"]
+    assert saved[0]["true_copy_number"] == "CC/006/2024"  # Counter moved past the typed number
+    assert conn.execute("SELECT COUNT(*) FROM true_copy_applications").fetchone()[0] == 3
+
+
+def test_save_entries_rolls_back_on_any_error(conn, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("broken")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(entry_store, "_existing_true_copy_numbers", broken)
+        with pytest.raises(RuntimeError):
+            save_entries(conn, [make_entry()], year=2024)
+    assert not conn.in_transaction
+    saved, errors = save_entries(conn, [make_entry()], year=2024)
+    assert (len(saved), errors) == (1, [])
+
+
+def test_save_entries_rejects_huge_amounts_and_saves_the_rest(conn):
+    saved, errors = save_entries(conn, [make_entry(advance_amount="1e20"), make_entry(advance_amount="1e30"),
+                                        make_entry(advance_amount="10000000")], year=2024)
+    assert [index for index, _ in errors] == [0, 1]
+    assert [entry["advance_paise"] for entry in saved] == [10 ** 9]
+    assert not conn.in_transaction
+
+
+def test_save_entries_numbers_by_application_year(conn):
+    saved, _ = save_entries(conn, [make_entry(application_date="2019-03-04"), make_entry()],
+                            by_application_year=True)
+    assert [entry["true_copy_number"] for entry in saved] == ["CC/001/2019", "CC/001/2024"]
+
+
+def saved_entry(conn, **changes):
+    saved, _ = save_entries(conn, [make_entry(**changes)], year=2024)
+    entry_id = conn.execute("SELECT MAX(id) FROM true_copy_applications").fetchone()[0]
+    return entry_id, saved[0]
+
+
+def edit(entry, **changes):
+    edited = dict(entry, **changes)
+    edited["advance_amount"] = str(edited["advance_amount"])
+    return edited
+
+
+def test_update_entry_saves_both_tables(conn):
+    entry_id, entry = saved_entry(conn)
+    updated = update_entry(conn, entry_id, edit(entry, advance_amount=75, payment_type="recovery"), 1)
+    assert updated["row_version"] == 2
+    row, payment_type = fetch_entry_detail(conn, entry_id)
+    assert (row["advance_amount"], row["row_version"], payment_type) == (75.0, 2, "recovery")
+    assert conn.execute("SELECT amount_paise FROM receipt_register").fetchone()[0] == 7500
+    assert verify_pending_summary(conn) == []
+
+
+def test_update_entry_rejects_a_stale_version(conn):
+    entry_id, entry = saved_entry(conn)
+    update_entry(conn, entry_id, edit(entry, advance_amount=60), 1)
+    with pytest.raises(EntryConflictError):
+        update_entry(conn, entry_id, edit(entry, advance_amount=70), 1)
+    assert fetch_entry_detail(conn, entry_id)[0]["advance_amount"] == 60.0
+
+
+def test_update_entry_sees_other_screens_updates(conn):
+    entry_id, entry = saved_entry(conn)
+    conn.execute("UPDATE true_copy_applications SET received_date = '2024-05-08' WHERE id = ?", (entry_id,))
+    conn.commit()  # The trigger bumps row_version for screens that do not know about it
+    with pytest.raises(EntryConflictError):
+        update_entry(conn, entry_id, edit(entry), 1)
+
+
+def test_update_entry_rejects_a_disposed_entry(conn):
+    entry_id, entry = saved_entry(conn)
+    conn.execute("UPDATE true_copy_applications SET status = 'Disposed' WHERE id = ?", (entry_id,))
+    conn.commit()
+    with pytest.raises(EntryConflictError):  # Even at the version it has now
+        update_entry(conn, entry_id, edit(entry), fetch_entry_detail(conn, entry_id)[0]["row_version"])
+
+
+def test_update_entry_finds_the_receipt_after_its_amount_changed(conn):
+    entry_id, entry = saved_entry(conn)
+    conn.execute("UPDATE receipt_register SET amount = 55")  # Corrected on the receipt screen
+    conn.commit()
+    update_entry(conn, entry_id, edit(entry, advance_amount=80), 1)
+    assert conn.execute("SELECT amount FROM receipt_register").fetchone()[0] == 80.0
+
+
+def test_update_entry_rolls_back_without_its_receipt(conn):
+    entry_id, entry = saved_entry(conn)
+    conn.execute("DELETE FROM receipt_register")
+    conn.commit()
+    with pytest.raises(EntryConflictError, match="no longer in the receipt register"):
+        update_entry(conn, entry_id, edit(entry, advance_amount=80), 1)
+    assert fetch_entry_detail(conn, entry_id)[0]["row_version"] == 1
+
+
+def test_update_entry_rolls_back_on_any_error(conn, monkeypatch):
+    entry_id, entry = saved_entry(conn)
+    with monkeypatch.context() as patch:
+        patch.setattr(entry_store, "_existing_true_copy_numbers", lambda *args, **kwargs: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            update_entry(conn, entry_id, edit(entry, advance_amount=80), 1)
+    assert not conn.in_transaction
+    assert update_entry(conn, entry_id, edit(entry, advance_amount=80), 1)["row_version"] == 2
+
+
+def test_update_entry_rejects_numbers_in_use(conn):
+    entry_id, entry = saved_entry(conn)
+    other_id, other = saved_entry(conn)
+    with pytest.raises(EntryValidationError, match="Receipt number"):
+        update_entry(conn, entry_id, edit(entry, receipt_number=other["receipt_number"]), 1)
+    with pytest.raises(EntryValidationError, match="True Copy #"):
+        update_entry(conn, entry_id, edit(entry, true_copy_number=other["true_copy_number"]), 1)
+    with pytest.raises(EntryValidationError, match="required"):
+        update_entry(conn, entry_id, edit(entry, true_copy_number=None), 1)
+
+
+# Rows as the older screens left them: hand-typed receipt numbers, text-ordered numbers,
+# REAL amounts that do not add up exactly and a True Copy # typed in twice
+LEGACY_APPLICATIONS = [
+    ("2023-04-01", "Certified Copy", "Urgent", "CC/009/2023", 0.1, "9", "Disposed"),
+    ("2023-04-02", "Certified Copy", "Urgent", "CC/010/2023", 0.2, "10", "Pending"),
+    ("2023-04-03", "Certified Copy", "Ordinary", "CC/004/2023", 0.2, "R-12", "Pending"),
+    ("2023-04-04", "Simple Copy", None, "SC/002/2023", 20.0, "11", "Pending"),
+    ("2023-04-05", "Simple Copy", None, "SC/002/2023", 20.0, "", "Pending"),
+    ("2023-04-06", "Certified Copy", "Urgent", "old style", 5.0, "13", "Pending"),
+]
+
+
+@pytest.fixture
+def legacy():
+    conn = create_database()
+    conn.executemany("""INSERT INTO true_copy_applications
+                        (application_date, copy_type, application_category, true_copy_number, received_date,
+                         advance_amount, receipt_number, status)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                     [row[:4] + row[:1] + row[4:] for row in LEGACY_APPLICATIONS])
+    conn.executemany("""INSERT INTO receipt_register (receipt_date, receipt_number, payment_type, amount,
+                                                      true_copy_number)
+                        VALUES (?, ?, 'advance', ?, ?)""",
+                     [(row[0], row[5], row[4], row[3]) for row in LEGACY_APPLICATIONS if row[5]])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_migrations_apply_to_legacy_data(legacy):
+    migrate(legacy)
+    applied = [row[0] for row in legacy.execute("SELECT name FROM entry_schema_migrations ORDER BY name")]
+    assert applied == [name for name, _ in MIGRATIONS]
+
+    # Counters continue after the numbers already issued, by number rather than text order
+    assert last_receipt_number(legacy) == 13
+    assert peek_true_copy_number(legacy, "Certified Copy", "Urgent", 2023) == "CC/011/2023"
+    assert peek_true_copy_number(legacy, "Certified Copy", "Ordinary", 2023) == "CC/005/2023"
+    assert peek_true_copy_number(legacy, "Simple Copy", None, 2023) == "SC/003/2023"
+
+    # Money in exact paise, and a summary that agrees with the table
+    paise = dict(legacy.execute("SELECT receipt_number, advance_paise FROM true_copy_applications"))
+    assert (paise["9"], paise["10"], paise["R-12"]) == (10, 20, 20)
+    assert verify_pending_summary(legacy) == []
+    assert legacy.execute("SELECT SUM(total_paise) FROM pending_summary").fetchone()[0] == 20 + 20 + 2000 * 2 + 500
+
+    # Every row starts at version 1; the duplicate True Copy # leaves its unique index out
+    assert {row[0] for row in legacy.execute("SELECT row_version FROM true_copy_applications")} == {1}
+    indexes = {row[0] for row in legacy.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "receipt_register_number_unique" in indexes
+    assert "true_copy_number_unique" not in indexes
+
+    # The first report rebuilds the whole rollup
+    assert [row[0] for row in legacy.execute("SELECT receipt_date FROM receipt_rollup_dirty")] == [ROLLUP_REBUILD]
+
+
+def test_receipt_counter_skips_hand_typed_numbers(legacy):
+    legacy.execute("""INSERT INTO receipt_register (receipt_date, receipt_number, payment_type, amount)
+                      VALUES ('2023-04-07', '2023/150', 'advance', 5.0)""")
+    legacy.commit()
+    migrate(legacy)
+    assert last_receipt_number(legacy) == 13  # Not 2023150, which the insert trigger would never have set
+
+
+def test_migrate_twice_changes_nothing(legacy):
+    migrate(legacy)
+    schema = [tuple(row) for row in legacy.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name")]
+    migrate(legacy)
+    assert [tuple(row) for row in legacy.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name")] == schema
+
+
+def test_saves_after_migrating_legacy_data(legacy):
+    migrate(legacy)
+    saved, errors = save_entries(legacy, [make_entry(application_date="2023-05-01"),
+                                          make_entry(true_copy_number="SC/002/2023", copy_type="Simple Copy")],
+                                 year=2023)
+    assert [entry["receipt_number"] for entry in saved] == ["14"]
+    assert saved[0]["true_copy_number"] == "CC/011/2023"
+    assert errors == [(1, "True Copy # SC/002/2023 already exists!")]
@@ -0,0 +1,30 @@
+# --- test_money.py ---
+
+"""Tests for parsing and formatting rupee amounts as paise."""
+
+import pytest
+
+from money import format_rupees, to_paise
+
+
+@pytest.mark.parametrize("value, paise", [
+    ("50", 5000),
+    ("1,250.5", 125050),
+    ("₹12.75", 1275),
+    (12.345, 1235),  # Half a paisa rounds up
+    (0.1 + 0.2, 30),
+    (7, 700),
+    ("1e20", 10 ** 22),
+])
+def test_to_paise(value, paise):
+    assert to_paise(value) == paise
+
+
+@pytest.mark.parametrize("value", ["", "fifty", "NaN", "Infinity", True, "1e30"])
+def test_to_paise_rejects_with_value_error(value):
+    with pytest.raises(ValueError):
+        to_paise(value)
+
+
+def test_format_rupees():
+    assert [format_rupees(paise) for paise in (125050, 5, -1275, 0)] == ["1250.50", "0.05", "-12.75", "0.00"]
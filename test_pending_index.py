@@ -0,0 +1,133 @@
+# --- test_pending_index.py ---
+
+"""Tests for PendingIndex's prefix search, sorting and incremental updates."""
+
+import random
+
+import pytest
+
+import pending_index
+from entry_seed import create_database, seed_database
+from pending_index import COLUMNS, PendingIndex, load_pending_index
+
+
+def make_row(entry_id, date, copy_type="Certified Copy", category="Urgent", true_copy_number=None, amount=50.0,
+             receipt_number=None, payment_type="advance"):
+    prefix = "CC" if copy_type == "Certified Copy" else "SC"
+    return (entry_id, date, copy_type, category, true_copy_number or f"{prefix}/{entry_id:03}/2024", amount,
+            receipt_number or str(100 + entry_id), payment_type, 1)
+
+
+@pytest.fixture
+def index():
+    # Oldest first, as load_pending_index reads them
+    return PendingIndex([
+        make_row(2, "2024-01-03", copy_type="Simple Copy", category=None, amount=20.0),
+        make_row(1, "2024-01-05"),
+        make_row(4, "2024-01-20", amount=20.0, receipt_number="1999"),
+        make_row(3, "2024-02-01", category="Ordinary", payment_type="recovery"),
+        make_row(5, "2024-03-11", copy_type="Simple Copy", category=None),
+    ])
+
+
+def ids(rows):
+    return [row[COLUMNS.index("id")] for row in rows]
+
+
+def test_empty_query_returns_everything_newest_first(index):
+    total, rows = index.search()
+    assert total == 5
+    assert ids(rows) == [5, 3, 4, 1, 2]
+    assert ids(index.search(descending=False, limit=2)[1]) == [2, 1]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("cc/", [3, 4, 1]),  # True Copy # prefix, case-insensitive
+    ("SC", [5, 2]),
+    ("10", [5, 3, 1, 2]),  # Receipt # prefix: 101 to 105, not 1999
+    ("19", [4]),
+    ("2024-01", [4, 1, 2]),  # Date prefix
+    ("simple", [5, 2]),  # Copy type prefix
+    ("ord", [3]),  # Category prefix
+    ("recov", [3]),  # Receipt category prefix
+    ("₹20", [4, 2]),  # Amount
+    ("cc ₹20", [4]),  # Every token must match
+    ("₹20 simple", [2]),
+    ("nothing", []),
+])
+def test_prefix_search(index, query, expected):
+    total, rows = index.search(query)
+    assert total == len(expected)
+    assert ids(rows) == expected
+
+
+def test_limit_keeps_total(index):
+    total, rows = index.search("cc", limit=1)
+    assert total == 3
+    assert ids(rows) == [3]
+
+
+def test_ties_keep_application_date_order(index, monkeypatch):
+    # Sorted by copy type, equal ones stay in application date order (newest first when descending),
+    # whether the matches are sorted directly or found by walking the column's index
+    sort_column = COLUMNS.index("copy_type")
+    assert ids(index.search(sort_column=sort_column)[1]) == [5, 2, 3, 4, 1]
+    assert ids(index.search(sort_column=sort_column, descending=False)[1]) == [1, 4, 3, 2, 5]
+    for fraction in (0, 10 ** 6):  # Never sort the matches directly, then always
+        monkeypatch.setattr(pending_index, "SMALL_MATCH_FRACTION", fraction)
+        assert ids(index.search("10", sort_column=sort_column)[1]) == [5, 2, 3, 1]
+        assert ids(index.search("10", sort_column=sort_column, descending=False)[1]) == [1, 3, 2, 5]
+
+
+def test_apply_inserts_updates_and_removes(index):
+    index.apply(6, make_row(6, "2024-04-01", true_copy_number="CC/777/2024"))
+    assert ids(index.search("cc/777")[1]) == [6]
+    index.apply(6, make_row(6, "2024-04-01", true_copy_number="CC/778/2024"))
+    assert index.search("cc/777") == (0, [])
+    assert ids(index.search("cc/778")[1]) == [6]
+    index.apply(1, None)  # Disposed of
+    assert len(index) == 5
+    assert ids(index.search("cc")[1]) == [6, 3, 4]
+    index.apply(7, make_row(7, "2023-12-31"))  # Reuses the freed slot
+    assert ids(index.search("cc", descending=False)[1]) == [7, 4, 3, 6]
+
+
+def test_load_pending_index_matches_the_database():
+    conn = create_database()
+    seed_database(conn, 500)
+    _, index = load_pending_index(conn)
+    pending = conn.execute("SELECT COUNT(*) FROM true_copy_applications WHERE status = 'Pending'").fetchone()[0]
+    assert len(index) == pending
+    newest = conn.execute("""SELECT id FROM true_copy_applications WHERE status = 'Pending'
+                             ORDER BY application_date DESC, id DESC LIMIT 5""").fetchall()
+    assert ids(index.search(limit=5)[1]) == [row[0] for row in newest]
+    conn.close()
+
+
+def test_search_agrees_with_a_plain_filter_and_sort():
+    # Every path: tokens every row matches, one index range (on the sort column or not),
+    # several ranges or tokens, few matches sorted directly and many found by walking
+    rng = random.Random(7)
+    rows = sorted((make_row(entry_id, f"2024-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}",
+                            *rng.choice([("Certified Copy", "Urgent"), ("Certified Copy", "Ordinary"),
+                                         ("Simple Copy", None)]),
+                            amount=rng.choice([5.0, 10.0, 20.0, 50.0]), receipt_number=str(rng.randint(1, 3000)),
+                            payment_type=rng.choice(["advance", "recovery"]))
+                   for entry_id in range(1, 2001)), key=lambda row: (row[1], row[0]))
+    index = PendingIndex(rows)
+
+    def matches(row, token):
+        amount = pending_index._parse_amount(token)
+        return (any(str(row[COLUMNS.index(name)] or "").upper().startswith(token.upper())
+                    for name in pending_index.PREFIX_COLUMNS) or amount == row[pending_index.AMOUNT_COLUMN])
+
+    for query in ("2", "2024", "c", "s", "cc", "sc/", "1", "10", "₹20", "urg", "cert urg", "c 1", "2 adv",
+                  "simple 5"):
+        found = [row for row in rows if all(matches(row, token) for token in query.split())]
+        for sort_column in range(7):
+            for descending in (True, False):
+                expected = sorted(found, reverse=descending,
+                                  key=lambda row: (pending_index._sort_key(sort_column, row[sort_column]), row[1],
+                                                   row[0]))
+                total, got = index.search(query, sort_column, descending, limit=50)
+                assert (total, ids(got)) == (len(found), ids(expected[:50])), (query, sort_column, descending)
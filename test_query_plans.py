@@ -0,0 +1,22 @@
+# --- test_query_plans.py ---
+
+"""Fails when a query the entry screen runs falls back to a full table scan (see check_query_plans.py)."""
+
+from check_query_plans import find_full_scans, plan_problems
+from entry_seed import create_database, seed_database
+from reports import refresh_rollup
+
+
+def test_entry_screen_queries_use_an_index():
+    conn = seed_database(create_database(), 5000)
+    refresh_rollup(conn)  # The first build of the rollup reads every receipt once
+    assert find_full_scans(conn) == []
+    conn.close()
+
+
+def test_a_full_scan_is_reported():
+    conn = seed_database(create_database(), 100)
+    assert plan_problems(conn, "SELECT * FROM true_copy_applications WHERE received_date = '2024-01-01'")
+    assert plan_problems(conn, "SELECT * FROM receipt_register ORDER BY payment_type")
+    assert plan_problems(conn, "SELECT * FROM true_copy_applications WHERE id = 1") == []
+    conn.close()
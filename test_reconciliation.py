@@ -0,0 +1,87 @@
+# --- test_reconciliation.py ---
+
+"""Tests for the vectorized reconciliation report."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from entry_archive import archive_disposed
+from entry_seed import create_database
+from entry_store import migrate
+from reconciliation import REPORT_SECTIONS, reconcile
+
+# (application date, copy type, category, True Copy #, advance, receipt #, status)
+APPLICATIONS = [
+    ("2023-02-01", "Certified Copy", "Urgent", "CC/001/2023", 50.0, "1", "Disposed"),  # Matches its receipt
+    ("2023-02-02", "Certified Copy", "Urgent", "CC/002/2023", 50.0, "2", "Pending"),  # Receipt says 40
+    ("2023-02-03", "Certified Copy", "Ordinary", "CC/002/2023", 20.0, "3", "Pending"),  # Other category: fine
+    ("2023-02-04", "Certified Copy", "Urgent", "CC/002/2023", 20.0, "4", "Pending"),  # Repeats CC/002 Urgent
+    ("2023-02-05", "Simple Copy", None, "SC/001/2023", 10.0, "99", "Pending"),  # No receipt 99
+    ("2023-02-06", "Simple Copy", None, "SC/002/2023", 10.0, "", "Pending"),  # Paid by a recovery below
+]
+# (receipt date, receipt #, payment type, amount, True Copy #)
+RECEIPTS = [
+    ("2023-02-01", "1", "advance", 50.0, "CC/001/2023"),
+    ("2023-02-02", "2", "advance", 40.0, "CC/002/2023"),
+    ("2023-02-03", "3", "advance", 20.0, "CC/002/2023"),
+    ("2023-02-04", "4", "advance", 20.0, "CC/002/2023"),
+    ("2023-02-04", "4", "advance", 20.0, "CC/002/2023"),  # Typed in twice
+    ("2023-02-07", "5", "recovery", 5.0, "SC/002/2023"),  # Matches by True Copy #
+    ("2023-02-08", "6", "advance", 15.0, "SC/404/2023"),  # Matches nothing
+    ("2023-02-09", "", "advance", 5.0, ""),  # No numbers at all: not matched to the blank receipt # above
+]
+
+
+def load(conn):
+    conn.executemany("""INSERT INTO true_copy_applications
+                        (application_date, copy_type, application_category, true_copy_number, received_date,
+                         advance_amount, receipt_number, status)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", [row[:4] + row[:1] + row[4:] for row in APPLICATIONS])
+    conn.executemany("""INSERT INTO receipt_register (receipt_date, receipt_number, payment_type, amount,
+                                                      true_copy_number)
+                        VALUES (?, ?, ?, ?, ?)""", RECEIPTS)
+    conn.commit()
+    migrate(conn)
+    return conn
+
+
+def expected_report():
+    return {
+        "mismatched_amounts": [(2, "2", 5000, 4000)],
+        "missing_receipts": [(5, "99")],
+        "orphan_receipts": [(7, "6", "SC/404/2023"), (8, "", "")],
+        "duplicate_receipt_numbers": [("4", 2)],
+        "duplicate_true_copy_numbers": [("CC/002/2023", "Urgent", 2)],
+    }
+
+
+def test_reconcile_finds_each_problem():
+    conn = load(create_database())
+    report = reconcile(conn)
+    assert list(report) == list(REPORT_SECTIONS)
+    assert report == expected_report()
+    conn.close()
+
+
+def test_reconcile_checks_paise_against_rupees():
+    conn = load(create_database())
+    conn.execute("UPDATE receipt_register SET amount_paise = 4999 WHERE id = 1")  # Written around the triggers
+    conn.commit()
+    assert (None, "1", 5000, 4999) in reconcile(conn)["mismatched_amounts"]
+    conn.close()
+
+
+def test_reconcile_an_empty_register():
+    conn = create_database()
+    migrate(conn)
+    assert reconcile(conn) == {section: [] for section in REPORT_SECTIONS}
+    conn.close()
+
+
+def test_reconcile_includes_archived_years(tmp_path):
+    conn = load(create_database(str(tmp_path / "court.db")))
+    assert archive_disposed(conn, "2024-01-01") == 1
+    assert conn.execute("SELECT COUNT(*) FROM main.receipt_register WHERE receipt_number = '1'").fetchone()[0] == 0
+    assert reconcile(conn) == expected_report()
+    conn.close()
@@ -0,0 +1,63 @@
+# --- test_register_io.py ---
+
+"""Tests for CSV/Excel export and import of the registers."""
+
+import pytest
+
+from entry_seed import create_database, seed_database
+from entry_store import migrate
+from register_io import export_rows, import_entries
+
+IMPORTED = ("application_date", "copy_type", "application_category", "true_copy_number", "advance_amount",
+            "receipt_number")
+
+
+def pending_rows(conn):
+    columns = ", ".join(f"a.{column}" for column in IMPORTED)
+    return sorted(tuple(row) for row in conn.execute(f"""SELECT {columns}, r.payment_type, r.receipt_date
+                                                          FROM true_copy_applications a
+                                                          JOIN receipt_register r ON r.receipt_number = a.receipt_number
+                                                          WHERE a.status = 'Pending'"""))
+
+
+@pytest.fixture
+def source():
+    conn = seed_database(create_database(), 300)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def target():
+    conn = create_database()
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("name", ["pending.csv", "pending.xlsx"])
+def test_pending_export_imports_again(source, target, tmp_path, name):
+    if name.endswith(".xlsx"):
+        pytest.importorskip("openpyxl")
+    path = str(tmp_path / name)
+    count = export_rows(source, "pending", path)
+    assert count == len(pending_rows(source)) > 0
+    errors = []
+    assert import_entries(target, path, batch_size=25, on_error=lambda *error: errors.append(error)) == (count, 0)
+    assert errors == []
+    assert pending_rows(target) == pending_rows(source)
+
+
+def test_import_reports_bad_rows_and_saves_the_rest(target, tmp_path):
+    path = tmp_path / "old_register.csv"
+    path.write_text("application_date,copy_type,application_category,advance_amount,payment_type,receipt_date\n"
+                    "2019-03-04,Certified Copy,Urgent,50,advance,2019-03-05\n"
+                    "2019-03-04,Certified Copy,Urgent,50,advance,\n"
+                    "2019-03-06,Certified Copy,Urgent,1e20,advance,2019-03-06\n"
+                    "2019-03-07,Simple Copy,,20,advance,2019-03-07\n", encoding="utf-8")
+    errors = []
+    assert import_entries(target, str(path), on_error=lambda *error: errors.append(error)) == (2, 2)
+    assert [line for line, _ in errors] == [3, 4]
+    assert not target.in_transaction
+    numbers = [row[0] for row in target.execute("SELECT true_copy_number FROM true_copy_applications ORDER BY id")]
+    assert numbers == ["CC/001/2019", "SC/001/2019"]  # Numbered for their application year
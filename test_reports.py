@@ -0,0 +1,90 @@
+# --- test_reports.py ---
+
+"""Tests for the collections rollup: dirty-day marking, archived days and the report cache."""
+
+import sqlite3
+from datetime import date
+
+import pytest
+
+from entry_archive import archive_disposed
+from entry_seed import create_database, seed_database
+from entry_store import fetch_entry_detail, save_entries, update_entry
+from reports import ReportCache, collection_totals, collections, rebuild_rollup, verify_rollup
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = seed_database(create_database(str(tmp_path / "court.db")), 2000)
+    rebuild_rollup(conn)
+    yield conn
+    conn.close()
+
+
+def entry(**changes):
+    entry = {"application_date": date.today().isoformat(), "copy_type": "Certified Copy",
+             "application_category": "Urgent", "advance_amount": "50", "payment_type": "advance",
+             "receipt_date": date.today().isoformat()}
+    entry.update(changes)
+    return entry
+
+
+def test_rollup_follows_saves_and_edits(conn):
+    assert verify_rollup(conn) == []
+    save_entries(conn, [entry(), entry(copy_type="Simple Copy", receipt_date="2021-06-01")])
+    assert verify_rollup(conn) == []
+
+    entry_id = conn.execute("SELECT MAX(id) FROM true_copy_applications").fetchone()[0]
+    detail, payment_type = fetch_entry_detail(conn, entry_id)
+    update_entry(conn, entry_id, dict(detail, advance_amount="75", payment_type="recovery"), detail["row_version"])
+    assert verify_rollup(conn) == []
+
+
+def test_rollup_follows_other_screens_writes(tmp_path, conn):
+    other = sqlite3.connect(str(tmp_path / "court.db"))
+    other.execute("UPDATE receipt_register SET receipt_date = '2020-02-02' WHERE id = 1")
+    other.execute("UPDATE receipt_register SET amount = amount + 10 WHERE id = 2")
+    other.execute("""UPDATE true_copy_applications SET copy_type = 'Simple Copy', application_category = NULL
+                     WHERE id = (SELECT MIN(id) FROM true_copy_applications WHERE application_category = 'Urgent')""")
+    other.execute("DELETE FROM receipt_register WHERE id = 3")
+    other.commit()
+    other.close()
+    assert verify_rollup(conn) == []
+
+
+def test_archiving_keeps_past_collections(conn):
+    # A receipt paid this year for an application from last year, which is archived while this year is not
+    cutoff = f"{date.today().year}-01-01"
+    receipt_number, = conn.execute("""SELECT receipt_number
+                                      FROM true_copy_applications
+                                      WHERE status = 'Disposed' AND receipt_number <> '' AND application_date < ?
+                                      ORDER BY application_date DESC LIMIT 1""", (cutoff,)).fetchone()
+    later = f"{date.today().year}-01-02"
+    conn.execute("UPDATE receipt_register SET receipt_date = ? WHERE receipt_number = ?", (later, receipt_number))
+    conn.commit()
+    before = [tuple(row) for row in collections(conn, period="year")]
+
+    assert archive_disposed(conn, cutoff) > 0
+    assert verify_rollup(conn) == []
+    conn.execute("INSERT INTO receipt_rollup_dirty (receipt_date) VALUES (?)", (later,))  # Redone from the archive
+    conn.commit()
+    assert [tuple(row) for row in collections(conn, period="year")] == before
+    assert verify_rollup(conn) == []
+
+
+def test_report_cache_drops_results_after_a_write(tmp_path, conn):
+    cache = ReportCache()
+    first = collections(conn, period="year", cache=cache)
+    assert collections(conn, period="year", cache=cache) is first
+
+    save_entries(conn, [entry(advance_amount="1000")])  # Our own write
+    second = collections(conn, period="year", cache=cache)
+    assert second is not first
+    year = str(date.today().year)
+    assert collection_totals(second)[year][1] == collection_totals(first)[year][1] + 100000
+
+    other = sqlite3.connect(str(tmp_path / "court.db"))  # Another clerk's write
+    other.execute("UPDATE receipt_register SET amount = amount + 1 WHERE id = 1")
+    other.commit()
+    other.close()
+    assert collections(conn, period="year", cache=cache) is not second
@@ -0,0 +1,203 @@
+# --- true_copy_service.py ---
+
+"""The True Copy entry operations as a plain Python API, plus a command line for them.
+
+DataEntryManagement delegates every database operation to a TrueCopyService, so the same
+number generation, validation, duplicate-number checks, inserts, edits and summary are available
+to scripts without a display. Importing this module does not import tkinter, tkcalendar
+or config.
+
+    python true_copy_service.py --db court.db add --copy-type "Certified Copy" --category Urgent --advance 50
+    python true_copy_service.py list-pending --limit 20
+    python true_copy_service.py summary
+    python true_copy_service.py next-number --copy-type "Simple Copy"
+    python true_copy_service.py find --true-copy-number CC/001/2021
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+from entry_archive import attach_archive, find_applications
+from entry_store import (CATEGORIES, PENDING_PAGE_SIZE, RECEIPT_CATEGORIES, TRUE_COPY_PREFIXES, ConnectionManager,
+                         EntryValidationError, data_version, fetch_entry_detail, fetch_pending_page,
+                         first_pending_page, last_receipt_number, peek_true_copy_number, pending_changes,
+                         pending_summary, prepare_database, save_entries, update_entry)
+from money import format_rupees
+from pending_index import load_pending_index
+from reports import ReportCache, collections
+
+
+class TrueCopyService:
+    """Entry-screen operations on one database connection.
+
+    `db` is a ConnectionManager; by default one is made for `path`, or for the database
+    config.get_db_connection opens when no path is given. Methods open the connection on
+    first use and may be called from any single thread, such as a DbWorker's.
+    """
+
+    def __init__(self, db=None, path=None):
+        if db is None:
+            db = ConnectionManager(path=path) if path else ConnectionManager(_config_connection)
+        self.db = db
+        self.report_cache = ReportCache()  # Repeated report views are answered from memory
+
+    @property
+    def conn(self):
+        return self.db.connection()
+
+    def prepare(self):
+        """Applies pending schema migrations, trims the change log and attaches the archive.
+
+        With the archive attached, typed numbers are checked against archived years too.
+        """
+        prepare_database(self.conn)
+        attach_archive(self.conn)
+
+    def data_version(self):
+        """Returns PRAGMA data_version, which moves when another connection writes."""
+        return data_version(self.conn)
+
+    def next_true_copy_number(self, copy_type, category=None, year=None):
+        """Returns the next True Copy # for a copy type and category without reserving it."""
+        return peek_true_copy_number(self.conn, copy_type, category, year or datetime.now().year)
+
+    def last_receipt_number(self):
+        """Returns the last issued receipt number, or 0 before the first receipt."""
+        return last_receipt_number(self.conn)
+
+    def next_receipt_number(self):
+        """Returns the receipt number the next entry would get, as text."""
+        return str(self.last_receipt_number() + 1)
+
+    def add_entries(self, entries, year=None):
+        """Validates and saves entries in one transaction; returns (saved, [(index, message)])."""
+        return save_entries(self.conn, entries, year)
+
+    def add_entry(self, entry, year=None):
+        """Saves one entry and returns it with its final numbers; raises EntryValidationError if rejected."""
+        saved, errors = self.add_entries([entry], year)
+        if errors:
+            raise EntryValidationError(errors[0][1])
+        return saved[0]
+
+    def update_entry(self, entry_id, entry, row_version):
+        """Saves changes to a pending entry read at `row_version`; raises EntryConflictError if it moved on."""
+        return update_entry(self.conn, entry_id, entry, row_version)
+
+    def first_pending_page(self, limit=PENDING_PAGE_SIZE):
+        """Returns (watermark, rows) for the newest pending entries."""
+        return first_pending_page(self.conn, limit)
+
+    def pending_page(self, older_than=None, newer_than=None, limit=PENDING_PAGE_SIZE):
+        """Returns one keyset page of pending entries next to an (application_date, id) key."""
+        return fetch_pending_page(self.conn, older_than, newer_than, limit)
+
+    def pending_changes(self, since):
+        """Returns (watermark, ids, rows) for the pending entries changed after `since`."""
+        return pending_changes(self.conn, since)
+
+    def pending_index(self):
+        """Returns (watermark, PendingIndex) over every pending entry."""
+        return load_pending_index(self.conn)
+
+    def entry_detail(self, entry_id):
+        """Returns (application row ending in its row_version, payment type) for one application, or None."""
+        return fetch_entry_detail(self.conn, entry_id)
+
+    def find_entries(self, true_copy_number=None, receipt_number=None):
+        """Returns the applications with a True Copy # and/or receipt #, archived ones included."""
+        attach_archive(self.conn)  # Redefines the views, so years archived since are seen too
+        return find_applications(self.conn, true_copy_number, receipt_number)
+
+    def pending_summary(self):
+        """Returns (advance_paise, application_count, total_paise) rows, largest amount first."""
+        return pending_summary(self.conn)
+
+    def collections(self, start=None, end=None, period="month"):
+        """Returns collections per period, copy type, category and payment type between two dates."""
+        return collections(self.conn, start, end, period, cache=self.report_cache)
+
+    def close(self):
+        """Closes the connection."""
+        self.db.close()
+
+
+def _config_connection():
+    from config import get_db_connection  # Import here so the service does not pull in config
+    return get_db_connection()
+
+
+def main(argv=None):
+    """Command-line access to the entry operations."""
+    parser = argparse.ArgumentParser(description="Add and inspect True Copy applications without the entry window.")
+    parser.add_argument("--db", help="database file (default: the one config.py opens)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="save one application and its receipt")
+    add.add_argument("--date", default=datetime.now().strftime("%Y-%m-%d"), help="application date, YYYY-MM-DD")
+    add.add_argument("--copy-type", required=True, choices=sorted(TRUE_COPY_PREFIXES))
+    add.add_argument("--category", choices=CATEGORIES, help="for Certified Copies")
+    add.add_argument("--advance", required=True, help="advance amount")
+    add.add_argument("--true-copy-number", help="default: the next one")
+    add.add_argument("--receipt", help="receipt number (default: the next one)")
+    add.add_argument("--payment-type", default="advance", choices=RECEIPT_CATEGORIES)
+
+    listing = commands.add_parser("list-pending", help="print the newest pending applications")
+    listing.add_argument("--limit", type=int, default=50, help="rows to print (default 50)")
+
+    commands.add_parser("summary", help="print pending applications by advance amount")
+
+    number = commands.add_parser("next-number", help="print the next True Copy # and receipt #")
+    number.add_argument("--copy-type", required=True, choices=sorted(TRUE_COPY_PREFIXES))
+    number.add_argument("--category", choices=CATEGORIES)
+    number.add_argument("--year", type=int)
+    find = commands.add_parser("find", help="print applications by number, archived ones included")
+    find.add_argument("--true-copy-number")
+    find.add_argument("--receipt")
+    args = parser.parse_args(argv)
+
+    service = TrueCopyService(path=args.db)
+    try:
+        service.prepare()
+        if args.command == "add":
+            try:
+                saved = service.add_entry({
+                    "application_date": args.date,
+                    "copy_type": args.copy_type,
+                    "application_category": args.category,
+                    "true_copy_number": args.true_copy_number,
+                    "advance_amount": args.advance,
+                    "receipt_number": args.receipt,
+                    "payment_type": args.payment_type,
+                })
+            except EntryValidationError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+            print(f"True Copy #: {saved['true_copy_number']}\nReceipt #: {saved['receipt_number']}")
+        elif args.command == "list-pending":
+            _, rows = service.first_pending_page(limit=args.limit)
+            for row in rows:
+                print("\t".join("" if value is None else str(value) for value in row))
+        elif args.command == "find":
+            if not (args.true_copy_number or args.receipt):
+                parser.error("find needs --true-copy-number or --receipt")
+            for row in service.find_entries(args.true_copy_number, args.receipt):
+                print("\t".join("" if value is None else str(value) for value in row))
+        elif args.command == "summary":
+            total_applications = total_paise = 0
+            for row in service.pending_summary():
+                print(f"{format_rupees(row[0]):>10} {row[1]:>8} {format_rupees(row[2]):>12}")
+                total_applications += row[1]
+                total_paise += row[2]
+            print(f"{'Total':>10} {total_applications:>8} {format_rupees(total_paise):>12}")
+        else:
+            print(f"True Copy #: {service.next_true_copy_number(args.copy_type, args.category, args.year)}")
+            print(f"Receipt #: {service.next_receipt_number()}")
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())